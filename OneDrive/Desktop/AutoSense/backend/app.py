@@ -1,50 +1,207 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.cli import AppGroup
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from flask_sqlalchemy import SQLAlchemy
+from flask_jwt_extended import JWTManager, create_access_token, decode_token, get_jti, get_jwt, jwt_required, get_jwt_identity
 from flask_mail import Mail, Message
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
-import os
+from backend.config.database import db
+from backend.config.settings import Config
+from datetime import datetime
+import atexit
+import click
 import uuid
 import json
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
-import pandas as pd
 
 # Initialize Flask app
 app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key')
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-string')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///authsense.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Email configuration
-app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
-app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
-app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'True').lower() == 'true'
-app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
-app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
+# Settings live in Config; services read the same values from it
+app.config.from_object(Config)
 
 # Initialize extensions
 CORS(app)
 jwt = JWTManager(app)
-db = SQLAlchemy(app)
+db.init_app(app)
 mail = Mail(app)
 
 # Import models after db initialization
-from models.user import User
-from models.session import Session
-from models.behavior import BehaviorLog
-from models.alert import Alert
+from backend.models.user import User
+from backend.models.session import Session
+from backend.models.behavior import BehaviorLog
+from backend.models.alert import Alert
+from backend.models.ai_model import AIModel
+from backend.models.training_job import TrainingJob
+from backend.models.behavior_rollup import BehaviorRollup
+from backend.models.log_partition import BehaviorLogPartition
+from backend.models.behavior_stats import UserBehaviorStats
+from backend.models.email_outbox import EmailOutbox
+from backend.services.log_writer import BehaviorLogWriter
+from backend.services.model_store import ModelStore
+from backend.services.inference_engine import compiled_forest
+from backend.services.online_model import OnlineBaselineModel, merge_online_models
+from backend.services.training_jobs import BEHAVIOR_FEATURES, TrainingJobManager, behavior_feature_matrix, fit_behavior_model
+from backend.services.retrain_service import FleetRetrainer
+from backend.services.sample_codec import encode_row_samples
+from backend.services.log_partitions import BehaviorLogPartitions
+from backend.services.behavior_stats import BehaviorStatsStore
+from backend.services.session_cache import ActiveSessionCache
+from backend.services.session_reaper import SessionReaper
+from backend.services.session_trust import SessionTrustTracker
+from backend.services.scoring_scheduler import ScoringScheduler
+from backend.services.baseline_prefilter import BaselinePrefilter
+from backend.services.behavior_stream import BehaviorStreamHub, StreamTickets, make_socket_server
+from backend.services.revocation_index import RevocationIndex
+from backend.services.email_outbox import OutboxMailer, alert_email
+from backend.services.auth_service import otp_store, password_hasher
+from backend.services.password_hasher import PasswordHasherBusy
+from backend.services.rate_limiter import TokenBucketLimiter, make_bucket_backend
+from backend.middleware.rate_limit_middleware import rate_limit, trust_proxy_hops
 
-# AI Model Storage
-user_models = {}
+# Cascade stage one: per-user baselines screened in one array operation before the full model
+baseline_prefilter = BaselinePrefilter(
+    len(BEHAVIOR_FEATURES),
+    accept_score=app.config['CASCADE_ACCEPT_SCORE'],
+    min_events=app.config['CASCADE_MIN_EVENTS']
+)
 
-def generate_otp():
-    import random
-    return str(random.randint(100000, 999999))
+# AI Model Storage: persisted in ai_models, served from a bounded LRU cache
+model_store = ModelStore(
+    db,
+    AIModel,
+    max_entries=app.config['MODEL_CACHE_MAX_ENTRIES'],
+    max_bytes=app.config['MODEL_CACHE_MAX_BYTES'],
+    max_missing_entries=app.config['MODEL_CACHE_MAX_MISSING_ENTRIES'],
+    # A baseline the previous model vouched for does not carry over to a new one
+    on_replace=baseline_prefilter.forget
+)
+
+# Streaming baselines for users in online scoring mode
+online_store = ModelStore(
+    db,
+    AIModel,
+    model_type='online',
+    max_entries=app.config['MODEL_CACHE_MAX_ENTRIES'],
+    max_bytes=app.config['MODEL_CACHE_MAX_BYTES'],
+    max_missing_entries=app.config['MODEL_CACHE_MAX_MISSING_ENTRIES'],
+    merge=merge_online_models
+)
+
+# Per-user behavior counters, bumped in the same transaction as every log insert
+behavior_stats = BehaviorStatsStore(db, UserBehaviorStats)
+
+# Active sessions are looked up from memory; last_activity is written by a debounced heartbeat
+session_cache = ActiveSessionCache(
+    app,
+    db,
+    Session,
+    ttl=app.config['SESSION_CACHE_TTL'],
+    heartbeat_interval=app.config['SESSION_HEARTBEAT_INTERVAL']
+)
+atexit.register(session_cache.stop)
+
+# Sessions idle past SESSION_TIMEOUT_MINUTES are expired by a background sweeper
+session_reaper = SessionReaper(
+    app,
+    db,
+    Session,
+    timeout_minutes=app.config['SESSION_TIMEOUT_MINUTES'],
+    sweep_interval=app.config['SESSION_REAPER_INTERVAL'],
+    session_cache=session_cache
+)
+atexit.register(session_reaper.stop)
+
+# Sliding-window trust per session, kept in memory so scoring never re-reads history
+session_trust = SessionTrustTracker(
+    BEHAVIOR_FEATURES,
+    window=app.config['TRUST_WINDOW'],
+    alpha=app.config['TRUST_EWMA_ALPHA'],
+    threshold=app.config['TRUST_SCORE_THRESHOLD'],
+    min_low=app.config['TRUST_WINDOW_MIN_LOW'],
+    hard_floor=app.config['TRUST_HARD_FLOOR'],
+    max_sessions=app.config['TRUST_MAX_SESSIONS'],
+    idle_seconds=app.config['SESSION_TIMEOUT_MINUTES'] * 60
+)
+scoring_scheduler = ScoringScheduler(
+    session_trust,
+    high_trust=app.config['SCORING_HIGH_TRUST'],
+    max_skip=app.config['SCORING_MAX_SKIP'],
+    drift_tolerance=app.config['SCORING_DRIFT_TOLERANCE']
+)
+
+# Alert emails commit to the outbox with the alert; worker threads deliver them
+outbox_mailer = OutboxMailer(
+    app,
+    db,
+    EmailOutbox,
+    mail.connect,
+    workers=app.config['MAIL_OUTBOX_WORKERS'],
+    batch_size=app.config['MAIL_OUTBOX_BATCH_SIZE'],
+    poll_interval=app.config['MAIL_OUTBOX_POLL_INTERVAL'],
+    max_attempts=app.config['MAIL_OUTBOX_MAX_ATTEMPTS'],
+    backoff_base=app.config['MAIL_OUTBOX_BACKOFF_BASE']
+)
+atexit.register(outbox_mailer.stop)
+
+# Tokens of ended sessions are rejected by @jwt_required() via the blocklist loader
+revocations = RevocationIndex(
+    app,
+    db,
+    Session,
+    token_lifetime=app.config['JWT_ACCESS_TOKEN_EXPIRES'],
+    sync_interval=app.config['REVOCATION_SYNC_INTERVAL']
+)
+atexit.register(revocations.stop)
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return revocations.is_revoked(jwt_payload['jti'])
+
+@jwt.user_identity_loader
+def user_identity(user_id):
+    # PyJWT 2.10+ rejects tokens whose "sub" claim is not a string
+    return str(user_id)
+
+def current_user_id():
+    """Database id of the user of the current access token"""
+    return int(get_jwt_identity())
+
+@app.before_request
+def start_background_workers():
+    revocations.start()
+    session_reaper.start()
+    outbox_mailer.start()
+
+def flush_behavior_logs(rows):
+    """Bulk-write buffered behavior logs"""
+    with app.app_context():
+        db.session.bulk_insert_mappings(BehaviorLog, rows)
+        behavior_stats.record(rows)
+        db.session.commit()
+
+# Normal behavior logs are written in the background; flushed on shutdown
+log_writer = BehaviorLogWriter(
+    flush_behavior_logs,
+    batch_size=app.config['LOG_WRITER_BATCH_SIZE'],
+    flush_interval=app.config['LOG_WRITER_FLUSH_INTERVAL'],
+    max_queue_size=app.config['LOG_WRITER_QUEUE_SIZE'],
+    max_retry_rows=app.config['LOG_WRITER_QUEUE_SIZE']
+)
+atexit.register(log_writer.stop)
+
+# Hashed, expiring OTPs and the password hashing pool are shared with the
+# service layer (services/auth_service.py) rather than built a second time
+atexit.register(password_hasher.shutdown)
+
+# Checked before any query or hash runs on the auth endpoints
+auth_limiter = TokenBucketLimiter(make_bucket_backend(app.config['RATE_LIMIT_STORE_URL']), {
+    'ip': (app.config['AUTH_LIMIT_IP_PER_MINUTE'], app.config['AUTH_LIMIT_IP_BURST']),
+    'email': (app.config['AUTH_LIMIT_EMAIL_PER_MINUTE'], app.config['AUTH_LIMIT_EMAIL_BURST'])
+})
+# Per-IP buckets key on the client behind any trusted proxies, not the proxy itself
+trust_proxy_hops(app, app.config['TRUSTED_PROXY_HOPS'])
+
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    return jsonify({'error': 'Too many login attempts in progress, try again shortly'}), 503
 
 def send_otp_email(email, otp):
     try:
@@ -53,102 +210,79 @@ def send_otp_email(email, otp):
             sender=app.config['MAIL_USERNAME'],
             recipients=[email]
         )
-        msg.body = f"Your OTP for AuthSense+ is: {otp}\nValid for 5 minutes."
+        msg.body = f"Your OTP for AuthSense+ is: {otp}\nValid for {app.config['OTP_EXPIRY_MINUTES']} minutes."
         mail.send(msg)
         return True
     except Exception as e:
         print(f"Error sending OTP: {e}")
         return False
 
-def send_alert_email(user_email, session_id, location, behavior_data, reason):
-    try:
-        msg = Message(
-            subject="⚠️ AuthSense+ Security Alert — Suspicious Session Activity",
-            sender=app.config['MAIL_USERNAME'],
-            recipients=[user_email]
-        )
-        
-        body = f"""
-        Hello,
-        
-        We detected abnormal behavior during your recent AuthSense session.
-        
-        📍 Location: {location}
-        🧠 Trust Score: {behavior_data.get('trust_score', 'N/A')}%
-        ⚡ Detected Issue: {reason}
-        
-        Session ID: {session_id}
-        Timestamp: {datetime.now().isoformat()}
-        
-        Your account was automatically logged out for safety.
-        
-        — AuthSense+ Security AI
-        """
-        
-        msg.body = body
-        
-        # Attach behavior data as JSON
-        behavior_json = json.dumps(behavior_data, indent=2)
-        part = msg.attach(filename='session_log.json', content=behavior_json)
-        
-        mail.send(msg)
-        return True
-    except Exception as e:
-        print(f"Error sending alert email: {e}")
-        return False
-
 def train_behavior_model(user_id, behavior_data):
     """Train an anomaly detection model for the user"""
     try:
-        df = pd.DataFrame(behavior_data)
-        
-        # Extract features for training
-        features = ['keystroke_speed', 'mouse_speed', 'idle_time', 'cursor_path_length']
-        feature_data = df[features].fillna(0).values
-        
-        # Normalize features
-        scaler = StandardScaler()
-        scaled_data = scaler.fit_transform(feature_data)
-        
-        # Train Isolation Forest
-        model = IsolationForest(contamination=0.1, random_state=42)
-        model.fit(scaled_data)
-        
-        # Store model and scaler
-        user_models[user_id] = {
-            'model': model,
-            'scaler': scaler,
-            'features': features
-        }
-        
+        # Persist model and scaler
+        model_store.save(user_id, fit_behavior_model(behavior_data))
         return True
     except Exception as e:
         print(f"Error training model: {e}")
         return False
 
+# Training runs off the request thread; finished models replace the cached copy
+training_jobs = TrainingJobManager(
+    app,
+    db,
+    TrainingJob,
+    on_complete=lambda user_id, model_data: model_store.save(user_id, model_data),
+    executor=app.config['TRAINING_EXECUTOR'],
+    max_workers=app.config['TRAINING_MAX_WORKERS']
+)
+atexit.register(training_jobs.shutdown)
+
+def set_scoring_mode(user_id, mode):
+    """Switch a user between batch IsolationForest and online baseline scoring"""
+    if mode == 'online':
+        if online_store.load(user_id) is None:
+            online_store.save(user_id, {
+                'model': OnlineBaselineModel(len(BEHAVIOR_FEATURES)),
+                'features': BEHAVIOR_FEATURES
+            })
+    else:
+        online_store.delete(user_id)
+
+def update_online_model(user_id, behavior_events):
+    """Fold accepted events into the user's streaming baseline, if they have one"""
+    model_data = online_store.load(user_id)
+    if model_data is None:
+        return
+    
+    model = model_data['model']
+    previous_count = model.count
+    model.update_many(behavior_feature_matrix(behavior_events, model_data['features']))
+    
+    # Persist every N events rather than on each one
+    persist_every = app.config['ONLINE_MODEL_PERSIST_EVERY']
+    if model.count // persist_every != previous_count // persist_every:
+        online_store.save(user_id, model_data)
+
 def predict_anomaly(user_id, current_behavior):
     """Predict if current behavior is anomalous"""
-    if user_id not in user_models:
+    online_data = online_store.load(user_id)
+    if online_data is not None:
+        feature_matrix = behavior_feature_matrix([current_behavior], online_data['features'])
+        return float(online_data['model'].trust_scores(feature_matrix)[0])
+    
+    model_data = model_store.load(user_id)
+    if model_data is None:
         return 100.0  # Return high score if no model exists yet
     
     try:
-        model_data = user_models[user_id]
         features = model_data['features']
         
-        # Prepare current behavior data
-        feature_vector = np.array([[
-            current_behavior.get('keystroke_speed', 0),
-            current_behavior.get('mouse_speed', 0),
-            current_behavior.get('idle_time', 0),
-            current_behavior.get('cursor_path_length', 0)
-        ]])
-        
-        # Scale the data
-        scaled_vector = model_data['scaler'].transform(feature_vector)
+        # Prepare current behavior data (keystroke dynamics come from raw timings)
+        feature_vector = behavior_feature_matrix([current_behavior], features, fill=model_data['scaler'].mean_)
         
-        # Predict anomaly (1 = normal, -1 = anomaly)
-        prediction = model_data['model'].predict(scaled_vector)
-        anomaly_score = model_data['model'].score_samples(scaled_vector)[0]
+        # Scale and score in one compiled pass (identical to sklearn's score_samples)
+        anomaly_score = compiled_forest(model_data).score_samples(feature_vector)[0]
         
         # Convert to trust score (0-100)
         trust_score = max(0, min(100, (anomaly_score + 2) * 25))  # Normalize to 0-100
@@ -158,7 +292,72 @@ def predict_anomaly(user_id, current_behavior):
         print(f"Error predicting anomaly: {e}")
         return 100.0
 
+def predict_anomaly_batch(user_id, behavior_events):
+    """Predict trust scores for a batch of behavior events in one pass"""
+    trust_scores = model_trust_scores(user_id, behavior_events)
+    if trust_scores is None:
+        return [100.0] * len(behavior_events)  # No model yet, or it could not score
+    return trust_scores
+
+def model_trust_scores(user_id, behavior_events):
+    """Trust scores from the user's online or batch model, or None when no model produced them"""
+    online_data = online_store.load(user_id)
+    if online_data is not None:
+        feature_matrix = behavior_feature_matrix(behavior_events, online_data['features'])
+        return online_data['model'].trust_scores(feature_matrix).tolist()
+    
+    model_data = model_store.load(user_id)
+    if model_data is None:
+        return None
+    
+    try:
+        # One row per event, same column order the model was trained on
+        feature_matrix = behavior_feature_matrix(behavior_events, model_data['features'], fill=model_data['scaler'].mean_)
+        
+        # Scale and score every row in one compiled pass
+        anomaly_scores = compiled_forest(model_data).score_samples(feature_matrix)
+        
+        # Convert to trust scores (0-100)
+        trust_scores = np.clip((anomaly_scores + 2) * 25, 0, 100)
+        
+        return trust_scores.tolist()
+    except Exception as e:
+        print(f"Error predicting batch anomaly: {e}")
+        return None
+
+def uses_derived_features(user_id):
+    """Whether the user's scoring model reads features beyond the plain ones the baseline prefilter sees"""
+    if online_store.load(user_id) is not None:
+        return False
+    model_data = model_store.load(user_id)
+    return model_data is not None and not set(model_data['features']) <= set(BEHAVIOR_FEATURES)
+
+def cascade_scores(user_id, behavior_events):
+    """Trust scores for a user's events: baseline prefilter first, the full model only for events it cannot clear"""
+    if uses_derived_features(user_id):
+        # A baseline of plain features cannot vouch for keystroke or mouse dynamics
+        return predict_anomaly_batch(user_id, behavior_events)
+    
+    plain_features = behavior_feature_matrix(behavior_events, BEHAVIOR_FEATURES)
+    trust_scores, needs_model = baseline_prefilter.screen(user_id, plain_features)
+    trust_scores = trust_scores.tolist()
+    
+    escalated = np.flatnonzero(needs_model).tolist()
+    if escalated:
+        model_scores = model_trust_scores(user_id, [behavior_events[i] for i in escalated])
+        if model_scores is None:
+            # Full trust without a model, but nothing vouched for these events
+            model_scores = [100.0] * len(escalated)
+        else:
+            # Only events the full model accepted move the baseline
+            accepted = [i for i, trust_score in zip(escalated, model_scores) if trust_score >= app.config['TRUST_SCORE_THRESHOLD']]
+            baseline_prefilter.update(user_id, plain_features[accepted])
+        for i, trust_score in zip(escalated, model_scores):
+            trust_scores[i] = trust_score
+    return trust_scores
+
 @app.route('/api/auth/signup', methods=['POST'])
+@rate_limit(auth_limiter, 'signup')
 def signup():
     data = request.json
     email = data.get('email')
@@ -169,19 +368,15 @@ def signup():
     if existing_user:
         return jsonify({'error': 'User already exists'}), 400
     
-    otp = generate_otp()
-    otp_expiry = datetime.now() + timedelta(minutes=5)
-    
     user = User(
         email=email,
-        password_hash=generate_password_hash(password),
-        otp=otp,
-        otp_expiry=otp_expiry
+        password_hash=password_hasher.hash(password)
     )
     
     db.session.add(user)
     db.session.commit()
     
+    otp = otp_store.issue('signup', email)
     if send_otp_email(email, otp):
         return jsonify({'message': 'OTP sent to email'}), 200
     else:
@@ -193,36 +388,33 @@ def verify_signup_otp():
     email = data.get('email')
     otp = data.get('otp')
     
-    user = User.query.filter_by(email=email, otp=otp).first()
-    
-    if not user or user.otp_expiry < datetime.now():
+    # The code is consumed on success
+    if not otp_store.verify('signup', email, otp):
         return jsonify({'error': 'Invalid or expired OTP'}), 400
     
-    # Clear OTP after verification
-    user.otp = None
-    user.otp_expiry = None
-    db.session.commit()
-    
     return jsonify({'message': 'Account verified successfully'}), 200
 
 @app.route('/api/auth/login', methods=['POST'])
+@rate_limit(auth_limiter, 'login')
 def login():
     data = request.json
     email = data.get('email')
     password = data.get('password')
     
     user = User.query.filter_by(email=email).first()
-    
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user:
         return jsonify({'error': 'Invalid credentials'}), 401
     
-    otp = generate_otp()
-    otp_expiry = datetime.now() + timedelta(minutes=5)
+    matches, rehash = password_hasher.verify(user.password_hash, password)
+    if not matches:
+        return jsonify({'error': 'Invalid credentials'}), 401
     
-    user.otp = otp
-    user.otp_expiry = otp_expiry
-    db.session.commit()
+    # Hash parameters changed since this password was set: upgrade it now
+    if rehash:
+        user.password_hash = password_hasher.hash(password)
+        db.session.commit()
     
+    otp = otp_store.issue('login', email)
     if send_otp_email(email, otp):
         return jsonify({'message': 'OTP sent to email'}), 200
     else:
@@ -234,26 +426,29 @@ def verify_login_otp():
     email = data.get('email')
     otp = data.get('otp')
     
-    user = User.query.filter_by(email=email, otp=otp).first()
+    if not otp_store.verify('login', email, otp):
+        return jsonify({'error': 'Invalid or expired OTP'}), 400
     
-    if not user or user.otp_expiry < datetime.now():
+    user = User.query.filter_by(email=email).first()
+    if not user:
         return jsonify({'error': 'Invalid or expired OTP'}), 400
     
-    # Clear OTP and generate session token
+    # OTP consumed; generate session token
     access_token = create_access_token(identity=user.id)
     
     session_id = str(uuid.uuid4())
     session = Session(
         user_id=user.id,
         session_token=access_token,
+        jti=get_jti(access_token),
         created_at=datetime.now(),
         last_activity=datetime.now()
     )
     
-    user.otp = None
-    user.otp_expiry = None
     db.session.add(session)
     db.session.commit()
+    session_cache.invalidate(user.id)
+    session_reaper.track(session.id, session.last_activity)
     
     return jsonify({
         'access_token': access_token,
@@ -261,50 +456,229 @@ def verify_login_otp():
         'email': user.email
     }), 200
 
+def build_behavior_row(user_id, session_token, behavior_data, trust_score, timestamp):
+    """BehaviorLog column values for one event, usable for add() or bulk inserts"""
+    return {
+        'user_id': user_id,
+        'session_id': session_token,
+        'timestamp': timestamp,
+        **encode_row_samples(behavior_data, app.config['SAMPLE_COMPRESS_MIN_BYTES']),
+        'keystroke_speed': behavior_data.get('keystroke_speed'),
+        'mouse_speed': behavior_data.get('mouse_speed'),
+        'idle_time': behavior_data.get('idle_time'),
+        'cursor_path_length': behavior_data.get('cursor_path_length'),
+        'trust_score': trust_score,
+        'is_anomaly': trust_score < app.config['TRUST_SCORE_THRESHOLD']
+    }
+
 @app.route('/api/behavior/events', methods=['POST'])
 @jwt_required()
 def record_behavior():
-    user_id = get_jwt_identity()
+    user_id = current_user_id()
     behavior_data = request.json
     
-    # Update last activity in session
-    session = Session.query.filter_by(user_id=user_id, status='active').first()
-    if session:
-        session.last_activity = datetime.now()
-    
-    # Calculate trust score
-    trust_score = predict_anomaly(user_id, behavior_data)
+    session = session_cache.get_active(user_id, get_jwt()['jti'])
+    now = datetime.now()
+    session_cache.touch(session, now)
+    
+    # Calculate trust score; steady high-trust sessions reuse their last score for most events
+    trust_key = session_trust_key(user_id, session)
+    needs_score = scoring_scheduler.plan(trust_key, [behavior_data])[0]
+    state = session_trust.get(trust_key)
+    if needs_score or state is None:
+        trust_score = cascade_scores(user_id, [behavior_data])[0]
+        scored = [behavior_data]
+    else:
+        trust_score = state.last_score()
+        scored = []
     
     # Check if behavior is anomalous
-    is_anomaly = trust_score < 70  # Threshold
+    is_anomaly = trust_score < app.config['TRUST_SCORE_THRESHOLD']
+    
+    # The session's recent scores decide the logout, not this event alone
+    logout, session_score = session_trust.observe(trust_key, scored, [trust_score] if scored else [])
     
     # Store behavior log
-    behavior_log = BehaviorLog(
-        user_id=user_id,
-        session_id=session.session_token if session else 'unknown',
-        timestamp=datetime.now(),
-        keystroke_data=json.dumps(behavior_data.get('keystroke_data', {})),
-        mouse_data=json.dumps(behavior_data.get('mouse_data', {})),
-        trust_score=trust_score,
-        is_anomaly=is_anomaly
+    behavior_row = build_behavior_row(
+        user_id, session.session_token if session else 'unknown', behavior_data, trust_score, now
     )
     
-    db.session.add(behavior_log)
-    
-    if is_anomaly:
+    if logout:
+        # Logouts are written synchronously so the alert path sees them
+        db.session.add(BehaviorLog(**behavior_row))
+        behavior_stats.record([behavior_row])
+        
         # Trigger alert
-        trigger_anomaly_alert(user_id, behavior_data, trust_score)
-        return jsonify({'action': 'logout', 'trust_score': trust_score}), 200
+        trigger_anomaly_alert(user_id, session, behavior_data, session_score)
+        return jsonify({'action': 'logout', 'trust_score': trust_score, 'session_trust': session_score}), 200
+    
+    # Normal events go through the write-behind buffer; fall back to a
+    # synchronous write when it is full
+    if not log_writer.submit(behavior_row):
+        db.session.add(BehaviorLog(**behavior_row))
+        behavior_stats.record([behavior_row])
+        db.session.commit()
     
-    db.session.commit()
-    return jsonify({'trust_score': trust_score}), 200
+    # Scored, accepted events train the streaming baseline for users in online mode
+    if scored and not is_anomaly:
+        update_online_model(user_id, scored)
+    
+    return jsonify({'trust_score': trust_score, 'session_trust': session_score, 'scored': bool(scored)}), 200
 
-def trigger_anomaly_alert(user_id, behavior_data, trust_score):
-    """Trigger alert when anomaly is detected"""
-    user = User.query.get(user_id)
-    session = Session.query.filter_by(user_id=user_id).order_by(Session.created_at.desc()).first()
+@app.route('/api/behavior/events/batch', methods=['POST'])
+@jwt_required()
+def record_behavior_batch():
+    user_id = current_user_id()
+    payload = request.json
+    
+    # Accept either a bare array or {"events": [...]}
+    events = payload.get('events') if isinstance(payload, dict) else payload
+    if not isinstance(events, list) or not events:
+        return jsonify({'error': 'Events array required'}), 400
+    if len(events) > app.config['MAX_BATCH_EVENTS']:
+        return jsonify({'error': f"Batch exceeds {app.config['MAX_BATCH_EVENTS']} events"}), 413
+    
+    return jsonify(ingest_behavior_events(user_id, get_jwt()['jti'], events)), 200
+
+def ingest_behavior_events(user_id, jti, events):
+    """Score, log and act on a batch of events sent with token `jti`; shared by the batch route and behavior streams"""
+    # One session lookup and heartbeat for the whole batch
+    session = session_cache.get_active(user_id, jti)
+    now = datetime.now()
+    session_cache.touch(session, now)
+    
+    trust_scores, logout, session_score = score_behavior_events(user_id, session, events)
+    
+    behavior_rows = [
+        build_behavior_row(user_id, session.session_token if session else 'unknown', event, trust_score, now)
+        for event, trust_score in zip(events, trust_scores)
+    ]
+    
+    lowest_score = min(trust_scores)
+    if logout:
+        # Single bulk insert, committed together with the alert for the worst event
+        db.session.bulk_insert_mappings(BehaviorLog, behavior_rows)
+        behavior_stats.record(behavior_rows)
+        worst_event = events[trust_scores.index(lowest_score)]
+        trigger_anomaly_alert(user_id, session, worst_event, session_score)
+        action = 'logout'
+    else:
+        # Normal batches go through the write-behind buffer
+        rejected_rows = log_writer.submit_many(behavior_rows)
+        if rejected_rows:
+            db.session.bulk_insert_mappings(BehaviorLog, rejected_rows)
+            behavior_stats.record(rejected_rows)
+            db.session.commit()
+        action = 'continue'
+    
+    return {
+        'action': action,
+        'trust_score': lowest_score,
+        'session_trust': session_score,
+        'trust_scores': trust_scores
+    }
+
+def score_behavior_events(user_id, session, events):
+    """(trust scores, logout, session trust) for a batch of a session's events; the CPU-bound part of ingest"""
+    # Score the events the scheduler picks through the cascade; the rest carry the last score
+    trust_key = session_trust_key(user_id, session)
+    plan = scoring_scheduler.plan(trust_key, events)
+    scored = [event for event, needs_score in zip(events, plan) if needs_score]
+    scored_scores = cascade_scores(user_id, scored) if scored else []
+    state = session_trust.get(trust_key)
+    last_score = state.last_score() if state else 100.0
+    trust_scores = []
+    remaining = iter(scored_scores)
+    for needs_score in plan:
+        if needs_score:
+            last_score = next(remaining)
+        trust_scores.append(last_score)
+    
+    logout, session_score = session_trust.observe(trust_key, scored, scored_scores)
+    if not logout:
+        # Events scored and accepted train the streaming baseline for users in
+        # online mode; skipped events only carry a score forward
+        accepted = [
+            event for event, trust_score in zip(scored, scored_scores)
+            if trust_score >= app.config['TRUST_SCORE_THRESHOLD']
+        ]
+        if accepted:
+            update_online_model(user_id, accepted)
+    return trust_scores, logout, session_score
+
+def authenticate_stream(token):
+    """(user_id, jti, expiry) for a stream's access token; raises if it is invalid or revoked"""
+    claims = decode_token(token)
+    if revocations.is_revoked(claims['jti']):
+        raise ValueError('Token has been revoked')
+    return int(claims['sub']), claims['jti'], claims.get('exp')
+
+def ingest_streamed_events(user_id, jti, events):
+    """ingest_behavior_events for a frame of a long-lived stream, which has no request to end its transaction"""
+    try:
+        return ingest_behavior_events(user_id, jti, events)
+    except Exception:
+        db.session.rollback()
+        raise
+
+# Streamed behavior: frames of events up, trust updates and server-pushed logouts down
+behavior_stream = BehaviorStreamHub(
+    ingest_streamed_events,
+    authenticate_stream,
+    revocations.is_revoked,
+    max_events=app.config['MAX_BATCH_EVENTS'],
+    queue_size=app.config['STREAM_QUEUE_SIZE'],
+    poll_interval=app.config['STREAM_POLL_INTERVAL'],
+    heartbeat_interval=app.config['STREAM_HEARTBEAT_INTERVAL']
+)
+
+stream_tickets = StreamTickets(app.config['SECRET_KEY'], ttl=app.config['STREAM_TICKET_TTL'])
+
+def behavior_stream_socket(ws):
+    # Authenticated by the first frame: {"type": "auth", "token": "<access token>"}
+    behavior_stream.serve(ws)
+
+# WebSocket streams need flask-sock; without it clients use the SSE fallback
+sock = make_socket_server(app)
+if sock is not None:
+    sock.route('/api/behavior/stream')(behavior_stream_socket)
+
+@app.route('/api/behavior/stream/ticket', methods=['POST'])
+@jwt_required()
+def behavior_stream_ticket():
+    # Traded for the access token so only a short-lived ticket goes in the SSE URL
+    claims = get_jwt()
+    ticket = stream_tickets.issue(current_user_id(), claims['jti'], claims.get('exp'))
+    return jsonify({'ticket': ticket, 'expires_in': app.config['STREAM_TICKET_TTL']}), 200
+
+@app.route('/api/behavior/stream/events', methods=['GET'])
+def behavior_stream_events():
+    # SSE fallback: pushed trust updates and logouts; events are still POSTed to /api/behavior/events/batch
+    try:
+        user_id, jti, expires_at = stream_tickets.redeem(request.args.get('ticket'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 401
+    if revocations.is_revoked(jti):
+        return jsonify({'error': 'Token has been revoked'}), 401
+    
+    channel = behavior_stream.open(user_id, jti, expires_at)
+    return Response(
+        behavior_stream.sse(channel),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def session_trust_key(user_id, session):
+    """Key of a session's trust state; events without an active session share a per-user one"""
+    return session.id if session else f"user:{user_id}"
+
+def trigger_anomaly_alert(user_id, scored_session, behavior_data, trust_score):
+    """Trigger alert when anomaly is detected, ending the session the events were scored in"""
+    user = db.session.get(User, user_id)
+    # The cached session the request's token belongs to, not the user's newest one
+    session = db.session.get(Session, scored_session.id) if scored_session else None
     
-    if user and session:
+    if user and session and session.status == 'active':
         # Get location from behavior data
         location = behavior_data.get('location', 'Unknown')
         
@@ -318,38 +692,77 @@ def trigger_anomaly_alert(user_id, behavior_data, trust_score):
             behavior_data=json.dumps(behavior_data)
         )
         
-        # Update session status to terminated
+        # Update session status to terminated and revoke its token
         session.status = 'terminated'
+        session.ended_at = datetime.now()
         
         db.session.add(alert)
-        db.session.commit()
-        
-        # Send alert email
-        send_alert_email(
+        # Alert email commits with the alert and is delivered in the background
+        outbox_mailer.enqueue(alert_email(
+            user_id,
             user.email,
             session.session_token,
             str(location),
             behavior_data,
-            f"Trust score dropped to {trust_score}%"
-        )
+            f"Trust score dropped to {trust_score}%",
+            alert.timestamp
+        ))
+        db.session.commit()
+        session_terminated(user_id, session, trust_score)
+    else:
+        # No active session left to end; the batch's log rows are still kept
+        db.session.commit()
+
+def session_terminated(user_id, session, trust_score):
+    """In-process follow-up once a session's termination has committed"""
+    revocations.revoke(session.jti, session.created_at)
+    session_cache.invalidate(user_id)
+    session_trust.end(session.id)
+    behavior_stream.terminate(user_id, f"Trust score dropped to {trust_score}%", trust_score, jti=session.jti)
+    outbox_mailer.notify()
 
 @app.route('/api/ai/train', methods=['POST'])
 @jwt_required()
 def train_model():
-    user_id = get_jwt_identity()
+    user_id = current_user_id()
     behavior_data = request.json
     
-    success = train_behavior_model(user_id, behavior_data)
+    if not isinstance(behavior_data, list) or not behavior_data:
+        return jsonify({'error': 'Training samples required'}), 400
     
-    if success:
-        return jsonify({'message': 'Model trained successfully'}), 200
-    else:
-        return jsonify({'error': 'Failed to train model'}), 500
+    job_id = training_jobs.submit(user_id, behavior_data)
+    
+    return jsonify({'job_id': job_id, 'status': training_jobs.status(job_id)['status']}), 202
+
+@app.route('/api/ai/train/<job_id>', methods=['GET'])
+@jwt_required()
+def training_status(job_id):
+    user_id = current_user_id()
+    
+    job = training_jobs.status(job_id, user_id=user_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify(job), 200
+
+@app.route('/api/ai/mode', methods=['GET', 'POST'])
+@jwt_required()
+def scoring_mode():
+    user_id = current_user_id()
+    
+    if request.method == 'POST':
+        mode = (request.json or {}).get('mode')
+        if mode not in ('batch', 'online'):
+            return jsonify({'error': "Mode must be 'batch' or 'online'"}), 400
+        set_scoring_mode(user_id, mode)
+    
+    mode = 'online' if online_store.load(user_id) is not None else 'batch'
+    return jsonify({'mode': mode}), 200
 
 @app.route('/api/ai/predict', methods=['POST'])
 @jwt_required()
 def predict():
-    user_id = get_jwt_identity()
+    user_id = current_user_id()
     behavior_data = request.json
     
     trust_score = predict_anomaly(user_id, behavior_data)
@@ -359,7 +772,7 @@ def predict():
 @app.route('/api/user/dashboard', methods=['GET'])
 @jwt_required()
 def user_dashboard():
-    user_id = get_jwt_identity()
+    user_id = current_user_id()
     
     # Get current trust score
     user = User.query.get(user_id)
@@ -382,12 +795,128 @@ def admin_users():
     users = User.query.all()
     return jsonify({'users': [user.to_dict() for user in users]}), 200
 
+@app.route('/api/admin/model_cache', methods=['GET'])
+@jwt_required()
+def admin_model_cache():
+    return jsonify(model_store.stats()), 200
+
+@app.route('/api/admin/session_reaper', methods=['GET'])
+@jwt_required()
+def admin_session_reaper():
+    return jsonify(session_reaper.stats), 200
+
+@app.route('/api/admin/session_trust', methods=['GET'])
+@jwt_required()
+def admin_session_trust():
+    return jsonify(session_trust.stats), 200
+
+@app.route('/api/admin/scoring_scheduler', methods=['GET'])
+@jwt_required()
+def admin_scoring_scheduler():
+    return jsonify(scoring_scheduler.stats), 200
+
+@app.route('/api/admin/scoring_cascade', methods=['GET'])
+@jwt_required()
+def admin_scoring_cascade():
+    return jsonify(baseline_prefilter.stats), 200
+
+@app.route('/api/admin/behavior_stream', methods=['GET'])
+@jwt_required()
+def admin_behavior_stream():
+    return jsonify(behavior_stream.stats), 200
+
+@app.route('/api/admin/mail_outbox', methods=['GET'])
+@jwt_required()
+def admin_mail_outbox():
+    return jsonify(outbox_mailer.stats), 200
+
+@app.route('/api/admin/rate_limits', methods=['GET'])
+@jwt_required()
+def admin_rate_limits():
+    return jsonify(auth_limiter.stats), 200
+
 @app.route('/api/admin/logs', methods=['GET'])
 @jwt_required()
 def admin_logs():
     alerts = Alert.query.order_by(Alert.timestamp.desc()).limit(50).all()
     return jsonify({'logs': [alert.to_dict() for alert in alerts]}), 200
 
+# Maintenance commands: flask authsense <command>
+authsense_cli = AppGroup('authsense', help='AuthSense maintenance commands.')
+
+@authsense_cli.command('retrain-all')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count).')
+@click.option('--tree-jobs', type=int, default=1, help='Threads per fit for parallel tree building.')
+@click.option('--min-samples', type=int, default=20, help='Skip users with fewer accepted events.')
+@click.option('--max-samples', type=int, default=5000, help='Most recent events used per user.')
+@click.option('--write-batch-size', type=int, default=500, help='Models written per commit.')
+def retrain_all(workers, tree_jobs, min_samples, max_samples, write_batch_size):
+    """Rebuild every user's model from stored behavior logs"""
+    retrainer = FleetRetrainer(
+        db,
+        BehaviorLog,
+        AIModel,
+        workers=workers,
+        tree_jobs=tree_jobs,
+        min_samples=min_samples,
+        max_samples=max_samples,
+        write_batch_size=write_batch_size,
+        partitions=BehaviorLogPartitions(db, BehaviorLog, BehaviorRollup, BehaviorLogPartition)
+    )
+    
+    def report(stats):
+        click.echo(
+            f"{stats['users']} users, {stats['rows']} rows in {stats['seconds']:.1f}s "
+            f"({stats['users_per_sec']:.1f} users/sec, {stats['rows_per_sec']:.0f} rows/sec); "
+            f"{stats['skipped']} skipped, {stats['failed']} failed"
+        )
+        if stats['last_error']:
+            click.echo(f"Last error: {stats['last_error']}")
+    
+    report(retrainer.run(progress=report))
+
+@authsense_cli.command('maintain-logs')
+@click.option('--retention-days', type=int, default=None, help='Raw log retention (default: BEHAVIOR_LOG_RETENTION_DAYS).')
+def maintain_logs(retention_days):
+    """Rotate behavior log partitions and roll up the expired ones"""
+    partitions = BehaviorLogPartitions(db, BehaviorLog, BehaviorRollup, BehaviorLogPartition)
+    result = partitions.maintain(retention_days or app.config['BEHAVIOR_LOG_RETENTION_DAYS'])
+    
+    click.echo(f"Created: {', '.join(result['created']) or 'none'}")
+    click.echo(f"Rolled up and dropped: {', '.join(result['expired']) or 'none'}")
+
+@authsense_cli.command('backfill-stats')
+def backfill_stats():
+    """Rebuild user_behavior_stats from behavior logs and rollups"""
+    partitions = BehaviorLogPartitions(db, BehaviorLog, BehaviorRollup, BehaviorLogPartition)
+    click.echo(f"Rebuilt stats for {behavior_stats.rebuild(partitions)} users")
+
+@authsense_cli.command('check-stats')
+@click.option('--fix', is_flag=True, help='Rebuild the users whose stats have drifted.')
+def check_stats(fix):
+    """Compare user_behavior_stats against behavior logs and rollups"""
+    partitions = BehaviorLogPartitions(db, BehaviorLog, BehaviorRollup, BehaviorLogPartition)
+    mismatches = behavior_stats.check(partitions)
+    
+    for user_id, fields in sorted(mismatches.items()):
+        details = ', '.join(f"{field} stored={stored} expected={expected}" for field, (stored, expected) in fields.items())
+        click.echo(f"User {user_id}: {details}")
+    click.echo(f"{len(mismatches)} users out of sync")
+    
+    if mismatches and fix:
+        behavior_stats.rebuild(partitions, user_ids=list(mismatches))
+        click.echo(f"Rebuilt stats for {len(mismatches)} users")
+    elif mismatches:
+        raise SystemExit(1)
+
+@authsense_cli.command('reap-sessions')
+def reap_sessions():
+    """Expire sessions idle longer than SESSION_TIMEOUT_MINUTES"""
+    sweep = session_reaper.sweep()
+    click.echo(f"{sweep['expired']} sessions expired in {sweep['seconds'] * 1000:.1f}ms")
+
+app.cli.add_command(authsense_cli)
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
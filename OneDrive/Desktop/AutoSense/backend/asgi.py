@@ -0,0 +1,76 @@
+"""ASGI service for the behavior ingest and prediction endpoints.
+
+The Flask app keeps serving auth, admin and everything else; send
+/api/behavior/events, /api/behavior/events/batch and /api/ai/predict here.
+Run from the repository root:
+    uvicorn backend.asgi:application --workers 4
+"""
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.ext.asyncio import create_async_engine
+from backend.app import (
+    app,
+    behavior_stats,
+    build_behavior_row,
+    decode_token,
+    predict_anomaly,
+    revocations,
+    score_behavior_events,
+    session_terminated
+)
+from backend.models.user import User
+from backend.models.session import Session
+from backend.models.behavior import BehaviorLog
+from backend.models.alert import Alert
+from backend.models.email_outbox import EmailOutbox
+from backend.services.async_ingest import AsyncBehaviorStore, AsyncIngestApp, async_database_url
+
+def authenticate(token):
+    """(user_id, jti) of a valid, unrevoked access token"""
+    with app.app_context():
+        claims = decode_token(token)
+    if revocations.is_revoked(claims['jti']):
+        raise ValueError('Token has been revoked')
+    return int(claims['sub']), claims['jti']
+
+def score(user_id, session, events):
+    # Runs in a scoring thread; model loads go through the Flask-SQLAlchemy session
+    with app.app_context():
+        return score_behavior_events(user_id, session, events)
+
+def predict(user_id, behavior_data):
+    with app.app_context():
+        return predict_anomaly(user_id, behavior_data)
+
+database_url = app.config['ASYNC_DATABASE_URL'] or async_database_url(app.config['SQLALCHEMY_DATABASE_URI'])
+engine_options = {} if database_url.startswith('sqlite') else {
+    'pool_size': app.config['ASYNC_DB_POOL_SIZE'],
+    'max_overflow': app.config['ASYNC_DB_MAX_OVERFLOW'],
+    'pool_pre_ping': True
+}
+
+behavior_store = AsyncBehaviorStore(
+    create_async_engine(database_url, **engine_options),
+    Session,
+    BehaviorLog,
+    Alert,
+    EmailOutbox,
+    User,
+    behavior_stats,
+    session_ttl=app.config['SESSION_CACHE_TTL'],
+    batch_size=app.config['LOG_WRITER_BATCH_SIZE'],
+    max_buffered_rows=app.config['LOG_WRITER_QUEUE_SIZE']
+)
+
+application = AsyncIngestApp(
+    behavior_store,
+    authenticate,
+    score,
+    predict,
+    build_behavior_row,
+    ThreadPoolExecutor(max_workers=app.config['ASYNC_SCORING_WORKERS'], thread_name_prefix='scoring'),
+    on_terminated=session_terminated,
+    on_startup=revocations.start,
+    max_batch_events=app.config['MAX_BATCH_EVENTS'],
+    flush_interval=app.config['LOG_WRITER_FLUSH_INTERVAL'],
+    max_body_bytes=app.config['ASYNC_MAX_BODY_BYTES']
+)
\ No newline at end of file
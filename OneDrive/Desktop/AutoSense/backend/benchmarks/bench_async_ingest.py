@@ -0,0 +1,206 @@
+"""Benchmark: behavior ingest on the threaded Flask stack vs the asyncio ASGI service.
+
+Both stacks take the same JSON batches from many users, score them with the
+same compiled IsolationForests and have the same database round trips: a
+session lookup whenever a user's cached session has expired, and a bulk write
+per full log buffer. The database is simulated by a fixed latency per round
+trip (time.sleep on the threaded stack, asyncio.sleep in the ASGI service),
+so the numbers show how each stack overlaps waiting with scoring. The Flask
+stack is modelled as a gthread worker: a fixed pool of request threads, with
+the write-behind buffer flushed by its own thread. The ASGI service is the
+real AsyncIngestApp, called in-process with many requests in flight and
+scoring in its executor. Throughput is reported per wall-clock second and
+per CPU-second of the process.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_async_ingest
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import json
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
+from backend.services.async_ingest import AsyncIngestApp
+from backend.services.inference_engine import compiled_forest
+from backend.services.training_jobs import fit_feature_matrix
+
+N_USERS = 1000
+REQUESTS_PER_USER = 4
+EVENTS_PER_REQUEST = 20
+DB_LATENCIES = (0.005, 0.05)
+SESSION_TTL = 30
+BATCH_SIZE = 200
+SYNC_THREADS = 8
+ASYNC_CONCURRENCY = 256
+SCORING_WORKERS = 4
+FEATURES = ('keystroke_speed', 'mouse_speed', 'idle_time', 'cursor_path_length')
+
+def timed(func):
+    """(wall seconds, CPU seconds) of one call"""
+    wall, cpu = time.perf_counter(), time.process_time()
+    func()
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+class SessionCache:
+    """Session rows cached for SESSION_TTL seconds, as both stacks do"""
+    
+    def __init__(self):
+        self.expires = {}
+        self.misses = 0
+    
+    def expired(self, user_id):
+        now = time.monotonic()
+        if self.expires.get(user_id, 0) > now:
+            return None
+        self.misses += 1
+        self.expires[user_id] = now + SESSION_TTL
+        return SimpleNamespace(id=user_id, session_token=f"token-{user_id}", jti=f"jti-{user_id}")
+
+class LatencyStore:
+    """AsyncBehaviorStore's round trips with a simulated database"""
+    
+    def __init__(self, latency):
+        self.latency = latency
+        self.cache = SessionCache()
+        self.sessions = {}
+        self.rows = []
+        self.written = 0
+    
+    async def active_session(self, user_id, jti):
+        session = self.cache.expired(user_id)
+        if session is not None:
+            self.sessions[user_id] = session
+            await asyncio.sleep(self.latency)
+        return self.sessions[user_id]
+    
+    def touch(self, session, timestamp):
+        pass
+    
+    async def write_logs(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= BATCH_SIZE:
+            await self.flush()
+    
+    async def flush(self):
+        rows, self.rows = self.rows, []
+        if rows:
+            await asyncio.sleep(self.latency)
+            self.written += len(rows)
+
+class ThreadedStack:
+    """The Flask request path with a simulated database: cached sessions and a write-behind buffer"""
+    
+    def __init__(self, score, latency):
+        self.score = score
+        self.latency = latency
+        self.cache = SessionCache()
+        self.sessions = {}
+        self.rows = []
+        self.written = 0
+        self.lock = threading.Lock()
+        self.pending = threading.Event()
+    
+    def handle(self, user_id, body):
+        with self.lock:
+            session = self.cache.expired(user_id)
+            if session is not None:
+                self.sessions[user_id] = session
+        if session is not None:
+            time.sleep(self.latency)
+        session = self.sessions[user_id]
+        events = json.loads(body)['events']
+        trust_scores, logout, session_score = self.score(user_id, session, events)
+        now = datetime.now()
+        rows = [{'user_id': user_id, 'session_id': session.session_token, 'timestamp': now, 'trust_score': trust_score}
+                for trust_score in trust_scores]
+        with self.lock:
+            self.rows.extend(rows)
+            if len(self.rows) >= BATCH_SIZE:
+                self.pending.set()
+        return json.dumps({'action': 'continue', 'trust_score': min(trust_scores), 'trust_scores': trust_scores})
+    
+    def write_behind(self, stop):
+        while not stop.is_set() or self.rows:
+            self.pending.wait(0.05)
+            self.pending.clear()
+            with self.lock:
+                rows, self.rows = self.rows, []
+            if rows:
+                time.sleep(self.latency)
+                self.written += len(rows)
+    
+    def run(self, requests):
+        stop = threading.Event()
+        writer = threading.Thread(target=self.write_behind, args=(stop,))
+        writer.start()
+        with ThreadPoolExecutor(max_workers=SYNC_THREADS) as pool:
+            list(pool.map(lambda request: self.handle(*request), requests))
+        stop.set()
+        writer.join()
+
+def run_async(app, requests):
+    async def call(semaphore, user_id, body):
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+        
+        async def receive():
+            return messages.pop(0)
+        
+        async def send(message):
+            sent.append(message)
+        
+        async with semaphore:
+            await app({'type': 'http', 'method': 'POST', 'path': '/api/behavior/events/batch',
+                       'headers': [(b'authorization', f"Bearer {user_id}".encode())]}, receive, send)
+        assert sent[0]['status'] == 200
+    
+    async def scenario():
+        semaphore = asyncio.Semaphore(ASYNC_CONCURRENCY)
+        await asyncio.gather(*(call(semaphore, user_id, body) for user_id, body in requests))
+        await app.store.flush()
+    
+    asyncio.run(scenario())
+
+def main():
+    rng = np.random.default_rng(7)
+    means = rng.uniform([3, 200, 1, 600], [8, 400, 4, 1000], size=(N_USERS, 4))
+    forests = {}
+    for user_id in range(N_USERS):
+        model_data = fit_feature_matrix(rng.normal(means[user_id], means[user_id] * 0.05, size=(200, 4)))
+        forests[user_id] = compiled_forest(model_data)
+    
+    def score(user_id, session, events):
+        X = np.array([[event[name] for name in FEATURES] for event in events])
+        trust_scores = np.clip((forests[user_id].score_samples(X) + 1) * 100, 0, 100).round(2).tolist()
+        return trust_scores, False, min(trust_scores)
+    
+    requests = []
+    for _ in range(REQUESTS_PER_USER):
+        for user_id in rng.permutation(N_USERS):
+            X = rng.normal(means[user_id], means[user_id] * 0.05, size=(EVENTS_PER_REQUEST, 4))
+            body = json.dumps({'events': [dict(zip(FEATURES, row)) for row in X.tolist()]}).encode()
+            requests.append((int(user_id), body))
+    n_events = len(requests) * EVENTS_PER_REQUEST
+    print(f"{len(requests)} requests, {n_events} events from {N_USERS} users")
+    
+    for latency in DB_LATENCIES:
+        print(f"{latency * 1e3:.0f} ms per database round trip")
+        threaded = ThreadedStack(score, latency)
+        wall, cpu = timed(lambda: threaded.run(requests))
+        assert threaded.written == n_events
+        print(f"  flask gthread ({SYNC_THREADS} threads):    {n_events / wall:8.0f} events/s  "
+              f"{n_events / cpu:8.0f} events/CPU-s  ({threaded.cache.misses} session lookups)")
+        
+        store = LatencyStore(latency)
+        with ThreadPoolExecutor(max_workers=SCORING_WORKERS) as executor:
+            app = AsyncIngestApp(store, lambda token: (int(token), f"jti-{token}"), score, None, lambda *row: {}, executor, max_batch_events=EVENTS_PER_REQUEST)
+            wall, cpu = timed(lambda: run_async(app, requests))
+        assert store.written == n_events and app.stats['errors'] == 0
+        print(f"  asgi asyncio ({ASYNC_CONCURRENCY} in flight):  {n_events / wall:8.0f} events/s  "
+              f"{n_events / cpu:8.0f} events/CPU-s  ({store.cache.misses} session lookups)")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""Load test: 10k concurrent behavior streams on one node, driven by a local client simulator.
+
+Each simulated client holds an open stream served by BehaviorStreamHub.serve
+on its own thread (as flask-sock does under a threaded or gevent worker),
+authenticates once, sends framed event batches and waits for each trust
+update. Finally every session is terminated and the time until all clients
+have received their pushed logout is measured. Scoring is replaced by a
+trivial ingest so the numbers show the channel's own cost.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_behavior_stream
+"""
+import json
+import queue
+import resource
+import threading
+import time
+import numpy as np
+from backend.services.behavior_stream import BehaviorStreamHub
+
+N_SESSIONS = 10000
+FRAMES_PER_SESSION = 5
+EVENTS_PER_FRAME = 10
+CLIENT_THREADS = 16
+
+class SimulatedSocket:
+    """Client end and server end of one in-memory connection"""
+    
+    def __init__(self):
+        self.to_server = queue.Queue()
+        self.to_client = queue.Queue()
+        self.closed = threading.Event()
+    
+    def receive(self, timeout=None):
+        try:
+            return self.to_server.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def send(self, text):
+        self.to_client.put(text)
+    
+    def close(self):
+        self.closed.set()
+
+def ingest(user_id, events):
+    scores = [event['keystroke_speed'] * 10 for event in events]
+    return {'action': 'continue', 'trust_score': min(scores), 'trust_scores': scores}
+
+def authenticate(token):
+    user_id = int(token)
+    return user_id, f"jti-{user_id}", None
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main():
+    threading.stack_size(256 * 1024)
+    hub = BehaviorStreamHub(ingest, authenticate, lambda jti: False, poll_interval=1.0)
+    sockets = [SimulatedSocket() for _ in range(N_SESSIONS)]
+    rss_before = rss_mb()
+    
+    start = time.perf_counter()
+    for user_id, sock in enumerate(sockets):
+        threading.Thread(target=hub.serve, args=(sock,), daemon=True).start()
+        sock.to_server.put(json.dumps({'type': 'auth', 'token': str(user_id)}))
+    for sock in sockets:
+        sock.to_client.get()
+    connect_s = time.perf_counter() - start
+    print(f"{hub.stats['connections']} streams open in {connect_s:.2f}s, "
+          f"~{(rss_mb() - rss_before) * 1024 / N_SESSIONS:.0f} KB RSS per stream")
+    
+    frame = json.dumps({'type': 'events', 'events': [{'keystroke_speed': 9.5}] * EVENTS_PER_FRAME})
+    latencies = []
+    
+    def client(assigned):
+        for _ in range(FRAMES_PER_SESSION):
+            for sock in assigned:
+                sent = time.perf_counter()
+                sock.to_server.put(frame)
+                sock.to_client.get()
+                latencies.append(time.perf_counter() - sent)
+    
+    clients = [threading.Thread(target=client, args=(sockets[i::CLIENT_THREADS],)) for i in range(CLIENT_THREADS)]
+    start = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1e3
+    print(f"{len(latencies)} frames ({len(latencies) * EVENTS_PER_FRAME} events) in {elapsed:.2f}s: "
+          f"{len(latencies) / elapsed:.0f} frames/s, round trip p50 {np.percentile(latencies, 50):.2f} ms  "
+          f"p99 {np.percentile(latencies, 99):.2f} ms")
+    
+    start = time.perf_counter()
+    for user_id in range(N_SESSIONS):
+        hub.terminate(user_id, 'load test')
+    for sock in sockets:
+        sock.closed.wait()
+    print(f"logout pushed to {N_SESSIONS} streams in {time.perf_counter() - start:.2f}s "
+          f"(poll interval {hub.poll_interval}s), {hub.stats['connections']} left open")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""Microbenchmark: sklearn scaler+IsolationForest scoring vs the compiled engine.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_inference
+"""
+import time
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+from backend.services.inference_engine import CompiledIsolationForest
+
+def timed(func, repeat):
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    rng = np.random.default_rng(42)
+    history = rng.normal([5, 300, 2, 800], [1, 30, 0.5, 50], size=(1000, 4))
+    
+    scaler = StandardScaler()
+    model = IsolationForest(contamination=0.1, random_state=42)
+    model.fit(scaler.fit_transform(history))
+    engine = CompiledIsolationForest.compile(model, scaler)
+    
+    rows = rng.normal([5, 300, 2, 800], [3, 90, 1.5, 150], size=(500, 4))
+    
+    # Same numbers, different path
+    assert np.array_equal(engine.score_samples(rows), model.score_samples(scaler.transform(rows)))
+    
+    for n_rows in (1, 50, 500):
+        batch = rows[:n_rows]
+        
+        def sklearn_path():
+            # What predict_anomaly used to do: transform, predict, then score_samples
+            scaled = scaler.transform(batch)
+            model.predict(scaled)
+            model.score_samples(scaled)
+        
+        sklearn_s = timed(sklearn_path, 50)
+        engine_s = timed(lambda: engine.score_samples(batch), 200)
+        print(f"{n_rows:4d} rows: sklearn {sklearn_s * 1e6:9.1f} us  engine {engine_s * 1e6:9.1f} us  "
+              f"speedup {sklearn_s / engine_s:5.1f}x")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""Microbenchmark: keystroke dynamics extraction over long sessions.
+
+Compares the vectorized extractor with the equivalent per-key Python loop.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_keystroke_features
+"""
+import statistics
+import time
+import numpy as np
+from backend.services.keystroke_features import DIGRAPH_EDGES, extract_keystroke_features
+
+def timed(func, repeat):
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def typing_session(n_keys, rng):
+    """Synthetic key-down/key-up timestamps (ms), like the client sends them"""
+    down = np.cumsum(rng.gamma(2.0, 90.0, size=n_keys))
+    up = down + rng.normal(95, 20, size=n_keys).clip(20)
+    return {'down': down.tolist(), 'up': up.tolist()}
+
+def loop_features(keystroke_data):
+    """Reference per-key implementation of the same statistics"""
+    keys = sorted(zip(keystroke_data['down'], keystroke_data['up']))
+    dwell = [max(up - down, 0.0) for down, up in keys]
+    flight = [keys[i + 1][0] - keys[i][1] for i in range(len(keys) - 1)]
+    digraph = [keys[i + 1][0] - keys[i][0] for i in range(len(keys) - 1)]
+    
+    buckets = [0] * (len(DIGRAPH_EDGES) + 1)
+    for latency in digraph:
+        bucket = 0
+        while bucket < len(DIGRAPH_EDGES) and latency >= DIGRAPH_EDGES[bucket]:
+            bucket += 1
+        buckets[bucket] += 1
+    
+    duration = max(up for _, up in keys) - keys[0][0]
+    return [
+        statistics.fmean(dwell), statistics.pstdev(dwell),
+        statistics.fmean(flight), statistics.pstdev(flight),
+        statistics.fmean(digraph), statistics.pstdev(digraph),
+        len(keys) * 1000.0 / duration,
+        1000.0 / statistics.median(digraph)
+    ] + [count / len(digraph) for count in buckets]
+
+def main():
+    rng = np.random.default_rng(42)
+    
+    for n_keys in (100, 1000, 10000):
+        session = typing_session(n_keys, rng)
+        
+        # Same numbers, different path
+        assert np.allclose(extract_keystroke_features(session), loop_features(session))
+        
+        loop_s = timed(lambda: loop_features(session), 20)
+        numpy_s = timed(lambda: extract_keystroke_features(session), 100)
+        print(f"{n_keys:6d} keys: loop {loop_s * 1e3:8.2f} ms  numpy {numpy_s * 1e3:8.2f} ms  "
+              f"speedup {loop_s / numpy_s:5.1f}x")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""Microbenchmark: mouse trajectory feature extraction.
+
+Times one event window of 5,000 pointer samples, both from NumPy arrays and
+from the JSON-decoded lists the API receives.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_mouse_features
+"""
+import time
+import numpy as np
+from backend.services.mouse_features import extract_mouse_features
+
+def timed(func, repeat):
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def trajectory(n_points, rng):
+    """Synthetic pointer path: smooth random walk sampled every ~16 ms with a few pauses"""
+    heading = np.cumsum(rng.normal(0, 0.15, size=n_points))
+    speed = rng.gamma(2.0, 3.0, size=n_points)
+    gaps = np.where(rng.random(n_points) < 0.01, rng.uniform(150, 800, size=n_points), 16.0)
+    return {
+        'x': np.cumsum(speed * np.cos(heading)),
+        'y': np.cumsum(speed * np.sin(heading)),
+        't': np.cumsum(gaps)
+    }
+
+def main():
+    rng = np.random.default_rng(42)
+    
+    for n_points in (500, 5000, 50000):
+        arrays = trajectory(n_points, rng)
+        lists = {axis: values.tolist() for axis, values in arrays.items()}
+        
+        arrays_s = timed(lambda: extract_mouse_features(arrays), 200)
+        lists_s = timed(lambda: extract_mouse_features(lists), 200)
+        print(f"{n_points:6d} points: arrays {arrays_s * 1e6:8.1f} us  lists {lists_s * 1e6:8.1f} us")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
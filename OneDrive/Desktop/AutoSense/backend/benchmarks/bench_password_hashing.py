@@ -0,0 +1,84 @@
+"""Load benchmark: behavior events served during a login storm.
+
+Request threads (like a gthread worker) serve behavior events while other
+threads keep logging in for a fixed time. Logins either check the password
+inline or through the bounded PasswordHasher pool; events run keystroke
+feature extraction. Reports event and login throughput plus event latency
+for both setups.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_password_hashing
+"""
+import threading
+import time
+import numpy as np
+from werkzeug.security import check_password_hash, generate_password_hash
+from backend.services.keystroke_features import extract_keystroke_features
+from backend.services.password_hasher import PasswordHasher
+
+METHOD = 'pbkdf2:sha256:600000'
+EVENT_THREADS = 4
+LOGIN_THREADS = 4
+DURATION = 5.0
+
+def typing_session(n_keys, rng):
+    down = np.cumsum(rng.gamma(2.0, 90.0, size=n_keys))
+    up = down + rng.normal(95, 20, size=n_keys).clip(20)
+    return {'down': down.tolist(), 'up': up.tolist()}
+
+def run(login, session, login_threads=LOGIN_THREADS):
+    """Serve events and logins concurrently for DURATION seconds; returns the stats"""
+    stop = threading.Event()
+    event_latencies = []
+    logins = []
+    
+    def serve_events():
+        while not stop.is_set():
+            started = time.perf_counter()
+            extract_keystroke_features(session)
+            event_latencies.append(time.perf_counter() - started)
+    
+    def serve_logins():
+        while not stop.is_set():
+            login()
+            logins.append(1)
+    
+    threads = [threading.Thread(target=serve_events) for _ in range(EVENT_THREADS)]
+    threads += [threading.Thread(target=serve_logins) for _ in range(login_threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    return {
+        'seconds': elapsed,
+        'events_per_sec': len(event_latencies) / elapsed,
+        'logins_per_sec': len(logins) / elapsed,
+        'event_p50_ms': np.percentile(event_latencies, 50) * 1e3,
+        'event_p95_ms': np.percentile(event_latencies, 95) * 1e3
+    }
+
+def report(name, stats):
+    print(f"{name:6s} {stats['seconds']:6.2f}s  events {stats['events_per_sec']:8.1f}/s  "
+          f"logins {stats['logins_per_sec']:6.1f}/s  event p50 {stats['event_p50_ms']:7.2f} ms  "
+          f"p95 {stats['event_p95_ms']:7.2f} ms")
+
+def main():
+    rng = np.random.default_rng(42)
+    session = typing_session(300, rng)
+    password_hash = generate_password_hash('TestPass123!', method=METHOD)
+    
+    report('idle', run(None, session, login_threads=0))
+    report('inline', run(lambda: check_password_hash(password_hash, 'TestPass123!'), session))
+    
+    hasher = PasswordHasher(method=METHOD, executor='process', max_workers=1)
+    hasher.verify(password_hash, 'TestPass123!')  # start the pool outside the timing
+    report('pool', run(lambda: hasher.verify(password_hash, 'TestPass123!'), session))
+    hasher.shutdown()
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
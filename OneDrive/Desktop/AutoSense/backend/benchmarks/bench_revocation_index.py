@@ -0,0 +1,89 @@
+"""Benchmark: revocation checks on the authenticated request path.
+
+Times the blocklist lookup itself, then a @jwt_required() request through
+the Flask test client with no revocation check, with the in-memory index,
+and with a per-request database lookup of the token's session.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_revocation_index
+"""
+from datetime import datetime, timedelta
+import tempfile
+import time
+import uuid
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, get_jti, jwt_required
+from backend.config.database import db
+from backend.models.user import User
+from backend.models.session import Session
+from backend.services.revocation_index import RevocationIndex
+
+N_SESSIONS = 100000
+REVOKED_EVERY = 10
+
+def timed(func, repeat):
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def build_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    app.config['JWT_SECRET_KEY'] = 'benchmark-secret-key-of-a-sensible-length'
+    db.init_app(app)
+    jwt = JWTManager(app)
+    
+    @app.route('/protected')
+    @jwt_required()
+    def protected():
+        return jsonify({}), 200
+    
+    return app, jwt
+
+def main():
+    app, jwt = build_app(f"{tempfile.mkdtemp()}/revocations.db")
+    now = datetime.now()
+    ended = now - timedelta(minutes=10)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.text('CREATE INDEX ix_bench_sessions_jti ON sessions (jti)'))
+        db.session.bulk_insert_mappings(Session, [
+            {'user_id': n, 'session_token': f"token-{n}", 'jti': str(uuid.uuid4()), 'created_at': now,
+             'status': 'terminated' if n % REVOKED_EVERY == 0 else 'active',
+             'ended_at': ended if n % REVOKED_EVERY == 0 else None}
+            for n in range(N_SESSIONS)
+        ])
+        db.session.commit()
+        token = create_access_token(identity='1')
+        jti = get_jti(token)
+        db.session.add(Session(user_id=1, session_token=token, jti=jti, created_at=now))
+        db.session.commit()
+    
+    index = RevocationIndex(app, db, Session)
+    start = time.perf_counter()
+    index.sync()
+    print(f"initial sync: {index.stats['revoked']} revoked tokens in {(time.perf_counter() - start) * 1e3:.1f} ms")
+    start = time.perf_counter()
+    index.sync()
+    print(f"incremental sync: {(time.perf_counter() - start) * 1e3:.2f} ms")
+    
+    print(f"is_revoked lookup: {timed(lambda: index.is_revoked(jti), 1000000) * 1e9:.0f} ns")
+    
+    client = app.test_client()
+    headers = {'Authorization': f"Bearer {token}"}
+    request = lambda: client.get('/protected', headers=headers)
+    
+    checks = {
+        'none': lambda header, payload: False,
+        'index': lambda header, payload: index.is_revoked(payload['jti']),
+        'database': lambda header, payload: Session.query.filter_by(jti=payload['jti'], status='active').first() is None
+    }
+    for name, check in checks.items():
+        jwt._token_in_blocklist_callback = check
+        assert request().status_code == 200
+        print(f"request, {name:8s} check: {timed(request, 2000) * 1e6:7.1f} us")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""Storage/throughput benchmark: JSON text vs the binary sample format.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_sample_codec
+"""
+import json
+import time
+import numpy as np
+from backend.services.sample_codec import decode_samples, encode_mouse
+
+def timed(func, repeat):
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def mouse_window(n_points, rng):
+    """Pointer samples as the browser reports them (float pixels, ms timestamps)"""
+    t = 1.7e12 + np.cumsum(rng.uniform(8, 24, size=n_points)).round(1)
+    x = np.cumsum(rng.normal(0, 4, size=n_points)).round(2) + 600
+    y = np.cumsum(rng.normal(0, 4, size=n_points)).round(2) + 400
+    return {'x': x.tolist(), 'y': y.tolist(), 't': t.tolist()}
+
+def main():
+    rng = np.random.default_rng(42)
+    
+    for n_points in (100, 1000, 5000):
+        mouse_data = mouse_window(n_points, rng)
+        text = json.dumps(mouse_data)
+        raw = encode_mouse(mouse_data, compress_min_bytes=None)
+        packed = encode_mouse(mouse_data, compress_min_bytes=0)
+        
+        json_s = timed(lambda: {axis: np.asarray(values) for axis, values in json.loads(text).items()}, 100)
+        raw_s = timed(lambda: decode_samples(raw), 1000)
+        packed_s = timed(lambda: decode_samples(packed), 1000)
+        encode_s = timed(lambda: encode_mouse(mouse_data), 100)
+        
+        print(f"{n_points:5d} points: json {len(text):7d} B {json_s * 1e6:8.1f} us | "
+              f"binary {len(raw):6d} B {raw_s * 1e6:6.1f} us | "
+              f"binary+zlib {len(packed):6d} B {packed_s * 1e6:6.1f} us | encode {encode_s * 1e6:7.1f} us")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""Benchmark: baseline prefilter + IsolationForest cascade vs scoring every event with the forest.
+
+Events of many users are screened in one prefilter call; only the events
+it cannot clear are grouped by user and scored by their compiled forest.
+Agreement is reported against the forest's own anomaly label and against
+predict_anomaly's trust < 70 rule.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_scoring_cascade
+"""
+import time
+import numpy as np
+from backend.services.baseline_prefilter import BaselinePrefilter
+from backend.services.inference_engine import compiled_forest
+from backend.services.training_jobs import fit_feature_matrix
+
+N_USERS = 20
+N_EVENTS = 20000
+ANOMALY_RATE = 0.05
+
+def timed(func, repeat):
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def full_scores(models, user_ids, X):
+    """Every event through its user's forest, as predict_anomaly_batch does"""
+    scores = np.empty(len(X))
+    for user_id, model_data in models.items():
+        rows = np.flatnonzero(user_ids == user_id)
+        scores[rows] = compiled_forest(model_data).score_samples(X[rows])
+    return scores
+
+def cascade_scores(prefilter, models, user_ids, X):
+    """Forest scores for escalated events, NaN where the prefilter cleared the event"""
+    _, needs_model = prefilter.screen(user_ids, X)
+    scores = np.full(len(X), np.nan)
+    escalated = np.flatnonzero(needs_model)
+    for user_id in np.unique(user_ids[escalated]):
+        rows = escalated[user_ids[escalated] == user_id]
+        scores[rows] = compiled_forest(models[user_id]).score_samples(X[rows])
+    return scores
+
+def main():
+    rng = np.random.default_rng(42)
+    prefilter = BaselinePrefilter(4)
+    models = {}
+    means = {}
+    for user_id in range(N_USERS):
+        mean = rng.uniform([3, 200, 1, 600], [8, 400, 4, 1000])
+        history = rng.normal(mean, mean * [0.1, 0.05, 0.15, 0.04], size=(500, 4))
+        models[user_id] = fit_feature_matrix(history)
+        prefilter.update(user_id, history)
+        means[user_id] = mean
+    
+    user_ids = rng.integers(0, N_USERS, size=N_EVENTS)
+    centers = np.array([means[user_id] for user_id in user_ids])
+    X = rng.normal(centers, centers * [0.1, 0.05, 0.15, 0.04])
+    anomalous = rng.random(N_EVENTS) < ANOMALY_RATE
+    X[anomalous] *= rng.uniform(1.5, 2.5, size=(int(anomalous.sum()), 4))
+    
+    full_s = timed(lambda: full_scores(models, user_ids, X), 5)
+    cascade_s = timed(lambda: cascade_scores(prefilter, models, user_ids, X), 5)
+    print(f"{N_EVENTS} events, {N_USERS} users: full {N_EVENTS / full_s:10.0f} events/s  "
+          f"cascade {N_EVENTS / cascade_s:10.0f} events/s  speedup {full_s / cascade_s:4.1f}x")
+    
+    full = full_scores(models, user_ids, X)
+    cascade = cascade_scores(prefilter, models, user_ids, X)
+    cleared = np.isnan(cascade)
+    offsets = np.array([models[user_id]['model'].offset_ for user_id in user_ids])
+    
+    # A cleared event counts as normal; escalated events get the same forest score as the full path
+    full_label = full < offsets
+    cascade_label = np.where(cleared, False, cascade < offsets)
+    full_cutoff = np.clip((full + 2) * 25, 0, 100) < 70
+    cascade_cutoff = np.where(cleared, False, np.clip((cascade + 2) * 25, 0, 100) < 70)
+    
+    print(f"cleared by prefilter:       {cleared.mean():6.1%}")
+    print(f"injected anomalies cleared: {cleared[anomalous].mean():6.1%}")
+    print(f"agreement, forest label:    {(full_label == cascade_label).mean():6.1%}")
+    print(f"agreement, trust < 70:      {(full_cutoff == cascade_cutoff).mean():6.1%}  "
+          f"(full path flags {full_cutoff.mean():.1%} of events)")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
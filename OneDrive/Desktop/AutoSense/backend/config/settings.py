@@ -15,11 +15,91 @@ class Config:
     MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'True').lower() == 'true'
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
+    MAIL_SUPPRESS_SEND = os.getenv('MAIL_SUPPRESS_SEND', 'False').lower() == 'true'
+    # Outbox delivery: worker threads (one SMTP connection each), retries with backoff (seconds)
+    MAIL_OUTBOX_WORKERS = int(os.getenv('MAIL_OUTBOX_WORKERS', 2))
+    MAIL_OUTBOX_BATCH_SIZE = int(os.getenv('MAIL_OUTBOX_BATCH_SIZE', 20))
+    MAIL_OUTBOX_POLL_INTERVAL = float(os.getenv('MAIL_OUTBOX_POLL_INTERVAL', 5.0))
+    MAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('MAIL_OUTBOX_MAX_ATTEMPTS', 8))
+    MAIL_OUTBOX_BACKOFF_BASE = float(os.getenv('MAIL_OUTBOX_BACKOFF_BASE', 30.0))
     
-    # ML configuration
+    # ML configuration and the per-user model cache
     MODEL_PATH = os.getenv('MODEL_PATH', './ml_models/')
+    MODEL_CACHE_MAX_ENTRIES = int(os.getenv('MODEL_CACHE_MAX_ENTRIES', 1000))
+    MODEL_CACHE_MAX_BYTES = int(os.getenv('MODEL_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    MODEL_CACHE_MAX_MISSING_ENTRIES = int(os.getenv('MODEL_CACHE_MAX_MISSING_ENTRIES', 10000))
+    ONLINE_MODEL_PERSIST_EVERY = int(os.getenv('ONLINE_MODEL_PERSIST_EVERY', 50))
+    # Model training jobs ('process' pool, or 'local' to train inline)
+    TRAINING_EXECUTOR = os.getenv('TRAINING_EXECUTOR', 'process')
+    TRAINING_MAX_WORKERS = int(os.getenv('TRAINING_MAX_WORKERS', 2))
     
     # Security
-    OTP_EXPIRY_MINUTES = 5
-    TRUST_SCORE_THRESHOLD = 70
-    SESSION_TIMEOUT_MINUTES = 30
\ No newline at end of file
+    OTP_EXPIRY_MINUTES = int(os.getenv('OTP_EXPIRY_MINUTES', 5))
+    OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', 5))
+    # Worker processes serving the app (gunicorn's default worker count); with
+    # more than one, the OTP store must be a redis:// URL all of them share
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+    REDIS_URL = os.getenv('REDIS_URL')
+    # One-time codes ('memory' for a single worker, or a redis:// URL shared by all workers)
+    OTP_STORE_URL = os.getenv('OTP_STORE_URL', REDIS_URL or 'memory')
+    # Password hashing pool; changing the method rehashes users on their next login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_EXECUTOR = os.getenv('PASSWORD_HASH_EXECUTOR', 'process')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32))
+    # Auth endpoint throttling: requests per minute and burst, per client IP and per email;
+    # 'memory' buckets are per process, so each limit is effectively multiplied by
+    # WEB_CONCURRENCY; a redis:// URL (the default when REDIS_URL is set) is shared
+    RATE_LIMIT_STORE_URL = os.getenv('RATE_LIMIT_STORE_URL', REDIS_URL or 'memory')
+    # Reverse proxies in front of the app whose X-Forwarded-For is trusted for the client IP
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 0))
+    AUTH_LIMIT_IP_PER_MINUTE = float(os.getenv('AUTH_LIMIT_IP_PER_MINUTE', 10))
+    AUTH_LIMIT_IP_BURST = int(os.getenv('AUTH_LIMIT_IP_BURST', 20))
+    AUTH_LIMIT_EMAIL_PER_MINUTE = float(os.getenv('AUTH_LIMIT_EMAIL_PER_MINUTE', 2))
+    AUTH_LIMIT_EMAIL_BURST = int(os.getenv('AUTH_LIMIT_EMAIL_BURST', 5))
+    
+    # Per-session trust: a session ends when its recent scores stay low, not on one low event
+    TRUST_SCORE_THRESHOLD = float(os.getenv('TRUST_SCORE_THRESHOLD', 70))
+    TRUST_WINDOW = int(os.getenv('TRUST_WINDOW', 16))
+    TRUST_WINDOW_MIN_LOW = int(os.getenv('TRUST_WINDOW_MIN_LOW', 4))
+    TRUST_EWMA_ALPHA = float(os.getenv('TRUST_EWMA_ALPHA', 0.3))
+    TRUST_HARD_FLOOR = float(os.getenv('TRUST_HARD_FLOOR', 20))
+    TRUST_MAX_SESSIONS = int(os.getenv('TRUST_MAX_SESSIONS', 100000))
+    # Sessions whose whole trust window is high are fully scored only every Nth event or on feature drift
+    SCORING_HIGH_TRUST = float(os.getenv('SCORING_HIGH_TRUST', 90))
+    SCORING_MAX_SKIP = int(os.getenv('SCORING_MAX_SKIP', 8))
+    SCORING_DRIFT_TOLERANCE = float(os.getenv('SCORING_DRIFT_TOLERANCE', 0.5))
+    # Scoring cascade: events this close to the user's baseline (0-100) skip the full model
+    CASCADE_ACCEPT_SCORE = float(os.getenv('CASCADE_ACCEPT_SCORE', 85))
+    CASCADE_MIN_EVENTS = int(os.getenv('CASCADE_MIN_EVENTS', 20))
+    
+    # Idle session expiry (minutes idle, seconds between sweeps)
+    SESSION_TIMEOUT_MINUTES = int(os.getenv('SESSION_TIMEOUT_MINUTES', 30))
+    SESSION_REAPER_INTERVAL = float(os.getenv('SESSION_REAPER_INTERVAL', 30))
+    # Seconds between syncs of tokens revoked by other workers
+    REVOCATION_SYNC_INTERVAL = float(os.getenv('REVOCATION_SYNC_INTERVAL', 2.0))
+    # Active-session cache and last_activity heartbeat (seconds)
+    SESSION_CACHE_TTL = int(os.getenv('SESSION_CACHE_TTL', 30))
+    SESSION_HEARTBEAT_INTERVAL = float(os.getenv('SESSION_HEARTBEAT_INTERVAL', 60))
+    
+    # Behavior ingestion
+    MAX_BATCH_EVENTS = int(os.getenv('MAX_BATCH_EVENTS', 500))
+    # Behavior streams: seconds between checks for pushed messages, SSE keep-alive interval
+    STREAM_POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', 0.5))
+    STREAM_HEARTBEAT_INTERVAL = float(os.getenv('STREAM_HEARTBEAT_INTERVAL', 20))
+    STREAM_QUEUE_SIZE = int(os.getenv('STREAM_QUEUE_SIZE', 64))
+    # Seconds an SSE stream ticket stays valid after it is issued
+    STREAM_TICKET_TTL = int(os.getenv('STREAM_TICKET_TTL', 30))
+    # Async ingest service (asgi.py): pooled async database connections, scoring threads
+    ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL')
+    ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', 10))
+    ASYNC_DB_MAX_OVERFLOW = int(os.getenv('ASYNC_DB_MAX_OVERFLOW', 10))
+    ASYNC_SCORING_WORKERS = int(os.getenv('ASYNC_SCORING_WORKERS', 4))
+    # Largest request body the async service reads (413 above it)
+    ASYNC_MAX_BODY_BYTES = int(os.getenv('ASYNC_MAX_BODY_BYTES', 4 * 1024 * 1024))
+    # Write-behind behavior log buffer
+    LOG_WRITER_BATCH_SIZE = int(os.getenv('LOG_WRITER_BATCH_SIZE', 200))
+    LOG_WRITER_FLUSH_INTERVAL = float(os.getenv('LOG_WRITER_FLUSH_INTERVAL', 1.0))
+    LOG_WRITER_QUEUE_SIZE = int(os.getenv('LOG_WRITER_QUEUE_SIZE', 10000))
+    SAMPLE_COMPRESS_MIN_BYTES = int(os.getenv('SAMPLE_COMPRESS_MIN_BYTES', 512))
+    BEHAVIOR_LOG_RETENTION_DAYS = int(os.getenv('BEHAVIOR_LOG_RETENTION_DAYS', 90))
\ No newline at end of file
@@ -27,4 +27,16 @@ class AIController:
         
         trust_score = self.ai_service.predict_anomaly(user_id, behavior_data)
         
-        return jsonify({'trust_score': trust_score}), 200
\ No newline at end of file
+        return jsonify({'trust_score': trust_score}), 200
+    
+    def scoring_mode(self):
+        """Get or set the user's scoring mode ('batch' or 'online')"""
+        user_id = get_jwt_identity()
+        
+        if request.method == 'POST':
+            mode = (request.json or {}).get('mode')
+            if mode not in ('batch', 'online'):
+                return jsonify({'error': "Mode must be 'batch' or 'online'"}), 400
+            self.ai_service.set_scoring_mode(user_id, mode)
+        
+        return jsonify({'mode': self.ai_service.get_scoring_mode(user_id)}), 200
\ No newline at end of file
@@ -1,10 +1,10 @@
 from flask import request, jsonify
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import create_access_token, get_jti
 from backend.services.auth_service import AuthService
 from backend.models.user import User
 from backend.models.session import Session
 from backend.config.database import db
-from datetime import datetime, timedelta
+from datetime import datetime
 import uuid
 
 class AuthController:
@@ -22,7 +22,8 @@ class AuthController:
         db.session.add(user)
         db.session.commit()
         
-        if AuthService.send_otp_email(email, user.otp):
+        otp = AuthService.issue_otp('signup', email)
+        if AuthService.send_otp_email(email, otp):
             return jsonify({'message': 'OTP sent to email'}), 200
         else:
             return jsonify({'error': 'Failed to send OTP'}), 500
@@ -34,11 +35,10 @@ class AuthController:
         email = data.get('email')
         otp = data.get('otp')
         
-        success, user = AuthService.verify_otp(email, otp)
+        success, user = AuthService.verify_otp(email, otp, purpose='signup')
         if not success:
             return jsonify({'error': 'Invalid or expired OTP'}), 400
         
-        db.session.commit()
         return jsonify({'message': 'Account verified successfully'}), 200
     
     @staticmethod
@@ -51,14 +51,10 @@ class AuthController:
         user, error = AuthService.authenticate_user(email, password)
         if error:
             return jsonify({'error': error}), 401
+        if db.session.is_modified(user):
+            db.session.commit()
         
-        otp = AuthService.generate_otp()
-        otp_expiry = datetime.now() + timedelta(minutes=5)
-        
-        user.otp = otp
-        user.otp_expiry = otp_expiry
-        db.session.commit()
-        
+        otp = AuthService.issue_otp('login', email)
         if AuthService.send_otp_email(email, otp):
             return jsonify({'message': 'OTP sent to email'}), 200
         else:
@@ -82,6 +78,7 @@ class AuthController:
         session = Session(
             user_id=user.id,
             session_token=access_token,
+            jti=get_jti(access_token),
             created_at=datetime.now(),
             last_activity=datetime.now()
         )
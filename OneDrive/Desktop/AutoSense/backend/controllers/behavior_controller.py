@@ -1,10 +1,15 @@
 from flask import request, jsonify
 from flask_jwt_extended import get_jwt_identity
-from backend.services.behavior_service import BehaviorService
+from backend.services.bahavior_service import BehaviorService, behavior_stats, session_trust
+from backend.services.ai_service import AIService
+from backend.models.behavior import BehaviorLog
 from backend.config.database import db
+from backend.config.settings import Config
 from datetime import datetime
 import json
 
+ai_service = AIService()
+
 class BehaviorController:
     @staticmethod
     def record_behavior():
@@ -17,10 +22,13 @@ class BehaviorController:
         BehaviorService.update_session_activity(session_id)
         
         # Calculate trust score using AI model
-        trust_score = 100.0  # Placeholder - would integrate with AI service
+        trust_score = ai_service.predict_anomaly(user_id, behavior_data)
         
         # Check if behavior is anomalous
-        is_anomaly = trust_score < 70  # Threshold
+        is_anomaly = trust_score < Config.TRUST_SCORE_THRESHOLD
+        
+        # The session's recent scores decide the logout, not this event alone
+        logout, session_score = session_trust.observe(session_id, [behavior_data], [trust_score])
         
         # Store behavior log
         behavior_log = BehaviorService.log_behavior(
@@ -28,15 +36,66 @@ class BehaviorController:
         )
         
         db.session.add(behavior_log)
+        behavior_stats.record([behavior_log])
         
-        if is_anomaly:
+        if logout:
             # Trigger alert
             from backend.controllers.notification_controller import NotificationController
-            NotificationController.trigger_anomaly_alert(user_id, behavior_data, trust_score)
-            return jsonify({'action': 'logout', 'trust_score': trust_score}), 200
+            NotificationController.trigger_anomaly_alert(user_id, behavior_data, session_score)
+            session_trust.end(session_id)
+            return jsonify({'action': 'logout', 'trust_score': trust_score, 'session_trust': session_score}), 200
         
         db.session.commit()
-        return jsonify({'trust_score': trust_score}), 200
+        return jsonify({'trust_score': trust_score, 'session_trust': session_score}), 200
+    
+    @staticmethod
+    def record_behavior_batch():
+        """Record a batch of behavior events with one bulk insert and one commit"""
+        user_id = get_jwt_identity()
+        payload = request.json
+        
+        # Accept either a bare array or {"events": [...]}
+        events = payload.get('events') if isinstance(payload, dict) else payload
+        if not isinstance(events, list) or not events:
+            return jsonify({'error': 'Events array required'}), 400
+        if len(events) > Config.MAX_BATCH_EVENTS:
+            return jsonify({'error': f"Batch exceeds {Config.MAX_BATCH_EVENTS} events"}), 413
+        
+        # Update session activity once for the whole batch
+        session_id = request.headers.get('Session-ID', 'unknown')
+        BehaviorService.update_session_activity(session_id)
+        
+        # Calculate trust scores using AI model
+        trust_scores = ai_service.predict_anomaly_batch(user_id, events)
+        
+        behavior_rows = BehaviorService.log_behavior_batch(
+            user_id, session_id, events, trust_scores, Config.TRUST_SCORE_THRESHOLD
+        )
+        db.session.bulk_insert_mappings(BehaviorLog, behavior_rows)
+        behavior_stats.record(behavior_rows)
+        
+        lowest_score = min(trust_scores)
+        logout, session_score = session_trust.observe(session_id, events, trust_scores)
+        if logout:
+            # Alert once for the batch, using the worst event
+            from backend.controllers.notification_controller import NotificationController
+            worst_event = events[trust_scores.index(lowest_score)]
+            NotificationController.trigger_anomaly_alert(user_id, worst_event, session_score)
+            session_trust.end(session_id)
+            return jsonify({
+                'action': 'logout',
+                'trust_score': lowest_score,
+                'session_trust': session_score,
+                'trust_scores': trust_scores
+            }), 200
+        
+        db.session.commit()
+        return jsonify({
+            'action': 'continue',
+            'trust_score': lowest_score,
+            'session_trust': session_score,
+            'trust_scores': trust_scores
+        }), 200
     
     @staticmethod
     def get_user_behavior_history():
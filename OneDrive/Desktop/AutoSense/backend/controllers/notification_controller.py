@@ -1,8 +1,9 @@
 from flask import request, jsonify
-from backend.services.notification_service import NotificationService
+from backend.services.email_outbox import alert_email
 from backend.models.user import User
 from backend.models.session import Session
 from backend.models.alert import Alert
+from backend.models.email_outbox import EmailOutbox
 from backend.config.database import db
 from datetime import datetime
 import json
@@ -30,15 +31,17 @@ class NotificationController:
             
             # Update session status to terminated
             session.status = 'terminated'
+            session.ended_at = datetime.now()
             
             db.session.add(alert)
-            db.session.commit()
-            
-            # Send alert email
-            NotificationService.send_alert_email(
+            # Queued in the outbox with the alert; delivered by the outbox workers
+            db.session.add(EmailOutbox(**alert_email(
+                user_id,
                 user.email,
                 session.session_token,
                 str(location),
                 behavior_data,
-                f"Trust score dropped to {trust_score}%"
-            )
\ No newline at end of file
+                f"Trust score dropped to {trust_score}%",
+                alert.timestamp
+            )))
+            db.session.commit()
\ No newline at end of file
@@ -1,4 +1,5 @@
 from .auth_middleware import auth_required
 from .cors_middleware import setup_cors
+from .rate_limit_middleware import rate_limit
 
-__all__ = ['auth_required', 'setup_cors']
\ No newline at end of file
+__all__ = ['auth_required', 'setup_cors', 'rate_limit']
\ No newline at end of file
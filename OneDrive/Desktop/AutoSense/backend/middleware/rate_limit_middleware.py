@@ -0,0 +1,34 @@
+from flask import request, jsonify
+from functools import wraps
+from werkzeug.middleware.proxy_fix import ProxyFix
+import math
+
+def trust_proxy_hops(app, hops):
+    """Take the client address from X-Forwarded-For as set by `hops` trusted reverse proxies.
+    
+    Without this, behind a proxy every request's remote_addr is the proxy's,
+    so all clients share one per-IP bucket. Headers beyond `hops` are
+    client-supplied and ignored.
+    """
+    if hops > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+def rate_limit(limiter, scope):
+    """Decorator rejecting requests over the per-IP or per-email limit before the view runs"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            data = request.get_json(silent=True)
+            email = data.get('email') if isinstance(data, dict) else None
+            allowed, retry_after, rule = limiter.check(
+                scope,
+                ip=request.remote_addr,
+                email=email.strip().lower() if isinstance(email, str) else None
+            )
+            if not allowed:
+                response = jsonify({'error': 'Too many attempts, try again later'})
+                response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response, 429
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
\ No newline at end of file
@@ -3,5 +3,10 @@ from .session import Session
 from .behavior import BehaviorLog
 from .alert import Alert
 from .ai_model import AIModel
+from .training_job import TrainingJob
+from .behavior_rollup import BehaviorRollup
+from .log_partition import BehaviorLogPartition
+from .behavior_stats import UserBehaviorStats
+from .email_outbox import EmailOutbox
 
-__all__ = ['User', 'Session', 'BehaviorLog', 'Alert', 'AIModel']
\ No newline at end of file
+__all__ = ['User', 'Session', 'BehaviorLog', 'Alert', 'AIModel', 'TrainingJob', 'BehaviorRollup', 'BehaviorLogPartition', 'UserBehaviorStats', 'EmailOutbox']
\ No newline at end of file
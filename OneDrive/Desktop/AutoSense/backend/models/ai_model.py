@@ -3,6 +3,10 @@ from datetime import datetime
 
 class AIModel(db.Model):
     __tablename__ = 'ai_models'
+    __table_args__ = (
+        # One model of each type per user; saves upsert on this key
+        db.UniqueConstraint('user_id', 'model_type', name='uq_ai_models_user_type'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -3,6 +3,11 @@ from datetime import datetime
 
 class Alert(db.Model):
     __tablename__ = 'alerts'
+    __table_args__ = (
+        # Per-user alerts newest first, and the admin feed across all users
+        db.Index('ix_alerts_user_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_alerts_timestamp', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
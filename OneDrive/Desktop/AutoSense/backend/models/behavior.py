@@ -3,13 +3,27 @@ from datetime import datetime
 
 class BehaviorLog(db.Model):
     __tablename__ = 'behavior_logs'
+    __table_args__ = (
+        # Per-user history newest first; timestamp alone drives partition rotation
+        db.Index('ix_behavior_logs_user_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_behavior_logs_timestamp', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     session_id = db.Column(db.String(255), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Legacy JSON payloads; events in the raw sample format go to the binary columns
     keystroke_data = db.Column(db.Text)
     mouse_data = db.Column(db.Text)
+    # Raw samples in the compact binary format (see services/sample_codec.py)
+    keystroke_samples = db.Column(db.LargeBinary)
+    mouse_samples = db.Column(db.LargeBinary)
+    # Feature values the event was scored on, kept for retraining
+    keystroke_speed = db.Column(db.Float)
+    mouse_speed = db.Column(db.Float)
+    idle_time = db.Column(db.Float)
+    cursor_path_length = db.Column(db.Float)
     trust_score = db.Column(db.Float)
     is_anomaly = db.Column(db.Boolean, default=False)
     
@@ -0,0 +1,41 @@
+from backend.config.database import db
+from datetime import datetime
+
+# Per-session aggregates of behavior logs whose raw partition was dropped
+class BehaviorRollup(db.Model):
+    __tablename__ = 'behavior_rollups'
+    __table_args__ = (
+        db.Index('ix_behavior_rollups_user_last_seen', 'user_id', 'last_seen'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    session_id = db.Column(db.String(255), nullable=False)
+    partition_name = db.Column(db.String(64), nullable=False)
+    first_seen = db.Column(db.DateTime)
+    last_seen = db.Column(db.DateTime)
+    event_count = db.Column(db.Integer, nullable=False)
+    anomaly_count = db.Column(db.Integer, nullable=False)
+    trust_score_mean = db.Column(db.Float)
+    trust_score_min = db.Column(db.Float)
+    trust_score_sumsq = db.Column(db.Float)
+    keystroke_speed_mean = db.Column(db.Float)
+    mouse_speed_mean = db.Column(db.Float)
+    idle_time_mean = db.Column(db.Float)
+    cursor_path_length_mean = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'session_id': self.session_id,
+            'timestamp': self.last_seen.isoformat() if self.last_seen else None,
+            'first_seen': self.first_seen.isoformat() if self.first_seen else None,
+            'event_count': self.event_count,
+            'anomaly_count': self.anomaly_count,
+            'trust_score': self.trust_score_mean,
+            'trust_score_min': self.trust_score_min,
+            'is_anomaly': self.anomaly_count > 0,
+            'rollup': True
+        }
\ No newline at end of file
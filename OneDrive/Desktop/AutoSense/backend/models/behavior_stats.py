@@ -0,0 +1,28 @@
+from backend.config.database import db
+from datetime import datetime
+import math
+
+# Running per-user behavior totals, updated in the same transaction as each log insert
+class UserBehaviorStats(db.Model):
+    __tablename__ = 'user_behavior_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+    anomaly_count = db.Column(db.Integer, nullable=False, default=0)
+    trust_score_count = db.Column(db.Integer, nullable=False, default=0)
+    trust_score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    trust_score_sumsq = db.Column(db.Float, nullable=False, default=0.0)
+    last_seen = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        mean = self.trust_score_sum / self.trust_score_count if self.trust_score_count else None
+        variance = self.trust_score_sumsq / self.trust_score_count - mean ** 2 if self.trust_score_count else None
+        return {
+            'user_id': self.user_id,
+            'event_count': self.event_count,
+            'anomaly_count': self.anomaly_count,
+            'average_trust_score': mean,
+            'trust_score_std': math.sqrt(max(variance, 0.0)) if variance is not None else None,
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None
+        }
\ No newline at end of file
@@ -0,0 +1,25 @@
+from backend.config.database import db
+from datetime import datetime
+
+# Behavior log partitions (native or rotated tables) and the time range they hold
+class BehaviorLogPartition(db.Model):
+    __tablename__ = 'behavior_log_partitions'
+    __table_args__ = (
+        # Rotated archives newest first, read on every history/stats call
+        db.Index('ix_behavior_log_partitions_native_range_end', 'native', 'range_end'),
+    )
+    
+    name = db.Column(db.String(64), primary_key=True)
+    range_start = db.Column(db.DateTime)
+    range_end = db.Column(db.DateTime)
+    native = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'range_start': self.range_start.isoformat() if self.range_start else None,
+            'range_end': self.range_end.isoformat() if self.range_end else None,
+            'native': self.native,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
\ No newline at end of file
@@ -3,6 +3,13 @@ from datetime import datetime
 
 class Session(db.Model):
     __tablename__ = 'sessions'
+    __table_args__ = (
+        # Active-session lookups and newest-first session listings per user
+        db.Index('ix_sessions_user_status', 'user_id', 'status'),
+        db.Index('ix_sessions_user_created', 'user_id', 'created_at'),
+        # Incremental sync of revoked tokens
+        db.Index('ix_sessions_ended_at', 'ended_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -10,6 +17,8 @@ class Session(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_activity = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='active')
+    jti = db.Column(db.String(36))
+    ended_at = db.Column(db.DateTime)
     
     def to_dict(self):
         return {
@@ -18,5 +27,6 @@ class Session(db.Model):
             'session_token': self.session_token,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'last_activity': self.last_activity.isoformat() if self.last_activity else None,
-            'status': self.status
+            'status': self.status,
+            'ended_at': self.ended_at.isoformat() if self.ended_at else None
         }
\ No newline at end of file
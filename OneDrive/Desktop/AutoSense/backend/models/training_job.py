@@ -0,0 +1,24 @@
+from backend.config.database import db
+from datetime import datetime
+
+class TrainingJob(db.Model):
+    __tablename__ = 'training_jobs'
+    
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(20), default='queued')
+    sample_count = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'user_id': self.user_id,
+            'status': self.status,
+            'sample_count': self.sample_count,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
\ No newline at end of file
@@ -1,7 +1,18 @@
-from .auth_service import AuthService
-from .behavior_service import BehaviorService
-from .ai_service import AIService
-from .notification_service import NotificationService
-from .admin_service import AdminService
+import importlib
+
+# Loaded on first use: importing one service module (as app.py and the
+# training pool workers do) does not construct the others' shared state
+_exports = {
+    'AuthService': '.auth_service',
+    'BehaviorService': '.bahavior_service',
+    'AIService': '.ai_service',
+    'NotificationService': '.notification_service',
+    'AdminService': '.admin_service'
+}
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_exports[name], __name__), name)
 
 __all__ = ['AuthService', 'BehaviorService', 'AIService', 'NotificationService', 'AdminService']
\ No newline at end of file
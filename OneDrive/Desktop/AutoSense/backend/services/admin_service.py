@@ -1,6 +1,6 @@
 from backend.models.user import User
 from backend.models.alert import Alert
-from backend.models.behavior import BehaviorLog
+from backend.services.bahavior_service import behavior_stats
 
 class AdminService:
     @staticmethod
@@ -16,20 +16,21 @@ class AdminService:
     @staticmethod
     def get_user_behavior_stats(user_id):
         """Get user behavior statistics"""
-        behavior_logs = BehaviorLog.query.filter_by(user_id=user_id).all()
+        # Maintained alongside every log insert; a single primary-key read
+        stats = behavior_stats.get(user_id)
         
-        if not behavior_logs:
+        if not stats or not stats.event_count:
             return {
                 'total_sessions': 0,
                 'anomaly_count': 0,
                 'average_trust_score': 100.0
             }
         
-        anomaly_count = sum(1 for log in behavior_logs if log.is_anomaly)
-        avg_trust_score = sum(log.trust_score for log in behavior_logs if log.trust_score) / len([log for log in behavior_logs if log.trust_score])
-        
+        stats = stats.to_dict()
         return {
-            'total_sessions': len(behavior_logs),
-            'anomaly_count': anomaly_count,
-            'average_trust_score': avg_trust_score
+            'total_sessions': stats['event_count'],
+            'anomaly_count': stats['anomaly_count'],
+            'average_trust_score': stats['average_trust_score'],
+            'trust_score_std': stats['trust_score_std'],
+            'last_seen': stats['last_seen']
         }
\ No newline at end of file
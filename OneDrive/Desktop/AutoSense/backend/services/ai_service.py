@@ -1,33 +1,66 @@
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
-import pandas as pd
+from backend.config.database import db
+from backend.config.settings import Config
+from backend.models.ai_model import AIModel
+from backend.services.model_store import ModelStore
+from backend.services.inference_engine import compiled_forest
+from backend.services.online_model import OnlineBaselineModel, merge_online_models
+from backend.services.training_jobs import BEHAVIOR_FEATURES, behavior_feature_matrix, fit_behavior_model
 
 class AIService:
     def __init__(self):
-        self.models = {}
-        self.scalers = {}
+        self.model_store = ModelStore(
+            db,
+            AIModel,
+            max_entries=Config.MODEL_CACHE_MAX_ENTRIES,
+            max_bytes=Config.MODEL_CACHE_MAX_BYTES,
+            max_missing_entries=Config.MODEL_CACHE_MAX_MISSING_ENTRIES
+        )
+        self.online_store = ModelStore(
+            db,
+            AIModel,
+            model_type='online',
+            max_entries=Config.MODEL_CACHE_MAX_ENTRIES,
+            max_bytes=Config.MODEL_CACHE_MAX_BYTES,
+            max_missing_entries=Config.MODEL_CACHE_MAX_MISSING_ENTRIES,
+            merge=merge_online_models
+        )
+    
+    def get_scoring_mode(self, user_id):
+        """Return 'online' or 'batch' for the user"""
+        return 'online' if self.online_store.load(user_id) is not None else 'batch'
+    
+    def set_scoring_mode(self, user_id, mode):
+        """Switch a user between batch IsolationForest and online baseline scoring"""
+        if mode == 'online':
+            if self.online_store.load(user_id) is None:
+                self.online_store.save(user_id, {
+                    'model': OnlineBaselineModel(len(BEHAVIOR_FEATURES)),
+                    'features': BEHAVIOR_FEATURES
+                })
+        else:
+            self.online_store.delete(user_id)
+    
+    def update_online_model(self, user_id, behavior_events):
+        """Fold accepted events into the user's streaming baseline, if they have one"""
+        model_data = self.online_store.load(user_id)
+        if model_data is None:
+            return
+        
+        model = model_data['model']
+        previous_count = model.count
+        model.update_many(behavior_feature_matrix(behavior_events, model_data['features']))
+        
+        # Persist every N events rather than on each one
+        persist_every = Config.ONLINE_MODEL_PERSIST_EVERY
+        if model.count // persist_every != previous_count // persist_every:
+            self.online_store.save(user_id, model_data)
     
     def train_model(self, user_id, behavior_data):
         """Train an anomaly detection model for the user"""
         try:
-            df = pd.DataFrame(behavior_data)
-            
-            # Extract features for training
-            features = ['keystroke_speed', 'mouse_speed', 'idle_time', 'cursor_path_length']
-            feature_data = df[features].fillna(0).values
-            
-            # Normalize features
-            scaler = StandardScaler()
-            scaled_data = scaler.fit_transform(feature_data)
-            
-            # Train Isolation Forest
-            model = IsolationForest(contamination=0.1, random_state=42)
-            model.fit(scaled_data)
-            
-            # Store model and scaler
-            self.models[user_id] = model
-            self.scalers[user_id] = scaler
+            # Persist model and scaler
+            self.model_store.save(user_id, fit_behavior_model(behavior_data))
             
             return True
         except Exception as e:
@@ -36,26 +69,23 @@ class AIService:
     
     def predict_anomaly(self, user_id, current_behavior):
         """Predict if current behavior is anomalous"""
-        if user_id not in self.models:
+        online_data = self.online_store.load(user_id)
+        if online_data is not None:
+            feature_matrix = behavior_feature_matrix([current_behavior], online_data['features'])
+            return float(online_data['model'].trust_scores(feature_matrix)[0])
+        
+        model_data = self.model_store.load(user_id)
+        if model_data is None:
             return 100.0  # Return high score if no model exists yet
         
         try:
-            features = ['keystroke_speed', 'mouse_speed', 'idle_time', 'cursor_path_length']
+            features = model_data['features']
             
-            # Prepare current behavior data
-            feature_vector = np.array([[
-                current_behavior.get('keystroke_speed', 0),
-                current_behavior.get('mouse_speed', 0),
-                current_behavior.get('idle_time', 0),
-                current_behavior.get('cursor_path_length', 0)
-            ]])
+            # Prepare current behavior data (keystroke dynamics come from raw timings)
+            feature_vector = behavior_feature_matrix([current_behavior], features, fill=model_data['scaler'].mean_)
             
-            # Scale the data
-            scaled_vector = self.scalers[user_id].transform(feature_vector)
-            
-            # Predict anomaly (1 = normal, -1 = anomaly)
-            prediction = self.models[user_id].predict(scaled_vector)
-            anomaly_score = self.models[user_id].score_samples(scaled_vector)[0]
+            # Scale and score in one compiled pass (identical to sklearn's score_samples)
+            anomaly_score = compiled_forest(model_data).score_samples(feature_vector)[0]
             
             # Convert to trust score (0-100)
             trust_score = max(0, min(100, (anomaly_score + 2) * 25))  # Normalize to 0-100
@@ -63,4 +93,30 @@ class AIService:
             return trust_score
         except Exception as e:
             print(f"Error predicting anomaly: {e}")
-            return 100.0
\ No newline at end of file
+            return 100.0
+    
+    def predict_anomaly_batch(self, user_id, behavior_events):
+        """Predict trust scores for a batch of behavior events in one pass"""
+        online_data = self.online_store.load(user_id)
+        if online_data is not None:
+            feature_matrix = behavior_feature_matrix(behavior_events, online_data['features'])
+            return online_data['model'].trust_scores(feature_matrix).tolist()
+        
+        model_data = self.model_store.load(user_id)
+        if model_data is None:
+            return [100.0] * len(behavior_events)
+        
+        try:
+            # One row per event
+            feature_matrix = behavior_feature_matrix(behavior_events, model_data['features'], fill=model_data['scaler'].mean_)
+            
+            # Scale and score every row in one compiled pass
+            anomaly_scores = compiled_forest(model_data).score_samples(feature_matrix)
+            
+            # Convert to trust scores (0-100)
+            trust_scores = np.clip((anomaly_scores + 2) * 25, 0, 100)
+            
+            return trust_scores.tolist()
+        except Exception as e:
+            print(f"Error predicting batch anomaly: {e}")
+            return [100.0] * len(behavior_events)
\ No newline at end of file
@@ -0,0 +1,346 @@
+import asyncio
+from datetime import datetime
+import json
+import time
+from sqlalchemy import bindparam, select
+from backend.services.email_outbox import alert_email
+
+def async_database_url(url):
+    """Async driver URL for a SQLALCHEMY_DATABASE_URI: asyncpg for PostgreSQL, aiosqlite for SQLite"""
+    scheme, _, rest = url.partition('://')
+    if scheme in ('postgres', 'postgresql', 'postgresql+psycopg2'):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme == 'sqlite':
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+class AsyncBehaviorStore:
+    """Behavior-path reads and writes over a pooled async SQLAlchemy engine.
+    
+    The active session of each access token (user_id, jti) is read at most
+    once per `session_ttl` seconds, as ActiveSessionCache does on the Flask
+    side, so a user's events are never attributed to another of their sessions.
+    Normal log rows and last_activity heartbeats are buffered and written in
+    one transaction by `flush`, which runs on a timer and as soon as
+    `batch_size` rows are waiting; while flushes fail, at most
+    `max_buffered_rows` are kept (the oldest are dropped and counted). A batch that ends its session is written
+    in one transaction with everything the termination needs: its log rows
+    and counters, the alert, the alert email and the session status.
+    """
+    
+    def __init__(self, engine, session_model, behavior_model, alert_model, outbox_model, user_model,
+                 stats_store, session_ttl=30, batch_size=200, max_buffered_rows=10000):
+        self.engine = engine
+        self.session_model = session_model
+        self.behavior_model = behavior_model
+        self.alert_model = alert_model
+        self.outbox_model = outbox_model
+        self.user_model = user_model
+        self.stats_store = stats_store
+        self.session_ttl = session_ttl
+        self.batch_size = batch_size
+        self.max_buffered_rows = max_buffered_rows
+        self.stats = {'session_hits': 0, 'session_misses': 0, 'flushes': 0, 'rows_written': 0, 'heartbeats': 0,
+                      'terminated': 0, 'errors': 0, 'dropped': 0}
+        self._sessions = {}  # user_id -> {jti: (session row or None, expires_at)}
+        self._rows = []
+        self._dirty = {}  # session id -> latest last_activity
+        self._flush_lock = asyncio.Lock()
+    
+    async def active_session(self, user_id, jti):
+        """The active session row (id, user_id, session_token, jti, created_at) of the user's token `jti`, or None"""
+        now = time.monotonic()
+        cached = self._sessions.get(user_id, {}).get(jti)
+        if cached is not None and cached[1] > now:
+            self.stats['session_hits'] += 1
+            return cached[0]
+        self.stats['session_misses'] += 1
+        
+        table = self.session_model.__table__
+        query = (
+            select(table.c.id, table.c.user_id, table.c.session_token, table.c.jti, table.c.created_at)
+            .where(table.c.user_id == user_id, table.c.jti == jti, table.c.status == 'active')
+            .limit(1)
+        )
+        async with self.engine.connect() as conn:
+            session = (await conn.execute(query)).first()
+        self._sessions.setdefault(user_id, {})[jti] = (session, now + self.session_ttl)
+        return session
+    
+    def invalidate(self, user_id):
+        """Forget all of a user's cached sessions"""
+        self._sessions.pop(user_id, None)
+    
+    def touch(self, session, timestamp):
+        """Record activity in memory; written by the next flush"""
+        if session is not None:
+            self._dirty[session.id] = timestamp
+    
+    async def write_logs(self, rows):
+        """Queue normal log rows for the next bulk flush"""
+        self._rows.extend(rows)
+        if len(self._rows) >= self.batch_size:
+            await self.flush()
+    
+    async def flush(self):
+        """Write buffered log rows, their counters and heartbeats in one transaction"""
+        async with self._flush_lock:
+            rows, self._rows = self._rows, []
+            dirty, self._dirty = self._dirty, {}
+            if not rows and not dirty:
+                return
+            try:
+                async with self.engine.begin() as conn:
+                    if rows:
+                        await self._insert_rows(conn, rows)
+                    if dirty:
+                        table = self.session_model.__table__
+                        await conn.execute(
+                            table.update()
+                            .where(table.c.id == bindparam('b_id'))
+                            .values(last_activity=bindparam('b_last_activity')),
+                            [{'b_id': session_id, 'b_last_activity': timestamp} for session_id, timestamp in dirty.items()]
+                        )
+            except Exception as e:
+                # Keep the rows for the next flush, up to the buffer bound; newer heartbeats win
+                self.stats['errors'] += 1
+                print(f"Error flushing behavior logs: {e}")
+                self._rows = rows + self._rows
+                overflow = len(self._rows) - self.max_buffered_rows
+                if overflow > 0:
+                    self.stats['dropped'] += overflow
+                    del self._rows[:overflow]
+                self._dirty = {**dirty, **self._dirty}
+                return
+            self.stats['flushes'] += 1
+            self.stats['rows_written'] += len(rows)
+            self.stats['heartbeats'] += len(dirty)
+    
+    async def end_session(self, user_id, session, rows, behavior_data, trust_score):
+        """Write a batch that ends its session; False if there was no session to end"""
+        timestamp = datetime.now()
+        location = behavior_data.get('location', 'Unknown')
+        reason = f"Trust score dropped to {trust_score}%"
+        users = self.user_model.__table__
+        sessions = self.session_model.__table__
+        
+        async with self.engine.begin() as conn:
+            await self._insert_rows(conn, rows)
+            email = (await conn.execute(select(users.c.email).where(users.c.id == user_id))).scalar()
+            if session is None or email is None:
+                return False
+            
+            await conn.execute(self.alert_model.__table__.insert().values(
+                user_id=user_id,
+                session_id=session.session_token,
+                timestamp=timestamp,
+                reason=reason,
+                location=json.dumps(location),
+                behavior_data=json.dumps(behavior_data)
+            ))
+            # Delivered by the outbox workers
+            await conn.execute(self.outbox_model.__table__.insert().values(**alert_email(
+                user_id, email, session.session_token, str(location), behavior_data, reason, timestamp
+            )))
+            await conn.execute(
+                sessions.update()
+                .where(sessions.c.id == session.id)
+                .values(status='terminated', ended_at=timestamp)
+            )
+        self.invalidate(user_id)
+        self.stats['terminated'] += 1
+        return True
+    
+    async def dispose(self):
+        """Flush what is buffered and close the pool"""
+        await self.flush()
+        await self.engine.dispose()
+    
+    async def _insert_rows(self, conn, rows):
+        await conn.execute(self.behavior_model.__table__.insert(), rows)
+        await conn.execute(self.stats_store.upsert(conn.dialect.name), self.stats_store.params(rows))
+
+class BodyTooLarge(Exception):
+    """A request body over the app's max_body_bytes"""
+
+class AsyncIngestApp:
+    """ASGI app for the behavior ingest and prediction endpoints.
+    
+    No request holds a thread while it waits on the database: sessions, log
+    writes and alerts go through an AsyncBehaviorStore, and only the
+    CPU-bound work (`score(user_id, session, events)` and
+    `predict(user_id, event)`) runs in `executor`. `authenticate(token)`
+    returns the (user_id, jti) of a bearer token or raises; events are
+    logged against that token's session. `build_row` makes the
+    BehaviorLog columns of one event, and `on_terminated(user_id, session,
+    trust_score)` runs once a logout has committed. Request bodies over
+    `max_body_bytes` (by Content-Length, or as read) get a 413. The ASGI lifespan runs
+    `on_startup` and a task flushing the store every `flush_interval` seconds.
+    """
+    
+    ROUTES = {
+        '/api/behavior/events': 'record_behavior',
+        '/api/behavior/events/batch': 'record_behavior_batch',
+        '/api/ai/predict': 'predict_trust'
+    }
+    
+    def __init__(self, store, authenticate, score, predict, build_row, executor, on_terminated=None,
+                 on_startup=None, max_batch_events=500, flush_interval=1.0, max_body_bytes=4 * 1024 * 1024):
+        self.store = store
+        self.authenticate = authenticate
+        self.score = score
+        self.predict = predict
+        self.build_row = build_row
+        self.executor = executor
+        self.on_terminated = on_terminated
+        self.on_startup = on_startup
+        self.max_batch_events = max_batch_events
+        self.flush_interval = flush_interval
+        self.max_body_bytes = max_body_bytes
+        self.stats = {'requests': 0, 'events': 0, 'logouts': 0, 'errors': 0}
+        self._flusher = None
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        
+        handler = self.ROUTES.get(scope['path'])
+        identity = self._identity(scope) if handler and scope['method'] == 'POST' else None
+        if handler is None:
+            status, body = 404, {'error': 'Not found'}
+        elif scope['method'] != 'POST':
+            status, body = 405, {'error': 'Method not allowed'}
+        elif identity is None:
+            status, body = 401, {'msg': 'Missing or invalid token'}
+        else:
+            try:
+                payload = json.loads(await self._read_body(scope, receive))
+            except BodyTooLarge:
+                status, body = 413, {'error': f"Request body exceeds {self.max_body_bytes} bytes"}
+            except ValueError:
+                status, body = 400, {'error': 'Invalid JSON'}
+            else:
+                self.stats['requests'] += 1
+                status, body = await getattr(self, handler)(*identity, payload)
+        await self._respond(send, status, body)
+    
+    async def record_behavior(self, user_id, jti, payload):
+        if not isinstance(payload, dict):
+            return 400, {'error': 'Event object required'}
+        result = await self.ingest(user_id, jti, [payload])
+        if 'error' in result:
+            return 500, result
+        return 200, {'action': result['action'], 'trust_score': result['trust_score'], 'session_trust': result['session_trust']}
+    
+    async def record_behavior_batch(self, user_id, jti, payload):
+        # Accept either a bare array or {"events": [...]}
+        events = payload.get('events') if isinstance(payload, dict) else payload
+        if not isinstance(events, list) or not events:
+            return 400, {'error': 'Events array required'}
+        if len(events) > self.max_batch_events:
+            return 413, {'error': f"Batch exceeds {self.max_batch_events} events"}
+        result = await self.ingest(user_id, jti, events)
+        return (500 if 'error' in result else 200), result
+    
+    async def predict_trust(self, user_id, jti, payload):
+        if not isinstance(payload, dict):
+            return 400, {'error': 'Event object required'}
+        loop = asyncio.get_running_loop()
+        trust_score = await loop.run_in_executor(self.executor, self.predict, user_id, payload)
+        return 200, {'trust_score': trust_score}
+    
+    async def ingest(self, user_id, jti, events):
+        """Score, log and act on a batch of events sent with the user's token `jti`"""
+        try:
+            session = await self.store.active_session(user_id, jti)
+            now = datetime.now()
+            self.store.touch(session, now)
+            
+            loop = asyncio.get_running_loop()
+            trust_scores, logout, session_score = await loop.run_in_executor(
+                self.executor, self.score, user_id, session, events
+            )
+            
+            session_token = session.session_token if session else 'unknown'
+            rows = [self.build_row(user_id, session_token, event, trust_score, now) for event, trust_score in zip(events, trust_scores)]
+            lowest_score = min(trust_scores)
+            if logout:
+                worst_event = events[trust_scores.index(lowest_score)]
+                if await self.store.end_session(user_id, session, rows, worst_event, session_score) and self.on_terminated:
+                    self.on_terminated(user_id, session, session_score)
+                self.stats['logouts'] += 1
+            else:
+                await self.store.write_logs(rows)
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Error ingesting behavior events: {e}")
+            return {'error': 'Events could not be recorded'}
+        
+        self.stats['events'] += len(events)
+        return {
+            'action': 'logout' if logout else 'continue',
+            'trust_score': lowest_score,
+            'session_trust': session_score,
+            'trust_scores': trust_scores
+        }
+    
+    def _identity(self, scope):
+        for name, value in scope.get('headers', ()):
+            if name == b'authorization':
+                scheme, _, token = value.decode('latin-1').partition(' ')
+                if scheme.lower() != 'bearer' or not token:
+                    return None
+                try:
+                    return self.authenticate(token)
+                except Exception:
+                    return None
+        return None
+    
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.on_startup:
+                    self.on_startup()
+                self._flusher = asyncio.create_task(self._flush_periodically())
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._flusher is not None:
+                    self._flusher.cancel()
+                await self.store.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.store.flush()
+    
+    async def _read_body(self, scope, receive):
+        """The request body; raises BodyTooLarge past max_body_bytes without reading the rest"""
+        for name, value in scope.get('headers', ()):
+            if name == b'content-length' and value.isdigit() and int(value) > self.max_body_bytes:
+                raise BodyTooLarge()
+        
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                raise BodyTooLarge()
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+    
+    async def _respond(self, send, status, body):
+        data = json.dumps(body).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(data)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': data})
\ No newline at end of file
@@ -1,8 +1,23 @@
 from backend.models.user import User
 from backend.models.session import Session
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
-import secrets
+from backend.config.settings import Config
+from backend.services.otp_store import OTPStore, make_otp_backend
+from backend.services.password_hasher import PasswordHasher
+
+# The one OTP store and hasher per process; app.py uses these same instances
+otp_store = OTPStore(
+    make_otp_backend(Config.OTP_STORE_URL, Config.WEB_CONCURRENCY),
+    Config.SECRET_KEY,
+    ttl_seconds=Config.OTP_EXPIRY_MINUTES * 60,
+    max_attempts=Config.OTP_MAX_ATTEMPTS
+)
+
+password_hasher = PasswordHasher(
+    method=Config.PASSWORD_HASH_METHOD,
+    executor=Config.PASSWORD_HASH_EXECUTOR,
+    max_workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING
+)
 
 class AuthService:
     @staticmethod
@@ -12,35 +27,27 @@ class AuthService:
         if existing_user:
             return None, "User already exists"
         
-        otp = AuthService.generate_otp()
-        otp_expiry = datetime.now() + timedelta(minutes=5)
-        
         user = User(
             email=email,
-            password_hash=generate_password_hash(password),
-            otp=otp,
-            otp_expiry=otp_expiry
+            password_hash=password_hasher.hash(password)
         )
         
         return user, None
     
     @staticmethod
-    def generate_otp():
-        """Generate a 6-digit OTP"""
-        import random
-        return str(random.randint(100000, 999999))
+    def issue_otp(purpose, email):
+        """Generate and store a 6-digit OTP ('signup' or 'login')"""
+        return otp_store.issue(purpose, email)
     
     @staticmethod
-    def verify_otp(email, otp):
-        """Verify OTP for user"""
-        user = User.query.filter_by(email=email, otp=otp).first()
-        
-        if not user or user.otp_expiry < datetime.now():
+    def verify_otp(email, otp, purpose='login'):
+        """Verify OTP for user; the code is consumed on success"""
+        if not otp_store.verify(purpose, email, otp):
             return False, None
         
-        # Clear OTP after verification
-        user.otp = None
-        user.otp_expiry = None
+        user = User.query.filter_by(email=email).first()
+        if not user:
+            return False, None
         
         return True, user
     
@@ -48,8 +55,15 @@ class AuthService:
     def authenticate_user(email, password):
         """Authenticate user with email and password"""
         user = User.query.filter_by(email=email).first()
+        if not user:
+            return None, "Invalid credentials"
         
-        if not user or not check_password_hash(user.password_hash, password):
+        matches, rehash = password_hasher.verify(user.password_hash, password)
+        if not matches:
             return None, "Invalid credentials"
         
+        # Upgrade hashes made with old parameters (caller commits)
+        if rehash:
+            user.password_hash = password_hasher.hash(password)
+        
         return user, None
\ No newline at end of file
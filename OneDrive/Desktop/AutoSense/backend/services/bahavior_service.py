@@ -1,30 +1,70 @@
 from backend.models.behavior import BehaviorLog
+from backend.models.behavior_rollup import BehaviorRollup
+from backend.models.log_partition import BehaviorLogPartition
+from backend.models.behavior_stats import UserBehaviorStats
 from backend.models.session import Session
+from backend.config.database import db
+from backend.config.settings import Config
+from backend.services.log_partitions import BehaviorLogPartitions
+from backend.services.behavior_stats import BehaviorStatsStore
+from backend.services.sample_codec import encode_row_samples
+from backend.services.session_trust import SessionTrustTracker
+from backend.services.training_jobs import BEHAVIOR_FEATURES
 from datetime import datetime
-import json
+
+log_partitions = BehaviorLogPartitions(db, BehaviorLog, BehaviorRollup, BehaviorLogPartition)
+behavior_stats = BehaviorStatsStore(db, UserBehaviorStats)
+session_trust = SessionTrustTracker(
+    BEHAVIOR_FEATURES,
+    window=Config.TRUST_WINDOW,
+    alpha=Config.TRUST_EWMA_ALPHA,
+    threshold=Config.TRUST_SCORE_THRESHOLD,
+    min_low=Config.TRUST_WINDOW_MIN_LOW,
+    hard_floor=Config.TRUST_HARD_FLOOR,
+    max_sessions=Config.TRUST_MAX_SESSIONS,
+    idle_seconds=Config.SESSION_TIMEOUT_MINUTES * 60
+)
 
 class BehaviorService:
     @staticmethod
     def log_behavior(user_id, session_id, behavior_data, trust_score, is_anomaly=False):
         """Log user behavior"""
-        behavior_log = BehaviorLog(
-            user_id=user_id,
-            session_id=session_id,
-            timestamp=datetime.now(),
-            keystroke_data=json.dumps(behavior_data.get('keystroke_data', {})),
-            mouse_data=json.dumps(behavior_data.get('mouse_data', {})),
-            trust_score=trust_score,
-            is_anomaly=is_anomaly
-        )
+        behavior_log = BehaviorLog(**BehaviorService.behavior_row(
+            user_id, session_id, behavior_data, trust_score, datetime.now()
+        ))
+        behavior_log.is_anomaly = is_anomaly
         
         return behavior_log
     
+    @staticmethod
+    def behavior_row(user_id, session_id, behavior_data, trust_score, timestamp, threshold=70):
+        """BehaviorLog column values for one event"""
+        return {
+            'user_id': user_id,
+            'session_id': session_id,
+            'timestamp': timestamp,
+            **encode_row_samples(behavior_data, Config.SAMPLE_COMPRESS_MIN_BYTES),
+            'keystroke_speed': behavior_data.get('keystroke_speed'),
+            'mouse_speed': behavior_data.get('mouse_speed'),
+            'idle_time': behavior_data.get('idle_time'),
+            'cursor_path_length': behavior_data.get('cursor_path_length'),
+            'trust_score': trust_score,
+            'is_anomaly': trust_score < threshold
+        }
+    
+    @staticmethod
+    def log_behavior_batch(user_id, session_id, behavior_events, trust_scores, threshold=70):
+        """Build BehaviorLog rows for a batch of events, ready for a bulk insert"""
+        timestamp = datetime.now()
+        return [
+            BehaviorService.behavior_row(user_id, session_id, event, trust_score, timestamp, threshold)
+            for event, trust_score in zip(behavior_events, trust_scores)
+        ]
+    
     @staticmethod
     def get_user_behavior_history(user_id, limit=100):
-        """Get user's behavior history"""
-        return BehaviorLog.query.filter_by(user_id=user_id).order_by(
-            BehaviorLog.timestamp.desc()
-        ).limit(limit).all()
+        """Get user's behavior history (raw events across partitions, then session rollups)"""
+        return log_partitions.history(user_id, limit)
     
     @staticmethod
     def update_session_activity(session_id):
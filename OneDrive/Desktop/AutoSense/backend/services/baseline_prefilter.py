@@ -0,0 +1,85 @@
+import threading
+import numpy as np
+from backend.utils.helpers import HelperUtils
+
+class BaselinePrefilter:
+    """First stage of the scoring cascade: deviation from a per-user baseline.
+    
+    Baselines are running means of events the full model accepted, kept as
+    rows of one contiguous users x features matrix, so events of any number
+    of users are screened with a single gather and
+    HelperUtils.calculate_trust_scores. Events scoring at least
+    `accept_score` are close enough to their user's baseline to skip the
+    model; everything else, and every event of a user with fewer than
+    `min_events` baseline events, goes on to the full model. The mean weighs
+    the last `max_weight` events or so, letting a baseline follow slow change.
+    """
+    
+    def __init__(self, n_features, accept_score=85.0, min_events=20, max_weight=500, capacity=1024):
+        self.n_features = n_features
+        self.accept_score = accept_score
+        self.min_events = min_events
+        self.max_weight = max_weight
+        self.stats = {'users': 0, 'screened': 0, 'accepted': 0, 'escalated': 0, 'cold': 0, 'accept_fraction': 0.0}
+        self._baselines = np.zeros((capacity, n_features))
+        self._counts = np.zeros(capacity, dtype=np.int64)
+        self._rows = {}  # user_id -> row in _baselines
+        self._lock = threading.Lock()
+    
+    def screen(self, user_ids, X):
+        """(prefilter scores, mask of events that need the full model) for rows of X"""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.n_features)
+        if np.isscalar(user_ids) or isinstance(user_ids, str):
+            user_ids = [user_ids] * len(X)
+        
+        with self._lock:
+            rows = np.array([self._rows.get(user_id, -1) for user_id in user_ids], dtype=np.int64)
+            known = rows >= 0
+            warm = known.copy()
+            warm[known] = self._counts[rows[known]] >= self.min_events
+            baselines = self._baselines[np.where(known, rows, 0)]
+        
+        scores = HelperUtils.calculate_trust_scores(baselines, X)
+        needs_model = ~warm | (scores < self.accept_score)
+        
+        accepted = len(X) - int(needs_model.sum())
+        self.stats['screened'] += len(X)
+        self.stats['accepted'] += accepted
+        self.stats['cold'] += int((~warm).sum())
+        self.stats['escalated'] += int(needs_model.sum())
+        self.stats['accept_fraction'] = round(self.stats['accepted'] / max(self.stats['screened'], 1), 4)
+        return scores, needs_model
+    
+    def update(self, user_id, X):
+        """Fold a user's model-accepted rows into their baseline"""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.n_features)
+        if not len(X):
+            return
+        with self._lock:
+            row = self._row(user_id)
+            baseline = self._baselines[row]
+            count = self._counts[row]
+            for x in X:
+                count += 1
+                baseline += (x - baseline) / min(count, self.max_weight)
+            self._counts[row] = count
+    
+    def forget(self, user_id):
+        """Drop a user's baseline, e.g. after their model is retrained"""
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is not None:
+                self._baselines[row] = 0
+                self._counts[row] = 0
+    
+    def _row(self, user_id):
+        row = self._rows.get(user_id)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._counts):
+                # Grow by doubling so the matrix stays one contiguous block
+                self._baselines = np.concatenate([self._baselines, np.zeros_like(self._baselines)])
+                self._counts = np.concatenate([self._counts, np.zeros_like(self._counts)])
+            self._rows[user_id] = row
+            self.stats['users'] = len(self._rows)
+        return row
\ No newline at end of file
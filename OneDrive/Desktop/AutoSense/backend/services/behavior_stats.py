@@ -0,0 +1,198 @@
+from datetime import datetime
+import math
+from sqlalchemy import bindparam, case, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+COUNTERS = ['event_count', 'anomaly_count', 'trust_score_count', 'trust_score_sum', 'trust_score_sumsq']
+
+def _value(row, key):
+    return row.get(key) if isinstance(row, dict) else getattr(row, key)
+
+def _merge(totals, user_id, counters, last_seen):
+    """Add one set of counter values into the per-user totals"""
+    total = totals.get(user_id)
+    if total is None:
+        total = totals[user_id] = dict(dict.fromkeys(COUNTERS, 0), last_seen=None)
+    for counter, value in zip(COUNTERS, counters):
+        total[counter] += value or 0
+    if last_seen is not None and (total['last_seen'] is None or last_seen > total['last_seen']):
+        total['last_seen'] = last_seen
+
+def aggregate_rows(rows):
+    """Per-user counter deltas for a batch of BehaviorLog rows (dicts or models)"""
+    totals = {}
+    for row in rows:
+        trust_score = _value(row, 'trust_score')
+        scored = trust_score is not None
+        _merge(totals, _value(row, 'user_id'), [
+            1,
+            1 if _value(row, 'is_anomaly') else 0,
+            1 if scored else 0,
+            trust_score if scored else 0.0,
+            trust_score * trust_score if scored else 0.0
+        ], _value(row, 'timestamp'))
+    return totals
+
+class BehaviorStatsStore:
+    """Per-user behavior totals kept in step with behavior_logs.
+    
+    `record(rows)` adds a batch of freshly inserted log rows to the counters
+    with a single upsert and no commit, so it lands in the caller's
+    transaction next to the log insert. Reads are then one primary-key lookup.
+    `rebuild` recomputes the table from raw logs and rollups (backfill), and
+    `check` reports users whose counters have drifted from them.
+    """
+    
+    def __init__(self, db, stats_model):
+        self.db = db
+        self.stats_model = stats_model
+    
+    def record(self, rows):
+        """Add inserted log rows to their users' counters (caller commits)"""
+        params = self.params(rows)
+        if not params:
+            return
+        
+        table = self.stats_model.__table__
+        session = self.db.session
+        
+        dialect = session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            session.execute(self.upsert(dialect), params)
+            return
+        
+        # Other backends: increment the users that have a row, insert the rest
+        existing = set(session.execute(
+            select(table.c.user_id).where(table.c.user_id.in_([row['user_id'] for row in params]))
+        ).scalars())
+        updates = [{f"d_{key}": value for key, value in row.items()} for row in params if row['user_id'] in existing]
+        inserts = [row for row in params if row['user_id'] not in existing]
+        if updates:
+            session.execute(
+                table.update()
+                .where(table.c.user_id == bindparam('d_user_id'))
+                .values(dict(
+                    {counter: table.c[counter] + bindparam(f"d_{counter}") for counter in COUNTERS},
+                    last_seen=func.coalesce(bindparam('d_last_seen'), table.c.last_seen),
+                    updated_at=bindparam('d_updated_at')
+                )),
+                updates
+            )
+        if inserts:
+            session.execute(table.insert(), inserts)
+    
+    def params(self, rows):
+        """Counter deltas for a batch of log rows, one parameter set per user"""
+        totals = aggregate_rows(rows)
+        now = datetime.utcnow()
+        # Sorted so concurrent writers lock users in the same order
+        return [dict(totals[user_id], user_id=user_id, updated_at=now) for user_id in sorted(totals)]
+    
+    def upsert(self, dialect):
+        """Counter upsert for a sqlite or postgresql connection, executed with `params(rows)`"""
+        table = self.stats_model.__table__
+        insert = (sqlite_insert if dialect == 'sqlite' else postgresql_insert)(table)
+        excluded = insert.excluded
+        return insert.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_=dict(
+                {counter: table.c[counter] + excluded[counter] for counter in COUNTERS},
+                last_seen=case(
+                    (table.c.last_seen.is_(None), excluded.last_seen),
+                    (excluded.last_seen > table.c.last_seen, excluded.last_seen),
+                    else_=table.c.last_seen
+                ),
+                updated_at=excluded.updated_at
+            )
+        )
+    
+    def get(self, user_id):
+        """Stats row for a user, or None if they have no behavior logs"""
+        return self.db.session.get(self.stats_model, user_id)
+    
+    def expected_totals(self, partitions, user_ids=None):
+        """Counters recomputed from raw log partitions and session rollups"""
+        session = self.db.session
+        totals = {}
+        
+        for table in partitions.raw_tables():
+            query = select(
+                table.c.user_id,
+                func.count(),
+                func.sum(case((table.c.is_anomaly, 1), else_=0)),
+                func.count(table.c.trust_score),
+                func.sum(table.c.trust_score),
+                func.sum(table.c.trust_score * table.c.trust_score),
+                func.max(table.c.timestamp)
+            ).group_by(table.c.user_id)
+            if user_ids is not None:
+                query = query.where(table.c.user_id.in_(user_ids))
+            for user_id, *counters, last_seen in session.execute(query):
+                _merge(totals, user_id, counters, last_seen)
+        
+        # Rollups keep per-session means; trust totals are rebuilt from them
+        rollup = partitions.rollup_model
+        query = select(
+            rollup.user_id,
+            func.sum(rollup.event_count),
+            func.sum(rollup.anomaly_count),
+            func.sum(case((rollup.trust_score_mean.isnot(None), rollup.event_count), else_=0)),
+            func.sum(rollup.trust_score_mean * rollup.event_count),
+            func.sum(rollup.trust_score_sumsq),
+            func.max(rollup.last_seen)
+        ).group_by(rollup.user_id)
+        if user_ids is not None:
+            query = query.where(rollup.user_id.in_(user_ids))
+        for user_id, *counters, last_seen in session.execute(query):
+            _merge(totals, user_id, counters, last_seen)
+        
+        return totals
+    
+    def rebuild(self, partitions, user_ids=None):
+        """Backfill: replace the stats rows (all, or just `user_ids`) with recomputed totals"""
+        table = self.stats_model.__table__
+        session = self.db.session
+        try:
+            totals = self.expected_totals(partitions, user_ids)
+            delete = table.delete()
+            if user_ids is not None:
+                delete = delete.where(table.c.user_id.in_(user_ids))
+            session.execute(delete)
+            
+            now = datetime.utcnow()
+            rows = [dict(total, user_id=user_id, updated_at=now) for user_id, total in totals.items()]
+            if rows:
+                session.execute(table.insert(), rows)
+            session.commit()
+            return len(rows)
+        except Exception as e:
+            session.rollback()
+            print(f"Error rebuilding behavior stats: {e}")
+            raise
+    
+    def check(self, partitions, rel_tol=1e-6):
+        """Users whose stored counters disagree with the logs, as {user_id: {field: (stored, expected)}}"""
+        expected = self.expected_totals(partitions)
+        stored = {
+            row.user_id: {field: getattr(row, field) for field in COUNTERS + ['last_seen']}
+            for row in self.db.session.execute(select(self.stats_model)).scalars()
+        }
+        
+        mismatches = {}
+        empty = dict(dict.fromkeys(COUNTERS, 0), last_seen=None)
+        for user_id in set(expected) | set(stored):
+            actual = stored.get(user_id, empty)
+            wanted = expected.get(user_id, empty)
+            diff = {}
+            for field in COUNTERS + ['last_seen']:
+                a, b = actual[field], wanted[field]
+                if isinstance(a, float) or isinstance(b, float):
+                    same = math.isclose(a, b, rel_tol=rel_tol, abs_tol=rel_tol)
+                else:
+                    same = a == b
+                if not same:
+                    diff[field] = (a, b)
+            if diff:
+                mismatches[user_id] = diff
+        return mismatches
\ No newline at end of file
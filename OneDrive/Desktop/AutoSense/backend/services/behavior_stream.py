@@ -0,0 +1,250 @@
+from collections import deque
+import json
+import threading
+import time
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+def parse_frame(text, max_events=500):
+    """Events of one upstream frame: {"type": "events", "seq": n, "events": [...]}, or a bare array"""
+    try:
+        frame = json.loads(text)
+    except (TypeError, ValueError):
+        raise ValueError('Frame is not valid JSON')
+    
+    if isinstance(frame, list):
+        frame = {'type': 'events', 'events': frame}
+    if not isinstance(frame, dict) or frame.get('type') != 'events':
+        raise ValueError("Frame type must be 'events'")
+    
+    events = frame.get('events')
+    if not isinstance(events, list) or not events or not all(isinstance(event, dict) for event in events):
+        raise ValueError('Events array required')
+    if len(events) > max_events:
+        raise ValueError(f"Frame exceeds {max_events} events")
+    return frame.get('seq'), events
+
+class StreamChannel:
+    """Downstream messages waiting for one open connection"""
+    __slots__ = ('user_id', 'jti', 'expires_at', 'outbox', 'closed', 'dropped')
+    
+    def __init__(self, user_id, jti, expires_at, queue_size):
+        self.user_id = user_id
+        self.jti = jti
+        self.expires_at = expires_at
+        self.outbox = deque(maxlen=queue_size)  # a slow client loses its oldest messages
+        self.closed = False
+        self.dropped = 0
+    
+    def push(self, message):
+        if len(self.outbox) == self.outbox.maxlen:
+            self.dropped += 1
+        self.outbox.append(message)
+    
+    def drain(self):
+        messages = []
+        while self.outbox:
+            messages.append(self.outbox.popleft())
+        return messages
+
+class BehaviorStreamHub:
+    """Persistent behavior channels: event batches up, trust updates and logouts down.
+    
+    A client authenticates once with its access token (the first frame on a
+    WebSocket) or a StreamTickets ticket (the SSE fallback), then streams
+    framed event batches instead of POSTing each sample. Every frame is
+    handed to `ingest(user_id, jti, events)` and answered with its trust
+    update. `terminate(user_id, ..., jti=jti)` pushes a logout to the open
+    channels of that token (every channel of the user without a jti), so the
+    client is told at once instead of on its next poll; tokens
+    revoked by other workers (`is_revoked`) and expired tokens close the
+    channel within `poll_interval` seconds. Connections are plain objects
+    with receive(timeout)/send/close, as flask-sock provides; on one node,
+    10k concurrent streams need an async worker such as gevent.
+    """
+    
+    def __init__(self, ingest, authenticate, is_revoked, max_events=500, queue_size=64,
+                 poll_interval=0.5, heartbeat_interval=20.0, auth_timeout=10.0):
+        self.ingest = ingest
+        self.authenticate = authenticate
+        self.is_revoked = is_revoked
+        self.max_events = max_events
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.auth_timeout = auth_timeout
+        self.stats = {
+            'connections': 0,
+            'opened': 0,
+            'frames': 0,
+            'events': 0,
+            'bad_frames': 0,
+            'pushed': 0,
+            'logouts': 0,
+            'dropped': 0
+        }
+        self._channels = {}  # user_id -> set of StreamChannel
+        self._lock = threading.Lock()
+    
+    def open(self, user_id, jti, expires_at=None):
+        """Register a connection of an authenticated user"""
+        channel = StreamChannel(user_id, jti, expires_at, self.queue_size)
+        with self._lock:
+            self._channels.setdefault(user_id, set()).add(channel)
+            self.stats['opened'] += 1
+            self.stats['connections'] += 1
+        return channel
+    
+    def close(self, channel):
+        """Unregister a connection"""
+        channel.closed = True
+        with self._lock:
+            channels = self._channels.get(channel.user_id)
+            if channels is not None and channel in channels:
+                channels.discard(channel)
+                if not channels:
+                    del self._channels[channel.user_id]
+                self.stats['connections'] -= 1
+                self.stats['dropped'] += channel.dropped
+    
+    def publish(self, user_id, message, skip=None, jti=None):
+        """Queue a message on every open channel of the user (of token `jti`, if given); returns how many got it"""
+        with self._lock:
+            channels = list(self._channels.get(user_id, ()))
+        delivered = 0
+        for channel in channels:
+            if channel is not skip and (jti is None or channel.jti == jti):
+                channel.push(message)
+                delivered += 1
+        self.stats['pushed'] += delivered
+        return delivered
+    
+    def terminate(self, user_id, reason, trust_score=None, jti=None):
+        """Tell the open channels of the ended session's token `jti` (all of the user's without one) that it has ended"""
+        message = {'type': 'logout', 'action': 'logout', 'reason': reason, 'trust_score': trust_score}
+        if self.publish(user_id, message, jti=jti):
+            self.stats['logouts'] += 1
+    
+    def handle_frame(self, channel, text):
+        """Ingest one upstream frame; returns the reply for the sender"""
+        try:
+            seq, events = parse_frame(text, self.max_events)
+        except ValueError as e:
+            self.stats['bad_frames'] += 1
+            return {'type': 'error', 'error': str(e)}
+        
+        self.stats['frames'] += 1
+        self.stats['events'] += len(events)
+        try:
+            return {'type': 'trust', 'seq': seq, **self.ingest(channel.user_id, channel.jti, events)}
+        except Exception as e:
+            print(f"Error ingesting streamed events: {e}")
+            return {'type': 'error', 'seq': seq, 'error': 'Events could not be recorded'}
+    
+    def serve(self, ws):
+        """Run one WebSocket connection until it closes or its session ends"""
+        channel = self._accept(ws)
+        if channel is None:
+            return
+        try:
+            ws.send(json.dumps({'type': 'ready', 'max_events': self.max_events}))
+            while not channel.closed:
+                try:
+                    text = ws.receive(timeout=self.poll_interval)
+                except Exception:
+                    break  # client went away
+                
+                if text is not None:
+                    ws.send(json.dumps(self.handle_frame(channel, text)))
+                if self._flush(channel, lambda message: ws.send(json.dumps(message))):
+                    break
+        finally:
+            self.close(channel)
+            try:
+                ws.close()
+            except Exception:
+                pass
+    
+    def sse(self, channel):
+        """Server-sent events for a channel opened by the SSE fallback route"""
+        try:
+            yield f"event: ready\ndata: {json.dumps({'type': 'ready'})}\n\n"
+            last_sent = time.monotonic()
+            while not channel.closed:
+                time.sleep(self.poll_interval)
+                lines = []
+                ended = self._flush(channel, lambda message: lines.append(
+                    f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+                ))
+                if not lines and time.monotonic() - last_sent >= self.heartbeat_interval:
+                    # Comment lines keep proxies from closing an idle stream
+                    lines.append(': ping\n\n')
+                if lines:
+                    last_sent = time.monotonic()
+                    yield ''.join(lines)
+                if ended:
+                    break
+        finally:
+            self.close(channel)
+    
+    def _accept(self, ws):
+        # The first frame carries the access token: {"type": "auth", "token": "..."}
+        try:
+            text = ws.receive(timeout=self.auth_timeout)
+            token = json.loads(text).get('token') if text else None
+            user_id, jti, expires_at = self.authenticate(token)
+        except Exception:
+            try:
+                ws.send(json.dumps({'type': 'error', 'error': 'Authentication required'}))
+                ws.close()
+            except Exception:
+                pass
+            return None
+        return self.open(user_id, jti, expires_at)
+    
+    def _flush(self, channel, send):
+        # Sends queued messages; True once the channel must close
+        ended = False
+        for message in channel.drain():
+            send(message)
+            ended = ended or message['type'] == 'logout'
+        if not ended and self.is_revoked(channel.jti):
+            send({'type': 'logout', 'action': 'logout', 'reason': 'Session ended'})
+            ended = True
+        elif not ended and channel.expires_at is not None and time.time() >= channel.expires_at:
+            send({'type': 'expired', 'action': 'reauthenticate'})
+            ended = True
+        return ended
+
+class StreamTickets:
+    """Short-lived signed tickets that open an SSE stream in place of an access token.
+    
+    EventSource cannot send an Authorization header, so the client trades its
+    access token (sent in the header) for a ticket and puts only the ticket in
+    the stream URL. A ticket names the user and the access token's jti, so
+    revoking the token still ends the stream; it expires after `ttl` seconds
+    and is accepted nowhere else, so a URL that leaks into logs or browser
+    history is of no use.
+    """
+    
+    def __init__(self, secret, ttl=30):
+        self.serializer = URLSafeTimedSerializer(secret, salt='authsense-behavior-stream')
+        self.ttl = ttl
+    
+    def issue(self, user_id, jti, expires_at=None):
+        return self.serializer.dumps([user_id, jti, expires_at])
+    
+    def redeem(self, ticket):
+        """(user_id, jti, expiry) of a ticket; raises ValueError if it is forged or expired"""
+        try:
+            user_id, jti, expires_at = self.serializer.loads(ticket or '', max_age=self.ttl)
+        except BadSignature:
+            raise ValueError('Invalid or expired stream ticket')
+        return user_id, jti, expires_at
+
+def make_socket_server(app):
+    """flask-sock's Sock for the app, or None when flask-sock is not installed (WebSocket streams are then off)"""
+    try:
+        from flask_sock import Sock
+    except ImportError:
+        return None
+    return Sock(app)
\ No newline at end of file
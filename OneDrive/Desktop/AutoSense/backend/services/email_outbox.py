@@ -0,0 +1,271 @@
+from datetime import datetime, timedelta
+import json
+import queue
+import random
+import smtplib
+import threading
+import uuid
+from flask_mail import Message
+from sqlalchemy import select
+
+def alert_email(user_id, user_email, session_id, location, behavior_data, reason, timestamp=None):
+    """Outbox columns for a security alert email"""
+    body = f"""
+        Hello,
+        
+        We detected abnormal behavior during your recent AuthSense session.
+        
+        📍 Location: {location}
+        🧠 Trust Score: {behavior_data.get('trust_score', 'N/A')}%
+        ⚡ Detected Issue: {reason}
+        
+        Session ID: {session_id}
+        Timestamp: {(timestamp or datetime.now()).isoformat()}
+        
+        Your account was automatically logged out for safety.
+        
+        — AuthSense+ Security AI
+        """
+    return {
+        'kind': 'alert',
+        'user_id': user_id,
+        'recipient': user_email,
+        'subject': "⚠️ AuthSense+ Security Alert — Suspicious Session Activity",
+        'body': body,
+        'attachment_name': 'session_log.json',
+        'attachment': json.dumps(behavior_data, indent=2)
+    }
+
+def is_permanent(error):
+    """SMTP errors that retrying will not fix (rejected sender, recipients or content)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, (smtplib.SMTPSenderRefused, smtplib.SMTPDataError)):
+        return 500 <= error.smtp_code < 600
+    return False
+
+class OutboxMailer:
+    """Delivers emails from the outbox table in the background.
+    
+    `enqueue` only adds an outbox row to the caller's session, so the email
+    commits (or rolls back) together with whatever triggered it; `notify`
+    after the commit wakes the dispatcher. The dispatcher claims due rows in
+    batches (a claim lapses after `claim_seconds`, so rows held by a crashed
+    process are picked up again) and hands them to `workers` threads. Each
+    worker keeps its SMTP connection open between messages and closes it
+    after `idle_timeout` seconds without work. Failed deliveries are retried
+    with jittered exponential backoff until `max_attempts`; permanent SMTP
+    rejections fail straight away.
+    """
+    
+    def __init__(self, app, db, outbox_model, connect, workers=2, batch_size=20, poll_interval=5.0,
+                 max_attempts=8, backoff_base=30.0, backoff_max=3600.0, claim_seconds=300, idle_timeout=60.0):
+        self.app = app
+        self.db = db
+        self.outbox_model = outbox_model
+        self.connect = connect
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.claim_seconds = claim_seconds
+        self.idle_timeout = idle_timeout
+        self.stats = {'enqueued': 0, 'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'connections': 0}
+        self._queue = queue.Queue()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._threads = []
+    
+    def enqueue(self, columns):
+        """Add an email to the outbox in the caller's transaction (caller commits)"""
+        message = self.outbox_model(status='pending', attempts=0, next_attempt_at=datetime.now(), **columns)
+        self.db.session.add(message)
+        self._count('enqueued')
+        return message
+    
+    def notify(self):
+        """Wake the dispatcher once new outbox rows are committed"""
+        self.start()
+        self._wake.set()
+    
+    def start(self):
+        """Start the dispatcher and worker threads if they are not running yet"""
+        with self._start_lock:
+            if self._threads and all(thread.is_alive() for thread in self._threads):
+                return
+            self._stop_event.clear()
+            self._threads = [threading.Thread(target=self._dispatch_loop, name='outbox-dispatcher', daemon=True)]
+            self._threads += [
+                threading.Thread(target=self._work, name=f"outbox-worker-{index}", daemon=True)
+                for index in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+    
+    def stop(self, timeout=10.0):
+        """Stop the threads; claimed but unsent messages are retried after their claim lapses"""
+        self._stop_event.set()
+        self._wake.set()
+        if not self._threads:
+            return
+        for _ in range(self.workers):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def dispatch(self, now=None):
+        """Claim due outbox rows and queue them for the workers; returns how many"""
+        limit = self.batch_size - self._queue.qsize()
+        if limit <= 0:
+            return 0
+        
+        now = now or datetime.now()
+        table = self.outbox_model.__table__
+        token = str(uuid.uuid4())
+        due = (
+            ((table.c.status == 'pending') & (table.c.next_attempt_at <= now))
+            | ((table.c.status == 'sending') & (table.c.claimed_until < now))
+        )
+        with self.app.app_context():
+            try:
+                ids = select(table.c.id).where(due).order_by(table.c.next_attempt_at).limit(limit)
+                self.db.session.execute(
+                    table.update()
+                    .where(table.c.id.in_(ids.scalar_subquery()))
+                    .where(due)
+                    .values(
+                        status='sending',
+                        claim_token=token,
+                        claimed_until=now + timedelta(seconds=self.claim_seconds),
+                        attempts=table.c.attempts + 1
+                    )
+                )
+                rows = self.db.session.execute(select(table).where(table.c.claim_token == token)).mappings().all()
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                print(f"Error claiming outbox emails: {e}")
+                return 0
+        
+        for row in rows:
+            self._queue.put(dict(row))
+        self._count('claimed', len(rows))
+        return len(rows)
+    
+    def drain(self):
+        """Deliver everything due now and wait for it; returns the number of messages handled"""
+        self.start()
+        handled = 0
+        while True:
+            claimed = self.dispatch()
+            self._queue.join()
+            if not claimed:
+                return handled
+            handled += claimed
+    
+    def _dispatch_loop(self):
+        while not self._stop_event.is_set():
+            if self.dispatch() < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+            else:
+                # A full batch was claimed; let the workers catch up first
+                self._stop_event.wait(0.05)
+    
+    def _work(self):
+        connection = None
+        while True:
+            try:
+                message = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                connection = self._close(connection)
+                continue
+            if message is None:
+                self._close(connection)
+                self._queue.task_done()
+                return
+            
+            with self.app.app_context():
+                try:
+                    connection = self._send(connection, message)
+                    self._record(message)
+                except Exception as e:
+                    connection = self._close(connection)
+                    self._record(message, e)
+            self._queue.task_done()
+    
+    def _send(self, connection, message):
+        """Send over the worker's connection, reconnecting once if it went stale; returns the connection"""
+        mail = Message(
+            subject=message['subject'],
+            sender=self.app.config.get('MAIL_USERNAME'),
+            recipients=[message['recipient']],
+            body=message['body']
+        )
+        if message['attachment'] is not None:
+            mail.attach(filename=message['attachment_name'], content_type='application/json', data=message['attachment'])
+        
+        if connection is not None:
+            try:
+                connection.send(mail)
+                return connection
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                connection = self._close(connection)
+        
+        connection = self.connect().__enter__()
+        self._count('connections')
+        connection.send(mail)
+        return connection
+    
+    def _close(self, connection):
+        if connection is not None:
+            try:
+                connection.__exit__(None, None, None)
+            except Exception:
+                pass
+        return None
+    
+    def _record(self, message, error=None):
+        """Write a delivery outcome back to the claimed row"""
+        table = self.outbox_model.__table__
+        now = datetime.now()
+        if error is None:
+            values = {'status': 'sent', 'sent_at': now, 'last_error': None}
+            outcome = 'sent'
+        elif is_permanent(error) or message['attempts'] >= self.max_attempts:
+            values = {'status': 'failed', 'last_error': str(error)}
+            outcome = 'failed'
+        else:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (message['attempts'] - 1))
+            values = {
+                'status': 'pending',
+                'next_attempt_at': now + timedelta(seconds=delay * random.uniform(0.5, 1.0)),
+                'last_error': str(error)
+            }
+            outcome = 'retried'
+        
+        try:
+            self.db.session.execute(
+                table.update()
+                .where(table.c.id == message['id'])
+                .where(table.c.claim_token == message['claim_token'])
+                .values(claim_token=None, claimed_until=None, **values)
+            )
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            print(f"Error recording outbox email {message['id']}: {e}")
+            return
+        
+        if error is not None:
+            print(f"Error sending {message['kind']} email {message['id']} ({outcome}): {error}")
+        self._count(outcome)
+    
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
\ No newline at end of file
@@ -0,0 +1,128 @@
+import numpy as np
+
+class CompiledIsolationForest:
+    """Fitted IsolationForest (plus optional StandardScaler) flattened into NumPy arrays.
+    
+    Every tree is concatenated into flat per-node arrays (feature, threshold,
+    left/right child and the path length a sample ending in that node adds).
+    Scoring walks all trees for all rows at once, one vectorized step per tree
+    level, instead of calling into sklearn once per tree. Results are identical
+    to `model.score_samples(scaler.transform(X))`.
+    """
+    
+    def __init__(self, feature, threshold, left, right, leaf_value, roots,
+                 max_depth, denominator, mean=None, scale=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        # Interleaved (right, left) pairs so the next node is children[2 * node + went_left]
+        self.children = np.stack([right, left], axis=1).ravel()
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.denominator = denominator
+        self.mean = mean
+        self.scale = scale
+    
+    @classmethod
+    def compile(cls, model, scaler=None):
+        """Flatten a fitted IsolationForest and StandardScaler"""
+        features, thresholds, lefts, rights, leaf_values, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        
+        for estimator, estimator_features in zip(model.estimators_, model.estimators_features_):
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n_nodes)
+            
+            # Node depth counted the way sklearn does (root = 1); children always follow parents
+            depths = np.ones(n_nodes)
+            for node in range(n_nodes):
+                if not is_leaf[node]:
+                    depths[tree.children_left[node]] = depths[node] + 1
+                    depths[tree.children_right[node]] = depths[node] + 1
+            max_depth = max(max_depth, int(depths.max()) - 1)
+            
+            # Leaves point at themselves so finished rows stay put
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            features.append(np.where(is_leaf, 0, np.asarray(estimator_features)[np.maximum(tree.feature, 0)]))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            leaf_values.append(depths + average_path_length(tree.n_node_samples) - 1.0)
+            roots.append(offset)
+            offset += n_nodes
+        
+        denominator = len(model.estimators_) * average_path_length(np.array([model._max_samples]))[0]
+        
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            leaf_value=np.concatenate(leaf_values),
+            roots=np.array(roots, dtype=np.intp),
+            max_depth=max_depth,
+            denominator=denominator,
+            mean=None if scaler is None else scaler.mean_,
+            scale=None if scaler is None else scaler.scale_
+        )
+    
+    def score_samples(self, X):
+        """Anomaly scores for raw (unscaled) rows, same as sklearn's score_samples"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        
+        # StandardScaler.transform, then the float32 cast sklearn's trees apply
+        if self.mean is not None:
+            X = X - self.mean
+        if self.scale is not None:
+            X = X / self.scale
+        X = X.astype(np.float32)
+        
+        # Walk every tree for every row, one level per step
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        nodes = np.repeat(self.roots[None, :], n_rows, axis=0)
+        for _ in range(self.max_depth):
+            go_left = flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_left]
+        
+        # Accumulate tree by tree (cumsum is sequential, like sklearn's loop)
+        depths = np.cumsum(self.leaf_value[nodes], axis=1)[:, -1]
+        
+        if self.denominator == 0:
+            return np.full_like(depths, -0.5)
+        return -(2 ** (-(depths / self.denominator)))
+    
+    def trust_scores(self, X):
+        """Trust scores (0-100) for raw rows"""
+        return np.clip((self.score_samples(X) + 2) * 25, 0, 100)
+
+def average_path_length(n_samples_leaf):
+    """Average path length of an unsuccessful BST search over n samples (as in sklearn)"""
+    n_samples_leaf = np.asarray(n_samples_leaf, dtype=np.float64)
+    result = np.zeros(n_samples_leaf.shape)
+    
+    mask_1 = n_samples_leaf <= 1
+    mask_2 = n_samples_leaf == 2
+    not_mask = ~np.logical_or(mask_1, mask_2)
+    
+    result[mask_2] = 1.0
+    result[not_mask] = (
+        2.0 * (np.log(n_samples_leaf[not_mask] - 1.0) + np.euler_gamma)
+        - 2.0 * (n_samples_leaf[not_mask] - 1.0) / n_samples_leaf[not_mask]
+    )
+    return result
+
+def compiled_forest(model_data):
+    """Compiled engine for a stored model entry, built on first use"""
+    engine = model_data.get('engine')
+    if engine is None:
+        engine = CompiledIsolationForest.compile(model_data['model'], model_data['scaler'])
+        model_data['engine'] = engine
+    return engine
\ No newline at end of file
@@ -0,0 +1,67 @@
+import numpy as np
+
+# Digraph latency bucket edges in milliseconds (down-to-down between consecutive keys)
+DIGRAPH_EDGES = np.array([50, 100, 150, 200, 300, 500, 1000], dtype=float)
+
+KEYSTROKE_FEATURES = [
+    'ks_dwell_mean', 'ks_dwell_std',
+    'ks_flight_mean', 'ks_flight_std',
+    'ks_digraph_mean', 'ks_digraph_std',
+    'ks_keys_per_sec', 'ks_burst_keys_per_sec',
+    'ks_digraph_lt50', 'ks_digraph_50_100', 'ks_digraph_100_150', 'ks_digraph_150_200',
+    'ks_digraph_200_300', 'ks_digraph_300_500', 'ks_digraph_500_1000', 'ks_digraph_ge1000'
+]
+
+def keystroke_timings(keystroke_data):
+    """Key-down and key-up timestamps (ms) as float arrays, ordered by key-down.
+    
+    Expects `{'down': [...], 'up': [...]}` with one entry per key press, as
+    sent by the client. Missing or malformed data yields empty arrays.
+    """
+    if not isinstance(keystroke_data, dict):
+        return np.empty(0), np.empty(0)
+    
+    try:
+        down = np.asarray(keystroke_data.get('down', []), dtype=float)
+        up = np.asarray(keystroke_data.get('up', []), dtype=float)
+    except (TypeError, ValueError):
+        return np.empty(0), np.empty(0)
+    
+    n_keys = min(down.shape[0], up.shape[0]) if down.ndim == up.ndim == 1 else 0
+    down, up = down[:n_keys], up[:n_keys]
+    
+    order = np.argsort(down, kind='stable')
+    return down[order], up[order]
+
+def extract_keystroke_features(keystroke_data):
+    """Dwell, flight, digraph and typing-speed features for one event window"""
+    down, up = keystroke_timings(keystroke_data)
+    features = np.zeros(len(KEYSTROKE_FEATURES))
+    if down.shape[0] < 2:
+        return features
+    
+    dwell = np.maximum(up - down, 0.0)
+    flight = down[1:] - up[:-1]  # negative when keys overlap (rollover)
+    digraph = np.diff(down)
+    
+    duration = up.max() - down[0]
+    median_digraph = np.median(digraph)
+    
+    features[0:8] = [
+        dwell.mean(), dwell.std(),
+        flight.mean(), flight.std(),
+        digraph.mean(), digraph.std(),
+        down.shape[0] * 1000.0 / duration if duration > 0 else 0.0,
+        1000.0 / median_digraph if median_digraph > 0 else 0.0
+    ]
+    
+    # Share of digraphs in each latency bucket
+    buckets = np.searchsorted(DIGRAPH_EDGES, digraph, side='right')
+    features[8:] = np.bincount(buckets, minlength=DIGRAPH_EDGES.shape[0] + 1) / digraph.shape[0]
+    
+    return features
+
+def has_keystroke_timings(behavior_event):
+    """Whether an event carries raw key timings to extract features from"""
+    down, _ = keystroke_timings(behavior_event.get('keystroke_data'))
+    return down.shape[0] >= 2
\ No newline at end of file
@@ -0,0 +1,271 @@
+from datetime import datetime, timedelta
+from sqlalchemy import Column, Index, MetaData, Table, case, func, inspect, literal, select, text, union_all
+
+ROLLUP_FEATURES = ['keystroke_speed', 'mouse_speed', 'idle_time', 'cursor_path_length']
+
+def period_start(moment):
+    """Start of the (monthly) partition period containing `moment`"""
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def next_period(start):
+    return period_start(start + timedelta(days=32))
+
+class BehaviorLogPartitions:
+    """Time-partitioned behavior logs with rollup-based retention.
+    
+    On Postgres, when behavior_logs was created as a partitioned parent
+    (PARTITION BY RANGE (timestamp)), monthly partitions are created ahead of
+    time and old ones dropped with a single DDL statement. Elsewhere (SQLite,
+    plain Postgres tables) the live table is rotated: rows from previous
+    periods are copied into behavior_logs_p<YYYYMM> (one table per period) and
+    deleted from it in one transaction, so the table and indexes writes touch
+    stay small. Current-period rows, which the log writer may be inserting
+    concurrently, are never touched.
+    
+    Retention rolls every partition that ended before the cutoff up into
+    per-session BehaviorRollup rows and then drops it. `history` and
+    `user_stats` read raw partitions and rollups together, so callers do not
+    care where an event currently lives.
+    """
+    
+    def __init__(self, db, log_model, rollup_model, partition_model):
+        self.db = db
+        self.log_model = log_model
+        self.rollup_model = rollup_model
+        self.partition_model = partition_model
+        self.table_name = log_model.__tablename__
+    
+    @property
+    def native(self):
+        """Whether the live table is a native Postgres partitioned parent"""
+        if self.db.engine.dialect.name != 'postgresql':
+            return False
+        return self.db.session.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :name"
+        ), {'name': self.table_name}).first() is not None
+    
+    def partition_name(self, start):
+        return f"{self.table_name}_p{start:%Y%m}"
+    
+    def maintain(self, retention_days, now=None):
+        """Create or rotate partitions, then expire the ones past retention"""
+        now = now or datetime.now()
+        created = self.ensure_partitions(now)
+        expired = self.expire(now - timedelta(days=retention_days))
+        return {'created': created, 'expired': expired}
+    
+    def ensure_partitions(self, now):
+        """Partitions for the current and next period (native) or a rotation (otherwise)"""
+        if not self.native:
+            return self.rotate(now)
+        
+        created = []
+        start = period_start(now)
+        for _ in range(2):
+            end = next_period(start)
+            name = self.partition_name(start)
+            if self.db.session.get(self.partition_model, name) is None:
+                self.db.session.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {self.table_name} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+                self.db.session.add(self.partition_model(name=name, range_start=start, range_end=end, native=True))
+                created.append(name)
+            start = end
+        self.db.session.commit()
+        return created
+    
+    def rotate(self, now):
+        """Move rows from before the current period into their periods' archives; returns the archive names"""
+        live = self.log_model.__table__
+        session = self.db.session
+        cutoff = period_start(now)
+        first_seen, max_id = session.execute(
+            select(func.min(live.c.timestamp), func.max(live.c.id)).where(live.c.timestamp < cutoff)
+        ).one()
+        if first_seen is None:
+            return []
+        
+        columns = [column.name for column in live.columns]
+        rotated = []
+        try:
+            start = period_start(first_seen)
+            while start < cutoff:
+                end = next_period(start)
+                # Bounded by id too, so rows inserted meanwhile are neither copied nor deleted
+                moved = (live.c.timestamp >= start) & (live.c.timestamp < end) & (live.c.id <= max_id)
+                range_start, range_end = session.execute(
+                    select(func.min(live.c.timestamp), func.max(live.c.timestamp)).where(moved)
+                ).one()
+                
+                if range_start is not None:
+                    name = self.partition_name(start)
+                    archive = self._archive(name)
+                    session.execute(archive.insert().from_select(columns, select(*live.columns).where(moved)))
+                    session.execute(live.delete().where(moved))
+                    
+                    partition = session.get(self.partition_model, name)
+                    if partition is None:
+                        session.add(self.partition_model(name=name, range_start=range_start, range_end=range_end))
+                    else:
+                        partition.range_start = min(partition.range_start, range_start)
+                        partition.range_end = max(partition.range_end, range_end)
+                    rotated.append(name)
+                start = end
+            
+            session.commit()
+            return rotated
+        except Exception as e:
+            session.rollback()
+            print(f"Error rotating behavior logs: {e}")
+            return []
+    
+    def expire(self, cutoff):
+        """Roll up and drop every partition that ended before `cutoff`"""
+        session = self.db.session
+        expired = []
+        partitions = self.partition_model.query.filter(self.partition_model.range_end <= cutoff).all()
+        
+        for partition in partitions:
+            name = partition.name
+            try:
+                session.execute(self._rollup_insert(self._table(name), name))
+                if partition.native:
+                    session.execute(text(f"ALTER TABLE {self.table_name} DETACH PARTITION {name}"))
+                session.execute(text(f"DROP TABLE {name}"))
+                session.delete(partition)
+                session.commit()
+                expired.append(name)
+            except Exception as e:
+                session.rollback()
+                print(f"Error expiring behavior log partition {name}: {e}")
+        return expired
+    
+    def history(self, user_id, limit=100):
+        """Newest-first events for a user: raw rows from every partition, then session rollups"""
+        log_model = self.log_model
+        archives = self._archive_tables()
+        
+        if not archives:
+            logs = log_model.query.filter_by(user_id=user_id).order_by(
+                log_model.timestamp.desc()
+            ).limit(limit).all()
+        else:
+            columns = [column.name for column in log_model.__table__.columns]
+            raw = union_all(*[
+                select(*[table.c[column] for column in columns])
+                .where(table.c.user_id == user_id)
+                .order_by(table.c.timestamp.desc())
+                .limit(limit)
+                .subquery()
+                .select()
+                for table in [log_model.__table__] + archives
+            ]).subquery()
+            rows = self.db.session.execute(
+                select(raw).order_by(raw.c.timestamp.desc()).limit(limit)
+            ).mappings().all()
+            logs = [log_model(**row) for row in rows]
+        
+        if len(logs) < limit:
+            logs += self.rollup_model.query.filter_by(user_id=user_id).order_by(
+                self.rollup_model.last_seen.desc()
+            ).limit(limit - len(logs)).all()
+        return logs
+    
+    def user_stats(self, user_id):
+        """Event count, anomaly count and mean trust score across raw partitions and rollups"""
+        event_count, anomaly_count, trust_total, trust_count = 0, 0, 0.0, 0
+        
+        for table in self.raw_tables():
+            events, anomalies, total, scored = self.db.session.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.sum(case((table.c.is_anomaly, 1), else_=0)), 0),
+                    func.coalesce(func.sum(table.c.trust_score), 0.0),
+                    func.count(table.c.trust_score)
+                ).where(table.c.user_id == user_id)
+            ).one()
+            event_count += events
+            anomaly_count += anomalies
+            trust_total += total
+            trust_count += scored
+        
+        rollup = self.rollup_model
+        events, anomalies, total = self.db.session.execute(
+            select(
+                func.coalesce(func.sum(rollup.event_count), 0),
+                func.coalesce(func.sum(rollup.anomaly_count), 0),
+                func.coalesce(func.sum(rollup.trust_score_mean * rollup.event_count), 0.0)
+            ).where(rollup.user_id == user_id)
+        ).one()
+        event_count += events
+        anomaly_count += anomalies
+        trust_total += total
+        trust_count += events
+        
+        return {
+            'event_count': event_count,
+            'anomaly_count': anomaly_count,
+            'average_trust_score': trust_total / trust_count if trust_count else None
+        }
+    
+    def raw_tables(self):
+        """Every table holding raw rows: the live table plus rotated archives"""
+        return [self.log_model.__table__] + self._archive_tables()
+    
+    def _archive_tables(self):
+        """Rotated tables still holding raw rows (native partitions are read through the parent)"""
+        names = self.db.session.execute(
+            select(self.partition_model.name)
+            .where(self.partition_model.native.is_(False))
+            .order_by(self.partition_model.range_end.desc())
+        ).scalars().all()
+        return [self._table(name) for name in names]
+    
+    def _table(self, name):
+        """Core table for a partition, with the live table's columns"""
+        return self.log_model.__table__.to_metadata(MetaData(), name=name)
+    
+    def _archive(self, name):
+        """Archive table for a period, created with the live table's indexes (under its own names) if missing"""
+        connection = self.db.session.connection()
+        if inspect(connection).has_table(name):
+            return self._table(name)
+        
+        # Archives hold history only: the live columns without foreign keys, and
+        # the live indexes under the archive's own names (index names are global)
+        live = self.log_model.__table__
+        archive = Table(name, MetaData(), *[
+            Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+            for column in live.columns
+        ])
+        for index in live.indexes:
+            Index(f"{index.name}_{name[len(self.table_name) + 1:]}",
+                  *[archive.c[column.name] for column in index.columns])
+        archive.create(connection)
+        return archive
+    
+    def _rollup_insert(self, table, name):
+        """INSERT ... SELECT of one partition's per-session aggregates"""
+        rollup = self.rollup_model.__table__
+        aggregates = {
+            'user_id': table.c.user_id,
+            'session_id': table.c.session_id,
+            'partition_name': literal(name),
+            'first_seen': func.min(table.c.timestamp),
+            'last_seen': func.max(table.c.timestamp),
+            'event_count': func.count(),
+            'anomaly_count': func.sum(case((table.c.is_anomaly, 1), else_=0)),
+            'trust_score_mean': func.avg(table.c.trust_score),
+            'trust_score_min': func.min(table.c.trust_score),
+            'trust_score_sumsq': func.sum(table.c.trust_score * table.c.trust_score),
+            'created_at': literal(datetime.utcnow())
+        }
+        for feature in ROLLUP_FEATURES:
+            aggregates[f"{feature}_mean"] = func.avg(table.c[feature])
+        
+        return rollup.insert().from_select(
+            list(aggregates),
+            select(*aggregates.values()).group_by(table.c.user_id, table.c.session_id)
+        )
\ No newline at end of file
@@ -0,0 +1,125 @@
+import queue
+import threading
+import time
+
+class BehaviorLogWriter:
+    """Write-behind buffer for BehaviorLog rows.
+    
+    Rows are queued by the request thread and written in bulk by a background
+    flusher once `batch_size` rows are waiting or `flush_interval` seconds have
+    passed. The queue is bounded: when it is full `submit` blocks for up to
+    `put_timeout` seconds and then hands the row back so the caller can write
+    it synchronously instead of dropping it. A batch the callback fails on is
+    kept and retried ahead of newer rows on the next flush; beyond
+    `max_retry_rows` the oldest of those rows are dropped and counted.
+    """
+    
+    def __init__(self, flush_callback, batch_size=200, flush_interval=1.0,
+                 max_queue_size=10000, put_timeout=0.5, max_retry_rows=10000):
+        self.flush_callback = flush_callback
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retry_rows = max_retry_rows
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.stats = {'queued': 0, 'flushed': 0, 'failed': 0, 'rejected': 0, 'dropped': 0}
+        self._retry_rows = []
+        self._stop_event = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+    
+    def start(self):
+        """Start the background flusher if it is not running yet"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name='behavior-log-writer', daemon=True)
+                self._thread.start()
+    
+    def submit(self, row):
+        """Queue one row; returns False if the buffer stayed full"""
+        return not self.submit_many([row])
+    
+    def submit_many(self, rows):
+        """Queue rows; returns the rows that could not be queued"""
+        if self._stop_event.is_set():
+            return list(rows)
+        self.start()
+        
+        for index, row in enumerate(rows):
+            try:
+                self.queue.put(row, timeout=self.put_timeout)
+            except queue.Full:
+                # Backpressure: hand whatever did not fit back to the caller
+                self._count(queued=index, rejected=len(rows) - index)
+                return list(rows[index:])
+        self._count(queued=len(rows))
+        return []
+    
+    def flush(self):
+        """Write everything currently queued"""
+        with self._flush_lock:
+            while True:
+                rows = self._drain(self.batch_size)
+                if not rows or not self._write(rows):
+                    return
+    
+    def stop(self, timeout=10.0):
+        """Stop the flusher and write any rows still in the buffer"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+        
+        # Nothing will retry these once the writer is stopped
+        with self._flush_lock:
+            self._count(dropped=len(self._retry_rows) + self.queue.qsize())
+            self._retry_rows = []
+    
+    def _run(self):
+        while not self._stop_event.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            
+            # Wait until a full batch is queued or the interval elapses
+            while self.queue.qsize() < self.batch_size and not self._stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._stop_event.wait(min(remaining, 0.05))
+            
+            with self._flush_lock:
+                rows = self._drain(self.batch_size)
+                if rows:
+                    self._write(rows)
+    
+    def _drain(self, limit):
+        # Rows from a failed batch go first, so they are written in order
+        rows, self._retry_rows = self._retry_rows[:limit], self._retry_rows[limit:]
+        while len(rows) < limit:
+            try:
+                rows.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+    
+    def _write(self, rows):
+        try:
+            self.flush_callback(rows)
+        except Exception as e:
+            print(f"Error flushing behavior logs: {e}")
+            
+            # Keep the batch for the next flush, up to the retry bound
+            self._retry_rows = rows + self._retry_rows
+            overflow = max(0, len(self._retry_rows) - self.max_retry_rows)
+            del self._retry_rows[:overflow]
+            self._count(failed=len(rows), dropped=overflow)
+            return False
+        self._count(flushed=len(rows))
+        return True
+    
+    def _count(self, **counts):
+        # Request threads and the flusher both update stats: serialise them on the queue's own lock
+        with self.queue.mutex:
+            for key, count in counts.items():
+                self.stats[key] += count
\ No newline at end of file
@@ -0,0 +1,210 @@
+from collections import OrderedDict
+from datetime import datetime
+import json
+import pickle
+import threading
+import time
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+def model_upsert(model_class, dialect):
+    """ai_models insert-or-update on (user_id, model_type) for a sqlite or postgresql connection"""
+    table = model_class.__table__
+    insert = (sqlite_insert if dialect == 'sqlite' else postgresql_insert)(table)
+    return insert.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.model_type],
+        set_={column: insert.excluded[column] for column in ('model_data', 'features', 'updated_at')}
+    )
+
+class ModelCache:
+    """Thread-safe LRU cache bounded by entry count and approximate size in bytes"""
+    
+    def __init__(self, max_entries=1000, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the cached value and mark it most recently used, or None"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, value, size=0):
+        """Insert or replace a value, evicting least recently used entries"""
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            
+            while self.entries and (
+                len(self.entries) > self.max_entries
+                or (self.max_bytes is not None and self.total_bytes > self.max_bytes and len(self.entries) > 1)
+            ):
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+    
+    def pop(self, key):
+        """Drop a key from the cache"""
+        with self._lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry[1]
+    
+    def stats(self):
+        """Cache counters for sizing nodes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+class ModelStore:
+    """Per-user models persisted in the ai_models table, served from an LRU cache.
+    
+    Models are pickled into `AIModel.model_data` when trained and loaded lazily
+    on the first prediction for a user. Users without a stored model are
+    remembered for `negative_ttl` seconds so they do not hit the database on
+    every event; these negative entries live in their own LRU of
+    `max_missing_entries`, so they neither evict models nor count as model
+    cache hits. Cached models are revalidated against `updated_at` every
+    `revalidate_after` seconds, so a model retrained by another worker or by
+    the retrain command replaces the cached copy. For models every worker
+    updates in place, `merge(stored, local)` returns the model_data to keep
+    when the row changed under a local copy: it runs on save, with the row
+    locked, and when revalidation finds a newer row. `on_replace(user_id)` is
+    called whenever a different model takes over: on save, and when
+    revalidation picks up a row saved elsewhere (a training job in another
+    worker, the retrain command).
+    """
+    
+    def __init__(self, db, model_class, model_type='isolation_forest',
+                 max_entries=1000, max_bytes=None, max_missing_entries=10000, negative_ttl=60, revalidate_after=30, merge=None,
+                 on_replace=None):
+        self.db = db
+        self.model_class = model_class
+        self.model_type = model_type
+        self.merge = merge
+        self.on_replace = on_replace
+        self.negative_ttl = negative_ttl
+        self.revalidate_after = revalidate_after
+        self.cache = ModelCache(max_entries=max_entries, max_bytes=max_bytes)
+        self.missing = ModelCache(max_entries=max_missing_entries)  # user_id -> expires_at
+    
+    def save(self, user_id, model_data):
+        """Serialize a trained model into ai_models and cache it"""
+        session = self.db.session
+        if self.merge is not None:
+            # Workers merging into the same row take turns (FOR UPDATE is a no-op on SQLite)
+            stored = session.query(self.model_class.model_data).filter_by(
+                user_id=user_id, model_type=self.model_type
+            ).with_for_update().scalar()
+            if stored is not None:
+                model_data = self.merge(pickle.loads(stored), model_data)
+        
+        # Upsert, so two workers saving a user's first model cannot add two rows
+        blob = pickle.dumps(model_data, protocol=pickle.HIGHEST_PROTOCOL)
+        updated_at = datetime.utcnow()
+        session.execute(model_upsert(self.model_class, session.get_bind().dialect.name), [{
+            'user_id': user_id,
+            'model_type': self.model_type,
+            'model_data': blob,
+            'features': json.dumps(model_data.get('features', [])),
+            'created_at': updated_at,
+            'updated_at': updated_at
+        }])
+        session.commit()
+        
+        self.missing.pop(user_id)
+        self.cache.put(user_id, _StoredModel(model_data, updated_at), len(blob))
+        if self.on_replace is not None:
+            self.on_replace(user_id)
+    
+    def load(self, user_id):
+        """Return the user's model, loading it from the database on a cache miss"""
+        now = time.monotonic()
+        expires_at = self.missing.get(user_id)
+        if expires_at is not None:
+            if expires_at > now:
+                return None
+            self.missing.pop(user_id)
+        
+        cached = self.cache.get(user_id)
+        if cached is not None:
+            if now - cached.checked_at < self.revalidate_after:
+                return cached.model_data
+            
+            # Cheap freshness check: only reload the blob if it changed
+            updated_at = self.db.session.query(self.model_class.updated_at).filter_by(
+                user_id=user_id, model_type=self.model_type
+            ).scalar()
+            if updated_at is not None and updated_at == cached.updated_at:
+                cached.checked_at = now
+                return cached.model_data
+        
+        record = self.model_class.query.filter_by(user_id=user_id, model_type=self.model_type).first()
+        if record is None:
+            self.cache.pop(user_id)
+            self.missing.put(user_id, now + self.negative_ttl)
+            return None
+        
+        model_data = pickle.loads(record.model_data)
+        if cached is not None and self.merge is not None:
+            # Keep the updates this worker has not saved yet
+            model_data = self.merge(model_data, cached.model_data)
+        self.cache.put(user_id, _StoredModel(model_data, record.updated_at), len(record.model_data))
+        if cached is not None and self.on_replace is not None:
+            self.on_replace(user_id)
+        return model_data
+    
+    def delete(self, user_id):
+        """Remove the user's stored model"""
+        self.model_class.query.filter_by(user_id=user_id, model_type=self.model_type).delete()
+        self.db.session.commit()
+        self.cache.pop(user_id)
+    
+    def invalidate(self, user_id):
+        """Forget the cached model, or its absence, so the next load reads the database"""
+        self.cache.pop(user_id)
+        self.missing.pop(user_id)
+    
+    def stats(self):
+        """Model cache hit, miss and eviction counters, plus the negative entries kept apart from them"""
+        missing = self.missing.stats()
+        return {
+            **self.cache.stats(),
+            'missing_entries': missing['entries'],
+            'max_missing_entries': missing['max_entries'],
+            'missing_hits': missing['hits'],
+            'missing_evictions': missing['evictions']
+        }
+
+class _StoredModel:
+    """Cache entry for a loaded model and the row version it came from"""
+    __slots__ = ('model_data', 'updated_at', 'checked_at')
+    
+    def __init__(self, model_data, updated_at):
+        self.model_data = model_data
+        self.updated_at = updated_at
+        self.checked_at = time.monotonic()
\ No newline at end of file
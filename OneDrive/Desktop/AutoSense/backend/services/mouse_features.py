@@ -0,0 +1,93 @@
+import numpy as np
+
+# Gap between consecutive pointer samples (ms) treated as a pause; browsers stop
+# emitting mousemove while the pointer is still
+PAUSE_MS = 100.0
+
+MOUSE_FEATURES = [
+    'ms_path_length', 'ms_straightness',
+    'ms_velocity_mean', 'ms_velocity_std', 'ms_velocity_max',
+    'ms_accel_mean', 'ms_accel_std', 'ms_jerk_mean',
+    'ms_curvature_mean', 'ms_turn_angle_mean',
+    'ms_pause_count', 'ms_pause_fraction'
+]
+
+def mouse_trajectory(mouse_data):
+    """Pointer samples as float arrays (x, y, t in ms), ordered by time.
+    
+    Expects `{'x': [...], 'y': [...], 't': [...]}` with one entry per sample, as
+    sent by the client. Missing or malformed data yields empty arrays.
+    """
+    empty = np.empty(0)
+    if not isinstance(mouse_data, dict):
+        return empty, empty, empty
+    
+    try:
+        x = np.asarray(mouse_data.get('x', []), dtype=float)
+        y = np.asarray(mouse_data.get('y', []), dtype=float)
+        t = np.asarray(mouse_data.get('t', []), dtype=float)
+    except (TypeError, ValueError):
+        return empty, empty, empty
+    
+    if not x.ndim == y.ndim == t.ndim == 1:
+        return empty, empty, empty
+    n_points = min(x.shape[0], y.shape[0], t.shape[0])
+    x, y, t = x[:n_points], y[:n_points], t[:n_points]
+    
+    # Samples normally arrive in order; only pay for the sort when they do not
+    if n_points > 1 and (np.diff(t) < 0).any():
+        order = np.argsort(t, kind='stable')
+        x, y, t = x[order], y[order], t[order]
+    return x, y, t
+
+def extract_mouse_features(mouse_data):
+    """Path, velocity, acceleration, curvature, jerk, pause and straightness features for one event window"""
+    x, y, t = mouse_trajectory(mouse_data)
+    features = np.zeros(len(MOUSE_FEATURES))
+    if x.shape[0] < 2:
+        return features
+    
+    dx = np.diff(x)
+    dy = np.diff(y)
+    gaps = np.diff(t)
+    # Same-millisecond samples count as 1 ms apart so speeds stay finite
+    dt = np.maximum(gaps, 1.0) / 1000.0
+    step = np.sqrt(dx * dx + dy * dy)
+    
+    path_length = step.sum()
+    displacement = np.hypot(x[-1] - x[0], y[-1] - y[0])
+    features[0] = path_length
+    features[1] = displacement / path_length if path_length > 0 else 1.0
+    
+    # Speed profile and its first two time derivatives (px/s, px/s^2, px/s^3)
+    velocity = step / dt
+    features[2:5] = velocity.mean(), velocity.std(), velocity.max()
+    if velocity.shape[0] > 1:
+        dt_mid = (dt[:-1] + dt[1:]) / 2
+        accel = np.diff(velocity) / dt_mid
+        features[5:7] = np.abs(accel).mean(), accel.std()
+        if accel.shape[0] > 1:
+            features[7] = np.abs(np.diff(accel) / ((dt_mid[:-1] + dt_mid[1:]) / 2)).mean()
+    
+    # Unsigned heading change between consecutive moving segments (0 to pi)
+    moving = step > 0
+    if np.count_nonzero(moving) > 1:
+        mx, my, moving_step = dx[moving], dy[moving], step[moving]
+        cross = mx[:-1] * my[1:] - my[:-1] * mx[1:]
+        dot = mx[:-1] * mx[1:] + my[:-1] * my[1:]
+        turn = np.abs(np.arctan2(cross, dot))
+        features[8] = (turn / ((moving_step[:-1] + moving_step[1:]) / 2)).mean()
+        features[9] = turn.mean()
+    
+    # Pause segmentation: sampling gaps longer than PAUSE_MS
+    pauses = gaps >= PAUSE_MS
+    duration = t[-1] - t[0]
+    features[10] = np.count_nonzero(pauses)
+    features[11] = gaps[pauses].sum() / duration if duration > 0 else 0.0
+    
+    return features
+
+def has_mouse_trajectory(behavior_event):
+    """Whether an event carries raw pointer samples to extract features from"""
+    x, _, _ = mouse_trajectory(behavior_event.get('mouse_data'))
+    return x.shape[0] >= 2
\ No newline at end of file
@@ -0,0 +1,158 @@
+import threading
+import numpy as np
+
+class OnlineBaselineModel:
+    """Streaming per-user baseline updated one event at a time.
+    
+    Two detectors share the same O(features) update:
+    - running mean/variance (Welford) giving a classic z-score, and
+    - frugal streaming median/MAD giving a robust z-score that a burst of
+      outliers cannot drag around.
+    The per-feature scores are averaged across the two detectors and the worst
+    feature decides the trust score. Until `warmup` events have been seen the
+    model reports full trust, like a user with no trained model.
+    
+    Every worker updates its own copy. Each copy remembers the state it was
+    last loaded or persisted with, so `rebase` can replay just its own updates
+    onto a newer copy saved by another worker. Count, mean and variance merge
+    exactly. The streaming median and MAD take this copy's drift since then.
+    ModelStore(merge=merge_online_models) does this on save and when a
+    revalidation finds a newer row, so neither drops another worker's events.
+    """
+    
+    # Combined z-score at which trust falls to 50
+    Z_HALF_TRUST = 4.0
+    
+    def __init__(self, n_features, warmup=20, learning_rate=0.02):
+        self.n_features = n_features
+        self.warmup = warmup
+        self.learning_rate = learning_rate
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.median = np.zeros(n_features)
+        self.mad = np.zeros(n_features)
+        self._base = None  # state last loaded or persisted; None if never
+        self._lock = threading.Lock()
+    
+    def update(self, x):
+        """Fold one accepted event into the baseline"""
+        x = np.asarray(x, dtype=np.float64)
+        with self._lock:
+            self.count += 1
+            
+            # Welford running mean and variance
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+            
+            if self.count == 1:
+                self.median = x.copy()
+                self.mad = np.zeros(self.n_features)
+                return
+            
+            # Frugal median/MAD: step towards the sample, scaled to the feature's spread
+            step = self.learning_rate * np.maximum(np.sqrt(self.m2 / self.count), 1e-9)
+            self.median += step * np.sign(x - self.median)
+            self.mad += step * np.sign(np.abs(x - self.median) - self.mad)
+            self.mad = np.maximum(self.mad, 0.0)
+    
+    def rebase(self, stored):
+        """Make this copy `stored`'s state plus the updates made here since this copy was loaded or persisted"""
+        with stored._lock:
+            target = stored._state()
+        with self._lock:
+            base = self._base or (0, np.zeros(self.n_features), np.zeros(self.n_features), self.median, self.mad)
+            own = _difference(self._state()[:3], base[:3])
+            self.count, self.mean, self.m2 = _combine(target[:3], own)
+            if base[0] == 0:
+                # Nothing persisted under this copy: weigh both medians by their event counts
+                weight = own[0] / max(self.count, 1)
+                self.median = (1 - weight) * target[3] + weight * self.median
+                self.mad = (1 - weight) * target[4] + weight * self.mad
+            else:
+                self.median = target[3] + (self.median - base[3])
+                self.mad = np.maximum(target[4] + (self.mad - base[4]), 0.0)
+            self._base = target
+    
+    def update_many(self, rows):
+        """Fold several accepted events into the baseline, in order"""
+        for x in np.asarray(rows, dtype=np.float64):
+            self.update(x)
+    
+    def z_scores(self, X):
+        """Combined per-row anomaly score (worst feature)"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        
+        with self._lock:
+            std = np.sqrt(self.m2 / max(self.count - 1, 1))
+            robust_std = 1.4826 * self.mad
+            mean = self.mean.copy()
+            median = self.median.copy()
+        
+        # Features that never varied fall back to the other detector's spread, then to 1
+        std = np.where(std > 0, std, np.where(robust_std > 0, robust_std, 1.0))
+        robust_std = np.where(robust_std > 0, robust_std, std)
+        
+        z_classic = np.abs(X - mean) / std
+        z_robust = np.abs(X - median) / robust_std
+        return ((z_classic + z_robust) / 2).max(axis=1)
+    
+    def trust_scores(self, X):
+        """Trust scores (0-100) for raw rows"""
+        X = np.asarray(X, dtype=np.float64)
+        n_rows = 1 if X.ndim == 1 else X.shape[0]
+        if self.count < self.warmup:
+            return np.full(n_rows, 100.0)
+        return 100.0 / (1.0 + (self.z_scores(X) / self.Z_HALF_TRUST) ** 4)
+    
+    def _state(self):
+        return self.count, self.mean.copy(), self.m2.copy(), self.median.copy(), self.mad.copy()
+    
+    def __getstate__(self):
+        # Pickled only to persist it: the persisted state is the new base for merges
+        with self._lock:
+            self._base = self._state()
+            state = self.__dict__.copy()
+        del state['_lock']
+        del state['_base']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._base = self._state()
+        self._lock = threading.Lock()
+
+def merge_online_models(stored, local):
+    """ModelStore merge for online baselines: `local` with its unsaved updates replayed onto `stored`"""
+    if stored['features'] != local['features']:
+        return stored
+    local['model'].rebase(stored['model'])
+    return local
+
+def _difference(state, base):
+    """(count, mean, m2) of the events in `state` that came after `base`"""
+    count, mean, m2 = state
+    base_count, base_mean, base_m2 = base
+    own_count = count - base_count
+    if own_count <= 0:
+        return 0, np.zeros_like(mean), np.zeros_like(m2)
+    if base_count == 0:
+        return count, mean, m2
+    own_mean = base_mean + (mean - base_mean) * count / own_count
+    own_m2 = m2 - base_m2 - (own_mean - base_mean) ** 2 * base_count * own_count / count
+    return own_count, own_mean, np.maximum(own_m2, 0.0)
+
+def _combine(a, b):
+    """(count, mean, m2) of two disjoint sets of events (Chan et al.)"""
+    count_a, mean_a, m2_a = a
+    count_b, mean_b, m2_b = b
+    if count_b == 0:
+        return count_a, mean_a.copy(), m2_a.copy()
+    if count_a == 0:
+        return count_b, mean_b.copy(), m2_b.copy()
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    return count, mean_a + delta * count_b / count, m2_a + m2_b + delta ** 2 * count_a * count_b / count
\ No newline at end of file
@@ -0,0 +1,161 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+
+def generate_code(digits=6):
+    """Random numeric one-time code"""
+    return f"{secrets.randbelow(10 ** digits):0{digits}d}"
+
+class MemoryOTPBackend:
+    """Single-process OTP entries kept in a dict; expired entries are dropped on access and on writes"""
+    
+    def __init__(self, purge_every=1000):
+        self.purge_every = purge_every
+        self._entries = {}  # key -> [digest, attempts, expires_at]
+        self._writes = 0
+        self._lock = threading.Lock()
+    
+    def set(self, key, digest, ttl):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = [digest, 0, now + ttl]
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                for stale in [k for k, entry in self._entries.items() if entry[2] <= now]:
+                    del self._entries[stale]
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[0], entry[1]
+    
+    def incr_attempts(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry[1] += 1
+            return entry[1]
+    
+    def delete(self, key):
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+    
+    def __len__(self):
+        return len(self._entries)
+
+class RedisOTPBackend:
+    """OTP entries shared by every worker: one Redis hash per key, expired by Redis itself"""
+    
+    def __init__(self, client, prefix='authsense:otp:'):
+        self.client = client
+        self.prefix = prefix
+    
+    def set(self, key, digest, ttl):
+        name = self.prefix + key
+        pipe = self.client.pipeline()
+        pipe.delete(name)
+        pipe.hset(name, mapping={'digest': digest, 'attempts': 0})
+        pipe.expire(name, int(ttl))
+        pipe.execute()
+    
+    def get(self, key):
+        entry = self.client.hgetall(self.prefix + key)
+        if not entry:
+            return None
+        digest = entry.get(b'digest', entry.get('digest'))
+        attempts = entry.get(b'attempts', entry.get('attempts', 0))
+        return (digest.decode() if isinstance(digest, bytes) else digest), int(attempts)
+    
+    def incr_attempts(self, key):
+        name = self.prefix + key
+        # Only bump entries that still exist so an expired code is not resurrected
+        if not self.client.exists(name):
+            return None
+        return self.client.hincrby(name, 'attempts', 1)
+    
+    def delete(self, key):
+        return self.client.delete(self.prefix + key) > 0
+
+def make_otp_backend(url, workers=1):
+    """Backend for an OTP_STORE_URL: 'memory' (single worker only), or a redis:// URL"""
+    if not url or url == 'memory':
+        if workers > 1:
+            # A code issued by one worker would fail to verify on the others
+            raise ValueError(
+                f"OTP_STORE_URL 'memory' is per process but {workers} workers serve the app; "
+                "set OTP_STORE_URL or REDIS_URL to a redis:// URL"
+            )
+        return MemoryOTPBackend()
+    import redis
+    return RedisOTPBackend(redis.Redis.from_url(url))
+
+class OTPStore:
+    """Expiring one-time codes keyed by (purpose, email).
+    
+    Only an HMAC of each code is stored, keyed by `secret` and bound to its
+    key, so a leaked store does not reveal usable codes. Issuing a code
+    replaces any earlier one for the same key; a code is consumed by the first
+    successful `verify`, and after `max_attempts` wrong guesses it is
+    discarded so the user has to request a new one.
+    """
+    
+    def __init__(self, backend, secret, ttl_seconds=300, max_attempts=5):
+        self.backend = backend
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+        self.stats = {'issued': 0, 'verified': 0, 'rejected': 0, 'locked': 0}
+        self._stats_lock = threading.Lock()
+    
+    def issue(self, purpose, email):
+        """Create and store a new code; returns the plain code to send"""
+        code = generate_code()
+        key = self._key(purpose, email)
+        self.backend.set(key, self._digest(key, code), self.ttl_seconds)
+        self._count('issued')
+        return code
+    
+    def verify(self, purpose, email, code):
+        """Check a code, consuming it on success"""
+        key = self._key(purpose, email)
+        entry = self.backend.get(key)
+        if entry is None or not code:
+            self._count('rejected')
+            return False
+        
+        digest, attempts = entry
+        if attempts < self.max_attempts and hmac.compare_digest(digest, self._digest(key, str(code))):
+            # Only one concurrent verifier gets to consume the code
+            if self.backend.delete(key):
+                self._count('verified')
+                return True
+        
+        self._count('rejected')
+        attempts = self.backend.incr_attempts(key)
+        if attempts is not None and attempts >= self.max_attempts:
+            self.backend.delete(key)
+            self._count('locked')
+        return False
+    
+    def discard(self, purpose, email):
+        """Drop any pending code for the key"""
+        self.backend.delete(self._key(purpose, email))
+    
+    def _count(self, key):
+        # Request threads share one store; += on a dict entry is not atomic
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def _key(self, purpose, email):
+        return f"{purpose}:{(email or '').strip().lower()}"
+    
+    def _digest(self, key, code):
+        return hmac.new(self.secret, f"{key}:{code}".encode(), hashlib.sha256).hexdigest()
\ No newline at end of file
@@ -0,0 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+from werkzeug.security import check_password_hash, generate_password_hash
+from backend.services.training_jobs import LocalExecutor
+
+class PasswordHasherBusy(Exception):
+    """Too many password operations are already waiting"""
+
+def hash_password(password, method):
+    return generate_password_hash(password, method=method)
+
+def verify_password(password_hash, password):
+    return check_password_hash(password_hash, password)
+
+def needs_rehash(password_hash, method):
+    """True if a stored hash was made with different parameters than `method`"""
+    return password_hash.split('$', 1)[0] != method
+
+class PasswordHasher:
+    """Password hashing and checks on a small process pool.
+    
+    Hashing is CPU-bound by design; running it in `max_workers` processes caps
+    how much CPU a login burst can take from request threads. At most
+    `max_pending` operations are queued or running at once: callers wait up to
+    `queue_timeout` seconds for a slot and then get PasswordHasherBusy, which
+    the routes turn into a 503, as does an operation still running after
+    `timeout` seconds. `method` is the Werkzeug method string with
+    explicit parameters (e.g. 'pbkdf2:sha256:600000'); `verify` reports
+    hashes made with other parameters so they can be rehashed on login.
+    """
+    
+    def __init__(self, method='pbkdf2:sha256:600000', executor='process', max_workers=2,
+                 max_pending=32, queue_timeout=2.0, timeout=30.0):
+        self.method = method
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.stats = {'hashed': 0, 'verified': 0, 'rehash_needed': 0, 'busy': 0, 'timeouts': 0}
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._stats_lock = threading.Lock()
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == 'process':
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                else:
+                    self._executor = LocalExecutor()
+            return self._executor
+    
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        password_hash = self._run(hash_password, password, self.method)
+        self._count('hashed')
+        return password_hash
+    
+    def verify(self, password_hash, password):
+        """(matches, needs_rehash) for a password against a stored hash"""
+        matches = self._run(verify_password, password_hash, password)
+        self._count('verified')
+        rehash = matches and needs_rehash(password_hash, self.method)
+        if rehash:
+            self._count('rehash_needed')
+        return matches, rehash
+    
+    def shutdown(self, wait=True):
+        """Stop the pool"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+    
+    def _count(self, key):
+        # Request threads share one hasher; += on a dict entry is not atomic
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count('busy')
+            raise PasswordHasherBusy('Password hashing queue is full')
+        try:
+            return self.executor.submit(fn, *args).result(timeout=self.timeout)
+        except TimeoutError:
+            self._count('timeouts')
+            raise PasswordHasherBusy('Password operation timed out')
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next call
+            with self._lock:
+                self._executor = None
+            raise
+        finally:
+            self._slots.release()
\ No newline at end of file
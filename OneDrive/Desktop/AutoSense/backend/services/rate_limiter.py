@@ -0,0 +1,115 @@
+import threading
+import time
+
+class MemoryBucketBackend:
+    """Token buckets for a single process; buckets that have refilled completely are pruned"""
+    
+    def __init__(self, prune_every=10000):
+        self.prune_every = prune_every
+        self._buckets = {}  # key -> [tokens, updated_at, full_at]
+        self._ops = 0
+        self._lock = threading.Lock()
+    
+    def take(self, key, rate, capacity, now=None):
+        """Take one token; returns (allowed, seconds until one is available)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = [tokens, now, now + (capacity - tokens) / rate]
+            
+            self._ops += 1
+            if self._ops >= self.prune_every:
+                self._ops = 0
+                # A full bucket is the same as no bucket
+                for stale in [k for k, b in self._buckets.items() if b[2] <= now]:
+                    del self._buckets[stale]
+        return retry_after == 0.0, retry_after
+    
+    def __len__(self):
+        return len(self._buckets)
+
+# Refill and take atomically on the Redis server, using its clock so workers agree
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + (now - tonumber(bucket[2])) * rate)
+end
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+class RedisBucketBackend:
+    """Token buckets shared by every worker; each bucket is a Redis hash that expires once full"""
+    
+    def __init__(self, client, prefix='authsense:bucket:'):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(TAKE_SCRIPT)
+    
+    def take(self, key, rate, capacity, now=None):
+        retry_after = float(self._take(keys=[self.prefix + key], args=[rate, capacity]))
+        return retry_after == 0.0, retry_after
+
+def make_bucket_backend(url):
+    """Backend for a RATE_LIMIT_STORE_URL: 'memory' (per process), or a redis:// URL shared by all workers"""
+    if not url or url == 'memory':
+        return MemoryBucketBackend()
+    import redis
+    return RedisBucketBackend(redis.Redis.from_url(url))
+
+class TokenBucketLimiter:
+    """Per-key token buckets for a set of named rules.
+    
+    Each rule is (per_minute, burst): a key may make `burst` requests at once
+    and then `per_minute` a minute. `check` takes one token from the bucket of
+    every rule it is given a key for, in order, and stops at the first empty
+    one. Decisions are counted per rule in `stats`, which request threads
+    update under a lock.
+    """
+    
+    def __init__(self, backend, rules):
+        self.backend = backend
+        self.rules = {name: (per_minute / 60.0, burst) for name, (per_minute, burst) in rules.items()}
+        self.stats = {name: {'allowed': 0, 'rejected': 0} for name in rules}
+        self.stats['errors'] = 0
+        self._stats_lock = threading.Lock()
+    
+    def check(self, scope, **keys):
+        """(allowed, retry_after seconds, rejecting rule) for one request"""
+        for name, value in keys.items():
+            if value is None:
+                continue
+            rate, burst = self.rules[name]
+            try:
+                allowed, retry_after = self.backend.take(f"{scope}:{name}:{value}", rate, burst)
+            except Exception:
+                # Fail open: a limiter outage must not lock everyone out; counted, not logged per request
+                with self._stats_lock:
+                    self.stats['errors'] += 1
+                continue
+            outcome = 'allowed' if allowed else 'rejected'
+            with self._stats_lock:
+                self.stats[name][outcome] += 1
+            if not allowed:
+                return False, retry_after, name
+        return True, 0.0, None
\ No newline at end of file
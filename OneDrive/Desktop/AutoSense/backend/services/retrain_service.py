@@ -0,0 +1,223 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import time
+import numpy as np
+from sqlalchemy import select, union, union_all
+from backend.services.model_store import model_upsert
+from backend.services.sample_codec import read_samples
+from backend.services.training_jobs import BEHAVIOR_FEATURES, fit_behavior_model, fit_feature_matrix
+
+def fit_user_blob(user_id, feature_data, features, tree_jobs=1):
+    """Worker entry point: fit one user's model on a samples x features array and return it pickled"""
+    model_data = fit_feature_matrix(feature_data, features, n_jobs=tree_jobs)
+    return user_id, pickle.dumps(model_data, protocol=pickle.HIGHEST_PROTOCOL), features
+
+def fit_user_events(user_id, behavior_events, features=None, tree_jobs=1):
+    """Worker entry point: fit one user's model on decoded events (derived features are extracted here)"""
+    model_data = fit_behavior_model(behavior_events, features, n_jobs=tree_jobs)
+    return user_id, pickle.dumps(model_data, protocol=pickle.HIGHEST_PROTOCOL), model_data['features']
+
+# Raw sample columns, (binary, legacy JSON) per payload field
+SAMPLE_COLUMNS = ['keystroke_samples', 'keystroke_data', 'mouse_samples', 'mouse_data']
+
+def behavior_event(row):
+    """Event dict of a streamed row: stored feature values plus the decoded raw samples"""
+    event = dict(zip(BEHAVIOR_FEATURES, row[2:2 + len(BEHAVIOR_FEATURES)]))
+    event['keystroke_data'] = read_samples(row.keystroke_samples, row.keystroke_data)
+    event['mouse_data'] = read_samples(row.mouse_samples, row.mouse_data)
+    return event
+
+class FleetRetrainer:
+    """Rebuilds every user's IsolationForest from stored behavior logs.
+    
+    Users are walked in pages of `write_batch_size` ids. Each page's rows are
+    streamed ordered by user, so only one user's history is held in the parent
+    at a time (capped at the `max_samples` most recent accepted events). Users
+    keep the feature set their current model was trained on; users that have
+    derived keystroke/mouse features, or no model yet, have their raw samples
+    decoded and the features extracted in the worker. Users
+    are sharded across a process pool with at most 2 x workers fits in flight,
+    and the models finished so far are written to ai_models in one commit at
+    the end of each page, after its read cursor is closed. Memory stays bounded
+    by the page size and in-flight fits regardless of fleet size.
+    
+    With `partitions` (a BehaviorLogPartitions), rows are read from the live
+    table and every rotated archive still within retention; without it only
+    the live table is read.
+    """
+    
+    def __init__(self, db, log_model, ai_model_class, workers=None, tree_jobs=1,
+                 min_samples=20, max_samples=5000, write_batch_size=500, stream_batch_size=10000,
+                 partitions=None):
+        self.db = db
+        self.log_model = log_model
+        self.partitions = partitions
+        self.ai_model_class = ai_model_class
+        self.workers = workers or os.cpu_count() or 1
+        self.tree_jobs = tree_jobs
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.write_batch_size = write_batch_size
+        self.stream_batch_size = stream_batch_size
+        self.stats = {'users': 0, 'rows': 0, 'skipped': 0, 'failed': 0, 'seconds': 0.0, 'last_error': None}
+    
+    def run(self, progress=None):
+        """Retrain every user with enough history; returns throughput stats"""
+        started = time.perf_counter()
+        pending = set()
+        finished = []
+        max_in_flight = self.workers * 2
+        
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            for user_ids in self._user_pages():
+                for user_id, samples, features in self._stream_users(user_ids):
+                    if len(samples) < self.min_samples:
+                        self.stats['skipped'] += 1
+                        continue
+                    
+                    # Backpressure: never queue more than a couple of fits per worker
+                    if len(pending) >= max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        finished.extend(self._collect(done))
+                    
+                    if isinstance(samples, np.ndarray):
+                        pending.add(executor.submit(fit_user_blob, user_id, samples, features, self.tree_jobs))
+                    else:
+                        pending.add(executor.submit(fit_user_events, user_id, samples, features, self.tree_jobs))
+                    self.stats['rows'] += len(samples)
+                
+                # The page's cursor is exhausted; write what has finished so far
+                self._write(finished)
+                finished = []
+                if progress:
+                    progress(self.throughput(started))
+            
+            done, _ = wait(pending)
+            self._write(self._collect(done))
+        
+        self.stats['seconds'] = time.perf_counter() - started
+        return self.throughput(started)
+    
+    def throughput(self, started):
+        """Counters plus users/sec and rows/sec so far"""
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        return dict(
+            self.stats,
+            seconds=elapsed,
+            users_per_sec=self.stats['users'] / elapsed,
+            rows_per_sec=self.stats['rows'] / elapsed
+        )
+    
+    def _tables(self):
+        """Tables holding raw rows: the live table plus rotated archives when partitioned"""
+        if self.partitions is None:
+            return [self.log_model.__table__]
+        return self.partitions.raw_tables()
+    
+    def _user_pages(self):
+        """Yield sorted lists of user ids that have behavior logs, one page at a time"""
+        last_user_id = None
+        while True:
+            pages = []
+            for table in self._tables():
+                query = select(table.c.user_id).distinct().order_by(table.c.user_id)
+                if last_user_id is not None:
+                    query = query.where(table.c.user_id > last_user_id)
+                pages.append(query.limit(self.write_batch_size))
+            
+            if len(pages) == 1:
+                query = pages[0]
+            else:
+                # Each table's next page, merged; the union drops users seen in several tables
+                merged = union(*[page.subquery().select() for page in pages]).subquery()
+                query = select(merged.c.user_id).order_by(merged.c.user_id).limit(self.write_batch_size)
+            user_ids = self.db.session.execute(query).scalars().all()
+            if not user_ids:
+                return
+            yield user_ids
+            last_user_id = user_ids[-1]
+    
+    def _user_features(self, user_ids):
+        """Feature list of each user's current model; users without one are left out"""
+        rows = self.db.session.execute(
+            select(self.ai_model_class.user_id, self.ai_model_class.features)
+            .where(self.ai_model_class.user_id.in_(user_ids))
+            .where(self.ai_model_class.model_type == 'isolation_forest')
+        ).all()
+        return {user_id: json.loads(features) for user_id, features in rows if features}
+    
+    def _stream_users(self, user_ids):
+        """Yield (user_id, samples, features) one user at a time.
+        
+        Samples are a samples x features array when every feature is a stored
+        column, else the decoded events for the worker to extract features
+        from; features is None for users without a model (chosen at fit time).
+        """
+        user_features = self._user_features(user_ids)
+        columns = ['user_id', 'timestamp'] + BEHAVIOR_FEATURES + SAMPLE_COLUMNS
+        selects = [
+            select(*[table.c[column] for column in columns])
+            .where(table.c.user_id.in_(user_ids))
+            .where(table.c.is_anomaly.is_(False))
+            .where(table.c.keystroke_speed.isnot(None))
+            for table in self._tables()
+        ]
+        if len(selects) == 1:
+            query = selects[0].order_by(selects[0].selected_columns.user_id, selects[0].selected_columns.timestamp.desc())
+        else:
+            merged = union_all(*selects).subquery()
+            query = select(merged).order_by(merged.c.user_id, merged.c.timestamp.desc())
+        rows = self.db.session.execute(query.execution_options(yield_per=self.stream_batch_size))
+        
+        for user_id, user_rows in itertools.groupby(rows, key=lambda row: row[0]):
+            # Most recent max_samples rows; the rest of the group is skipped, not kept
+            sample = list(itertools.islice(user_rows, self.max_samples))
+            features = user_features.get(user_id)
+            
+            if features is not None and set(features) <= set(BEHAVIOR_FEATURES):
+                indexes = [BEHAVIOR_FEATURES.index(feature) + 2 for feature in features]
+                yield user_id, np.nan_to_num(np.array([[row[i] for i in indexes] for row in sample], dtype=float)), features
+            else:
+                yield user_id, [behavior_event(row) for row in sample], features
+        
+        # End the read transaction before the page is written
+        self.db.session.commit()
+    
+    def _collect(self, futures):
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                self.stats['failed'] += 1
+                self.stats['last_error'] = f"Error retraining model: {e}"
+        return results
+    
+    def _write(self, results):
+        """Upsert a batch of (user_id, blob, features) into ai_models with one commit"""
+        if not results:
+            return
+        
+        session = self.db.session
+        try:
+            now = datetime.utcnow()
+            session.execute(model_upsert(self.ai_model_class, session.get_bind().dialect.name), [{
+                'user_id': user_id,
+                'model_type': 'isolation_forest',
+                'model_data': blob,
+                'features': json.dumps(features),
+                'created_at': now,
+                'updated_at': now
+            } for user_id, blob, features in results])
+            session.commit()
+            self.stats['users'] += len(results)
+        except Exception as e:
+            session.rollback()
+            self.stats['failed'] += len(results)
+            self.stats['last_error'] = f"Error writing retrained models: {e}"
\ No newline at end of file
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+import threading
+from sqlalchemy import select
+
+class RevocationIndex:
+    """In-memory set of revoked token ids (JWT jti) of ended sessions.
+    
+    `is_revoked` is a single hash lookup, cheap enough for Flask-JWT-Extended's
+    blocklist loader on every authenticated request. The first sync loads the
+    sessions that ended within `token_lifetime` (older tokens have expired
+    anyway); later syncs read only sessions that ended since the previous
+    sync, through the ended_at index, so revocations made by other workers
+    arrive within `sync_interval` seconds. Revocations made in this
+    process can be applied straight away with `revoke`. Entries are pruned
+    once the tokens they block have expired. A token whose session is not
+    revoked is only ever let through; the index has no false positives.
+    """
+    
+    # Re-read a little before the last sync so late commits and clock skew between workers are not missed
+    OVERLAP = timedelta(seconds=5)
+    
+    def __init__(self, app, db, session_model, token_lifetime=timedelta(minutes=15), sync_interval=2.0):
+        self.app = app
+        self.db = db
+        self.session_model = session_model
+        self.token_lifetime = token_lifetime or None
+        self.sync_interval = sync_interval
+        self.stats = {'revoked': 0, 'syncs': 0, 'synced_rows': 0, 'pruned': 0, 'last_sync': None}
+        self._revoked = {}  # jti -> time after which its token has expired (None: never)
+        self._watermark = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def is_revoked(self, jti):
+        return jti in self._revoked
+    
+    def revoke(self, jti, issued_at=None):
+        """Block a token in this process right away"""
+        if jti is None:
+            return
+        expires_at = (issued_at or datetime.now()) + self.token_lifetime if self.token_lifetime else None
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self.stats['revoked'] = len(self._revoked)
+    
+    def sync(self, now=None):
+        """Load sessions ended since the last sync; returns how many rows were read"""
+        now = now or datetime.now()
+        table = self.session_model.__table__
+        if self._watermark is None:
+            since = now - self.token_lifetime if self.token_lifetime else None
+        else:
+            since = self._watermark - self.OVERLAP
+        
+        query = select(table.c.jti, table.c.created_at).where(table.c.jti.isnot(None))
+        query = query.where(table.c.ended_at > since) if since is not None else query.where(table.c.ended_at.isnot(None))
+        with self.app.app_context():
+            try:
+                rows = self.db.session.execute(query).all()
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                print(f"Error syncing revoked sessions: {e}")
+                return 0
+        
+        for jti, created_at in rows:
+            self.revoke(jti, created_at)
+        self._watermark = now
+        self._prune(now)
+        
+        self.stats['syncs'] += 1
+        self.stats['synced_rows'] += len(rows)
+        self.stats['last_sync'] = now.isoformat()
+        return len(rows)
+    
+    def start(self):
+        """Start the background sync thread if it is not running yet"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                # Load existing revocations before the first request is checked
+                if self._watermark is None:
+                    self.sync()
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name='revocation-sync', daemon=True)
+                self._thread.start()
+    
+    def stop(self, timeout=5.0):
+        """Stop the sync thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def _run(self):
+        while not self._stop_event.wait(self.sync_interval):
+            self.sync()
+    
+    def _prune(self, now):
+        with self._lock:
+            expired = [jti for jti, expires_at in self._revoked.items() if expires_at is not None and expires_at <= now]
+            for jti in expired:
+                del self._revoked[jti]
+            self.stats['pruned'] += len(expired)
+            self.stats['revoked'] = len(self._revoked)
\ No newline at end of file
@@ -0,0 +1,145 @@
+import json
+import struct
+import zlib
+import numpy as np
+
+# Header: magic, format version, sample kind, flags, sample count, base timestamp (us);
+# padded to 24 bytes so the packed arrays that follow stay 8-byte aligned
+HEADER = struct.Struct('<4sBBHIq4x')
+MAGIC = b'ASBS'
+VERSION = 1
+
+KIND_KEYSTROKE = 1
+KIND_MOUSE = 2
+
+FLAG_ZLIB = 1
+FLAG_WIDE = 2  # time columns are int64 instead of int32
+
+INT32_MAX = np.iinfo(np.int32).max
+# Largest magnitude that survives the int64 cast and the delta/dwell arithmetic
+INT64_MAX_US = float(2 ** 61)
+
+def _time_column(values_ms):
+    """Microsecond integers from millisecond floats; NaN/inf and out-of-range values raise ValueError"""
+    values_us = np.asarray(values_ms, dtype=np.float64) * 1000.0
+    if not np.isfinite(values_us).all() or (np.abs(values_us) > INT64_MAX_US).any():
+        raise ValueError('Sample timestamps must be finite and within range')
+    return np.rint(values_us).astype(np.int64)
+
+def _pack(kind, base_us, count, columns, compress_min_bytes):
+    """Header plus the column buffers, zlib-compressed when large enough and it pays off"""
+    flags = 0
+    if any(column.dtype == np.int64 for column in columns):
+        flags |= FLAG_WIDE
+    body = b''.join(column.tobytes() for column in columns)
+    
+    if compress_min_bytes is not None and len(body) >= compress_min_bytes:
+        compressed = zlib.compress(body, 1)
+        if len(compressed) < len(body):
+            body = compressed
+            flags |= FLAG_ZLIB
+    
+    return HEADER.pack(MAGIC, VERSION, kind, flags, count, base_us) + body
+
+def encode_keystrokes(keystroke_data, compress_min_bytes=512):
+    """Binary blob for `{'down': [...], 'up': [...]}` key timings, or None if not in that form.
+    
+    Key-down times are stored as deltas from the first press and key-up times
+    as dwell, both in integer microseconds.
+    """
+    if not isinstance(keystroke_data, dict) or set(keystroke_data) != {'down', 'up'}:
+        return None
+    try:
+        down = _time_column(keystroke_data['down'])
+        up = _time_column(keystroke_data['up'])
+    except (TypeError, ValueError):
+        return None
+    if down.ndim != 1 or down.shape != up.shape:
+        return None
+    
+    order = np.argsort(down, kind='stable')
+    down, up = down[order], up[order]
+    base_us = int(down[0]) if down.shape[0] else 0
+    
+    deltas = np.diff(down, prepend=base_us)
+    dwell = up - down
+    dtype = np.int32 if max(np.abs(deltas).max(initial=0), np.abs(dwell).max(initial=0)) <= INT32_MAX else np.int64
+    return _pack(KIND_KEYSTROKE, base_us, down.shape[0],
+                 [deltas.astype(dtype), dwell.astype(dtype)], compress_min_bytes)
+
+def encode_mouse(mouse_data, compress_min_bytes=512):
+    """Binary blob for `{'x': [...], 'y': [...], 't': [...]}` pointer samples, or None if not in that form.
+    
+    Timestamps are stored as deltas in integer microseconds and coordinates
+    as float32.
+    """
+    if not isinstance(mouse_data, dict) or set(mouse_data) != {'x', 'y', 't'}:
+        return None
+    try:
+        t = _time_column(mouse_data['t'])
+        x = np.asarray(mouse_data['x'], dtype=np.float32)
+        y = np.asarray(mouse_data['y'], dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+    if t.ndim != 1 or t.shape != x.shape or t.shape != y.shape:
+        return None
+    
+    order = np.argsort(t, kind='stable')
+    t, x, y = t[order], x[order], y[order]
+    base_us = int(t[0]) if t.shape[0] else 0
+    
+    deltas = np.diff(t, prepend=base_us)
+    dtype = np.int32 if np.abs(deltas).max(initial=0) <= INT32_MAX else np.int64
+    return _pack(KIND_MOUSE, base_us, t.shape[0], [deltas.astype(dtype), x, y], compress_min_bytes)
+
+def decode_samples(blob):
+    """Dict of NumPy arrays from a binary sample blob.
+    
+    Packed columns are read with np.frombuffer (no copy); only the timestamps,
+    which have to be un-deltaed, are materialized.
+    """
+    magic, version, kind, flags, count, base_us = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError('Not a binary sample blob')
+    if version != VERSION:
+        raise ValueError(f"Unsupported sample format version {version}")
+    
+    body = memoryview(blob)[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+    time_dtype = np.int64 if flags & FLAG_WIDE else np.int32
+    time_bytes = count * np.dtype(time_dtype).itemsize
+    
+    deltas = np.frombuffer(body, dtype=time_dtype, count=count)
+    times = (base_us + np.cumsum(deltas, dtype=np.int64)) / 1000.0
+    
+    if kind == KIND_KEYSTROKE:
+        dwell = np.frombuffer(body, dtype=time_dtype, count=count, offset=time_bytes)
+        return {'down': times, 'up': times + dwell / 1000.0}
+    if kind == KIND_MOUSE:
+        x = np.frombuffer(body, dtype=np.float32, count=count, offset=time_bytes)
+        y = np.frombuffer(body, dtype=np.float32, count=count, offset=time_bytes + count * 4)
+        return {'x': x, 'y': y, 't': times}
+    raise ValueError(f"Unknown sample kind {kind}")
+
+def read_samples(blob, legacy_json=None):
+    """Raw samples of a stored event: binary blob if present, else the legacy JSON text"""
+    if blob is not None:
+        return decode_samples(blob)
+    if legacy_json:
+        return json.loads(legacy_json)
+    return {}
+
+def encode_row_samples(behavior_data, compress_min_bytes=512):
+    """BehaviorLog raw-sample columns for one event.
+    
+    Payloads in the raw sample format go to the binary columns; anything else
+    is kept as JSON text so nothing the client sends is lost.
+    """
+    columns = {}
+    for field, encode in (('keystroke_data', encode_keystrokes), ('mouse_data', encode_mouse)):
+        raw_data = behavior_data.get(field, {})
+        blob = encode(raw_data, compress_min_bytes)
+        columns[field.replace('_data', '_samples')] = blob
+        columns[field] = json.dumps(raw_data) if blob is None else None
+    return columns
\ No newline at end of file
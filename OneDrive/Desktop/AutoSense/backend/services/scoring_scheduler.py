@@ -0,0 +1,80 @@
+class ScoringScheduler:
+    """Decides which behavior events get full model scoring.
+    
+    Sessions with no history, or whose recent scores are not all at least
+    `high_trust`, have every event scored. Once a session's whole trust
+    window (see SessionTrustTracker) is high, only every `max_skip`-th event
+    is scored, plus any event whose plain features drift from the window's
+    average by more than `drift_tolerance` (relative). One lower score puts
+    the session back on scoring every event until the window is high again.
+    Events that are not scored carry the session's last score.
+    """
+    
+    def __init__(self, trust_tracker, high_trust=90, max_skip=8, drift_tolerance=0.5):
+        self.trust_tracker = trust_tracker
+        self.high_trust = high_trust
+        self.max_skip = max_skip
+        self.drift_tolerance = drift_tolerance
+        self.stats = {
+            'events': 0,
+            'scored': 0,
+            'skipped': 0,
+            'skip_fraction': 0.0,
+            'reasons': {'new': 0, 'low_trust': 0, 'interval': 0, 'drift': 0}
+        }
+    
+    def plan(self, key, events):
+        """One flag per event, True where the event needs full scoring"""
+        state = self.trust_tracker.get(key)
+        reason = self._escalation(state)
+        if reason:
+            flags = [True] * len(events)
+            self.stats['reasons'][reason] += len(events)
+            if state is not None:
+                state.skipped = 0
+        else:
+            features = self.trust_tracker.features
+            baseline = self._feature_means(state, len(features))
+            skipped = state.skipped
+            flags = []
+            for event in events:
+                if skipped + 1 >= self.max_skip:
+                    reason = 'interval'
+                elif self._drifted([float(event.get(feature) or 0) for feature in features], baseline):
+                    reason = 'drift'
+                else:
+                    reason = None
+                
+                if reason:
+                    self.stats['reasons'][reason] += 1
+                    skipped = 0
+                else:
+                    skipped += 1
+                flags.append(bool(reason))
+            state.skipped = skipped
+        
+        scored = sum(flags)
+        self.stats['events'] += len(flags)
+        self.stats['scored'] += scored
+        self.stats['skipped'] += len(flags) - scored
+        self.stats['skip_fraction'] = round(self.stats['skipped'] / max(self.stats['events'], 1), 4)
+        return flags
+    
+    def _escalation(self, state):
+        # Why every event must be scored, or None if the session may skip
+        if state is None or state.count < len(state.scores):
+            return 'new'
+        if min(state.scores) < self.high_trust:
+            return 'low_trust'
+        return None
+    
+    def _feature_means(self, state, width):
+        features = state.features
+        window = len(state.scores)
+        return [sum(features[i::width]) / window for i in range(width)]
+    
+    def _drifted(self, vector, baseline):
+        return any(
+            abs(value - mean) > self.drift_tolerance * max(abs(mean), 1.0)
+            for value, mean in zip(vector, baseline)
+        )
\ No newline at end of file
@@ -0,0 +1,137 @@
+import threading
+import time
+from sqlalchemy import bindparam
+
+class CachedSession:
+    """The fields of an active Session the request path needs, detached from any DB session"""
+    __slots__ = ('id', 'user_id', 'session_token', 'created_at', 'last_activity')
+    
+    def __init__(self, session):
+        self.id = session.id
+        self.user_id = session.user_id
+        self.session_token = session.session_token
+        self.created_at = session.created_at
+        self.last_activity = session.last_activity
+
+class ActiveSessionCache:
+    """Per-token active session lookups served from memory, with debounced heartbeats.
+    
+    `get_active(user_id, jti)` returns the active session the request's access
+    token (identified by its jti) belongs to, answering from memory for `ttl`
+    seconds after a lookup (tokens with no active session are cached too), so
+    a user with several sessions never has one token's events attributed to
+    another. `invalidate` drops all of a user's entries when a session of
+    theirs is terminated or replaced. `touch` records
+    activity in memory only; a background thread writes the latest
+    last_activity of every touched session in one bulk UPDATE every
+    `heartbeat_interval` seconds, so each session is written at most once
+    per interval no matter how many events it sends. Other workers see a
+    termination once their entry's TTL runs out.
+    """
+    
+    def __init__(self, app, db, session_model, ttl=30, heartbeat_interval=60):
+        self.app = app
+        self.db = db
+        self.session_model = session_model
+        self.ttl = ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.stats = {'hits': 0, 'misses': 0, 'heartbeats': 0, 'flushes': 0, 'rows_written': 0}
+        self._entries = {}  # user_id -> {jti: (CachedSession or None, expires_at)}
+        self._dirty = {}  # session_token -> latest last_activity
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def get_active(self, user_id, jti):
+        """The active session of the user's token `jti`, or None; hits the database only on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(user_id, {}).get(jti)
+            if cached is not None and cached[1] > now:
+                self.stats['hits'] += 1
+                return cached[0]
+            self.stats['misses'] += 1
+        
+        session = self.session_model.query.filter_by(user_id=user_id, jti=jti, status='active').first()
+        entry = CachedSession(session) if session else None
+        with self._lock:
+            self._entries.setdefault(user_id, {})[jti] = (entry, now + self.ttl)
+        return entry
+    
+    def touch(self, entry, timestamp):
+        """Record activity on a session; persisted by the next heartbeat flush"""
+        if entry is None:
+            return
+        with self._lock:
+            if entry.last_activity is None or timestamp > entry.last_activity:
+                entry.last_activity = timestamp
+            previous = self._dirty.get(entry.session_token)
+            if previous is None or timestamp > previous:
+                self._dirty[entry.session_token] = timestamp
+            self.stats['heartbeats'] += 1
+        self.start()
+    
+    def invalidate(self, user_id):
+        """Forget a user's cached sessions (one was terminated, or a new one was created)"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+    
+    def start(self):
+        """Start the heartbeat flusher if it is not running yet"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name='session-heartbeat', daemon=True)
+                self._thread.start()
+    
+    def flush(self):
+        """Write every pending last_activity in one bulk UPDATE; returns the rows written"""
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+                # Drop expired entries so the map does not grow with every user ever seen
+                now = time.monotonic()
+                for user_id, tokens in list(self._entries.items()):
+                    for jti in [jti for jti, (_, expires_at) in tokens.items() if expires_at <= now]:
+                        del tokens[jti]
+                    if not tokens:
+                        del self._entries[user_id]
+            if not dirty:
+                return 0
+            
+            table = self.session_model.__table__
+            with self.app.app_context():
+                try:
+                    self.db.session.execute(
+                        table.update()
+                        .where(table.c.session_token == bindparam('token'))
+                        .values(last_activity=bindparam('ts')),
+                        [{'token': token, 'ts': ts} for token, ts in dirty.items()]
+                    )
+                    self.db.session.commit()
+                except Exception as e:
+                    self.db.session.rollback()
+                    print(f"Error writing session heartbeats: {e}")
+                    # Keep them for the next flush unless newer activity arrived meanwhile
+                    with self._lock:
+                        for token, ts in dirty.items():
+                            if token not in self._dirty or self._dirty[token] < ts:
+                                self._dirty[token] = ts
+                    return 0
+            
+            self.stats['flushes'] += 1
+            self.stats['rows_written'] += len(dirty)
+            return len(dirty)
+    
+    def stop(self, timeout=5.0):
+        """Stop the flusher and write pending heartbeats"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+    
+    def _run(self):
+        while not self._stop_event.wait(self.heartbeat_interval):
+            self.flush()
\ No newline at end of file
@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+import heapq
+import threading
+import time
+from sqlalchemy import select
+
+class SessionReaper:
+    """Background expiry of sessions idle for longer than the session timeout.
+    
+    Idle deadlines (last_activity + timeout) live in a min-heap, so a sweep
+    only looks at sessions whose deadline has passed. Sessions are picked up
+    by id: the first sweep loads the active ones, later sweeps only read rows
+    with an id above the highest seen so far (a primary-key range, not a table
+    scan). Due sessions are re-read by id; the ones still idle are expired in
+    one bulk UPDATE per chunk, guarded on status and last_activity so a
+    session touched in the meantime (by any worker) survives and is pushed
+    back with its new deadline. Pending heartbeats from the session cache are
+    flushed first so in-memory activity counts.
+    """
+    
+    CHUNK_SIZE = 500
+    
+    def __init__(self, app, db, session_model, timeout_minutes=30, sweep_interval=30, session_cache=None):
+        self.app = app
+        self.db = db
+        self.session_model = session_model
+        self.timeout = timedelta(minutes=timeout_minutes)
+        self.sweep_interval = sweep_interval
+        self.session_cache = session_cache
+        self.stats = {'sweeps': 0, 'expired': 0, 'tracked': 0, 'last_sweep': None}
+        self._heap = []  # (deadline, session id)
+        self._deadlines = {}  # session id -> current deadline; older heap entries are stale
+        self._max_id = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def track(self, session_id, last_activity):
+        """(Re)schedule a session's idle deadline"""
+        deadline = (last_activity or datetime.now()) + self.timeout
+        with self._lock:
+            if self._deadlines.get(session_id) == deadline:
+                return
+            self._deadlines[session_id] = deadline
+            heapq.heappush(self._heap, (deadline, session_id))
+            self.stats['tracked'] = len(self._deadlines)
+    
+    def sweep(self, now=None):
+        """Expire every due session; returns this sweep's metrics"""
+        started = time.perf_counter()
+        now = now or datetime.now()
+        if self.session_cache is not None:
+            self.session_cache.flush()
+        
+        expired = 0
+        with self.app.app_context():
+            try:
+                self._load_new_sessions()
+                due = self._pop_due(now)
+                for start in range(0, len(due), self.CHUNK_SIZE):
+                    expired += self._expire(due[start:start + self.CHUNK_SIZE], now)
+            except Exception as e:
+                self.db.session.rollback()
+                print(f"Error sweeping sessions: {e}")
+        
+        sweep = {
+            'expired': expired,
+            'seconds': time.perf_counter() - started,
+            'tracked': len(self._deadlines),
+            'finished_at': datetime.now().isoformat()
+        }
+        self.stats['sweeps'] += 1
+        self.stats['expired'] += expired
+        self.stats['tracked'] = sweep['tracked']
+        self.stats['last_sweep'] = sweep
+        return sweep
+    
+    def start(self):
+        """Start the sweeper thread if it is not running yet"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name='session-reaper', daemon=True)
+                self._thread.start()
+    
+    def stop(self, timeout=5.0):
+        """Stop the sweeper thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def _run(self):
+        self.sweep()
+        while not self._stop_event.wait(self.sweep_interval):
+            self.sweep()
+    
+    def _load_new_sessions(self):
+        """Track sessions created since the last sweep (all active ones on the first)"""
+        table = self.session_model.__table__
+        query = select(table.c.id, table.c.last_activity).where(table.c.status == 'active')
+        if self._max_id is not None:
+            query = query.where(table.c.id > self._max_id)
+        
+        for session_id, last_activity in self.db.session.execute(query):
+            self.track(session_id, last_activity)
+            if self._max_id is None or session_id > self._max_id:
+                self._max_id = session_id
+        if self._max_id is None:
+            self._max_id = 0
+        self.db.session.commit()
+    
+    def _pop_due(self, now):
+        """Session ids whose current deadline has passed"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, session_id = heapq.heappop(self._heap)
+                if self._deadlines.get(session_id) == deadline:
+                    del self._deadlines[session_id]
+                    due.append(session_id)
+        return due
+    
+    def _expire(self, session_ids, now):
+        """Expire the still-idle sessions among `session_ids`; re-track the rest"""
+        table = self.session_model.__table__
+        cutoff = now - self.timeout
+        rows = self.db.session.execute(
+            select(table.c.id, table.c.user_id, table.c.last_activity, table.c.status)
+            .where(table.c.id.in_(session_ids))
+        ).all()
+        
+        idle = []
+        for row in rows:
+            if row.status != 'active':
+                continue
+            if row.last_activity is None or row.last_activity <= cutoff:
+                idle.append(row)
+            else:
+                self.track(row.id, row.last_activity)
+        if not idle:
+            self.db.session.commit()
+            return 0
+        
+        # Guarded so activity written since the read above keeps the session alive
+        result = self.db.session.execute(
+            table.update()
+            .where(table.c.id.in_([row.id for row in idle]))
+            .where(table.c.status == 'active')
+            .where((table.c.last_activity <= cutoff) | table.c.last_activity.is_(None))
+            .values(status='expired', ended_at=now)
+        )
+        self.db.session.commit()
+        
+        if self.session_cache is not None:
+            for row in idle:
+                self.session_cache.invalidate(row.user_id)
+        return result.rowcount
\ No newline at end of file
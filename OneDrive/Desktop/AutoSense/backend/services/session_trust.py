@@ -0,0 +1,138 @@
+import array
+import threading
+import time
+from collections import OrderedDict
+
+class SessionTrustState:
+    """Recent trust scores and feature vectors of one session, in fixed-size ring buffers"""
+    __slots__ = ('scores', 'features', 'count', 'low', 'ewma', 'skipped', 'updated_at')
+    
+    def __init__(self, window, n_features, initial=100.0):
+        self.scores = array.array('f', [0.0]) * window
+        self.features = array.array('f', [0.0]) * (window * n_features)
+        self.count = 0  # events seen; the next one goes to slot count % window
+        self.low = 0  # scores below the threshold among those in the window
+        self.ewma = initial
+        self.skipped = 0  # events since the last one picked for scoring (see ScoringScheduler)
+        self.updated_at = 0.0
+    
+    def push(self, score, vector, alpha, threshold):
+        """Add one event's score and features, overwriting the oldest once the window is full"""
+        window = len(self.scores)
+        slot = self.count % window
+        if self.count >= window and self.scores[slot] < threshold:
+            self.low -= 1
+        self.scores[slot] = score
+        # Compare the stored value so an overwritten slot is uncounted the same way
+        if self.scores[slot] < threshold:
+            self.low += 1
+        
+        width = len(vector)
+        self.features[slot * width:(slot + 1) * width] = array.array('f', vector)
+        self.count += 1
+        self.ewma += alpha * (score - self.ewma)
+    
+    def last_score(self):
+        """The most recent score, or None before the first"""
+        return self.scores[(self.count - 1) % len(self.scores)] if self.count else None
+    
+    def recent_scores(self):
+        """Scores in the window, oldest first"""
+        window = len(self.scores)
+        if self.count < window:
+            return self.scores[:self.count].tolist()
+        slot = self.count % window
+        return (self.scores[slot:] + self.scores[:slot]).tolist()
+    
+    def recent_features(self):
+        """Feature vectors in the window, oldest first"""
+        window = len(self.scores)
+        width = len(self.features) // window
+        slots = range(self.count) if self.count < window else [(self.count + i) % window for i in range(window)]
+        return [self.features[slot * width:(slot + 1) * width].tolist() for slot in slots]
+
+class SessionTrustTracker:
+    """Per-session trust built from a sliding window of recent event scores.
+    
+    A single low score no longer ends a session. Each session keeps its last
+    `window` scores and feature vectors in fixed-size arrays plus an
+    exponentially weighted average of its scores (seeded at full trust, since
+    the session just passed an OTP login). A session is ended when the
+    average falls below `threshold`, when `min_low` of the scores in the
+    window are below it, or at once on a score under `hard_floor`. Everything
+    lives in memory, so scoring never re-reads history from the database;
+    states idle longer than `idle_seconds` are dropped and at most
+    `max_sessions` are kept, least recently used first out.
+    """
+    
+    def __init__(self, features, window=16, alpha=0.3, threshold=70, min_low=4, hard_floor=20,
+                 max_sessions=100000, idle_seconds=1800):
+        self.features = list(features)
+        self.window = window
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_low = min_low
+        self.hard_floor = hard_floor
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.stats = {'sessions': 0, 'observed': 0, 'low_scores': 0, 'suppressed': 0, 'logouts': 0, 'evicted': 0}
+        self._states = OrderedDict()  # session key -> SessionTrustState, least recently used first
+        self._lock = threading.Lock()
+    
+    def observe(self, key, events, trust_scores, now=None):
+        """(logout, session trust score) after a session's new events, in order"""
+        now = time.monotonic() if now is None else now
+        logout = False
+        trust = None
+        low_scores = 0
+        with self._lock:
+            self._prune(now)
+            state = self._states.get(key)
+            if state is None:
+                state = SessionTrustState(self.window, len(self.features))
+                self._states[key] = state
+                if len(self._states) > self.max_sessions:
+                    self._states.popitem(last=False)
+                    self.stats['evicted'] += 1
+            else:
+                self._states.move_to_end(key)
+            state.updated_at = now
+            
+            for event, score in zip(events, trust_scores):
+                state.push(score, [float(event.get(feature) or 0) for feature in self.features], self.alpha, self.threshold)
+                if score < self.threshold:
+                    low_scores += 1
+                if logout:
+                    continue
+                if score < self.hard_floor:
+                    logout, trust = True, float(score)
+                elif state.ewma < self.threshold or state.low >= self.min_low:
+                    logout, trust = True, float(state.ewma)
+            
+            self.stats['sessions'] = len(self._states)
+            self.stats['observed'] += len(trust_scores)
+            self.stats['low_scores'] += low_scores
+            if logout:
+                self.stats['logouts'] += 1
+            else:
+                self.stats['suppressed'] += low_scores
+                trust = float(state.ewma)
+        return logout, round(trust, 2)
+    
+    def get(self, key):
+        """The session's state, or None"""
+        return self._states.get(key)
+    
+    def end(self, key):
+        """Forget an ended session"""
+        with self._lock:
+            self._states.pop(key, None)
+            self.stats['sessions'] = len(self._states)
+    
+    def _prune(self, now):
+        # Least recently used states sit at the front
+        while self._states:
+            key, state = next(iter(self._states.items()))
+            if now - state.updated_at <= self.idle_seconds:
+                break
+            del self._states[key]
\ No newline at end of file
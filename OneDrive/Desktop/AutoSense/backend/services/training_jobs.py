@@ -0,0 +1,217 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import multiprocessing
+import threading
+import uuid
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+from backend.services.keystroke_features import KEYSTROKE_FEATURES, extract_keystroke_features, has_keystroke_timings
+from backend.services.mouse_features import MOUSE_FEATURES, extract_mouse_features, has_mouse_trajectory
+
+BEHAVIOR_FEATURES = ['keystroke_speed', 'mouse_speed', 'idle_time', 'cursor_path_length']
+
+# Features derived server-side from a raw payload field:
+# (feature names, payload field, extractor, whether an event carries usable data)
+DERIVED_FEATURES = [
+    (KEYSTROKE_FEATURES, 'keystroke_data', extract_keystroke_features, has_keystroke_timings),
+    (MOUSE_FEATURES, 'mouse_data', extract_mouse_features, has_mouse_trajectory)
+]
+
+def select_features(behavior_data):
+    """Client-reported features plus every derived group all samples have raw data for"""
+    features = list(BEHAVIOR_FEATURES)
+    for names, _, _, has_raw_data in DERIVED_FEATURES:
+        if behavior_data and all(has_raw_data(event) for event in behavior_data):
+            features += names
+    return features
+
+def behavior_feature_matrix(behavior_events, features, fill=None):
+    """One row per event, columns in the model's feature order.
+    
+    Plain features are read off the event; derived features (keystroke
+    dynamics, mouse trajectory) are extracted from its raw `keystroke_data` /
+    `mouse_data` when the feature list asks for them. A window without raw
+    data for a group (idle, mouse-only, fewer than two keys) has nothing to
+    extract, so its derived columns are imputed rather than left at zero:
+    from `fill` (one value per feature, e.g. the model's training means) when
+    given, otherwise from the mean of the windows that do have raw data.
+    """
+    feature_data = np.zeros((len(behavior_events), len(features)))
+    if not behavior_events:
+        return feature_data
+    
+    derived_columns = []
+    for names, field, extract, has_raw_data in DERIVED_FEATURES:
+        columns = [i for i, feature in enumerate(features) if feature in names]
+        if not columns:
+            continue
+        derived_columns += columns
+        
+        # One extraction per event window covers the whole group
+        present = np.array([has_raw_data(event) for event in behavior_events])
+        if present.any():
+            extracted = np.nan_to_num(np.array([
+                extract(event.get(field)) for event, has_data in zip(behavior_events, present) if has_data
+            ]))
+            feature_data[np.ix_(present, columns)] = extracted[:, [names.index(features[i]) for i in columns]]
+        if not present.all():
+            if fill is not None:
+                feature_data[np.ix_(~present, columns)] = np.asarray(fill, dtype=float)[columns]
+            elif present.any():
+                feature_data[np.ix_(~present, columns)] = feature_data[np.ix_(present, columns)].mean(axis=0)
+    
+    plain_columns = [i for i in range(len(features)) if i not in derived_columns]
+    if plain_columns:
+        feature_data[:, plain_columns] = np.array([
+            [event.get(features[i], 0) or 0 for i in plain_columns]
+            for event in behavior_events
+        ], dtype=float)
+    
+    return np.nan_to_num(feature_data)
+
+def fit_behavior_model(behavior_data, features=None, n_jobs=None):
+    """Fit a scaler + IsolationForest on a user's behavior samples"""
+    features = features or select_features(behavior_data)
+    feature_data = behavior_feature_matrix(behavior_data, features)
+    
+    return fit_feature_matrix(feature_data, features, n_jobs=n_jobs)
+
+def fit_feature_matrix(feature_data, features=BEHAVIOR_FEATURES, n_jobs=None):
+    """Fit a scaler + IsolationForest on a samples x features array"""
+    # Normalize features
+    scaler = StandardScaler()
+    scaled_data = scaler.fit_transform(feature_data)
+    
+    # Train Isolation Forest; n_jobs builds trees in parallel
+    model = IsolationForest(contamination=0.1, random_state=42, n_jobs=n_jobs)
+    model.fit(scaled_data)
+    
+    return {
+        'model': model,
+        'scaler': scaler,
+        'features': features
+    }
+
+class LocalExecutor:
+    """Runs jobs inline in the calling thread; used for tests and single-process setups"""
+    
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def shutdown(self, wait=True):
+        pass
+
+class TrainingJobManager:
+    """Runs model fits off the request thread and swaps in the result when done.
+    
+    Jobs are fitted in a process pool (spawned lazily, so it is created after
+    gunicorn forks its workers) or inline with the local executor. Job state is
+    kept in the training_jobs table so any worker can answer status requests.
+    When a fit finishes `on_complete(user_id, model_data)` is called, which is
+    where the caller stores the model and replaces the cached copy.
+    """
+    
+    def __init__(self, app, db, job_model, on_complete, executor='process', max_workers=2):
+        self.app = app
+        self.db = db
+        self.job_model = job_model
+        self.on_complete = on_complete
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == 'process':
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                else:
+                    self._executor = LocalExecutor()
+            return self._executor
+    
+    def submit(self, user_id, behavior_data):
+        """Queue a training job and return its id straight away"""
+        job = self.job_model(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            status='queued',
+            sample_count=len(behavior_data)
+        )
+        self.db.session.add(job)
+        self.db.session.commit()
+        job_id = job.id
+        
+        try:
+            future = self.executor.submit(fit_behavior_model, behavior_data)
+        except Exception as e:
+            # The pool is broken or shut down: fail the job rather than leave it queued
+            self._reset_executor()
+            job.status = 'failed'
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            self.db.session.commit()
+            print(f"Error submitting training job: {e}")
+            return job_id
+        self._futures[job_id] = future
+        future.add_done_callback(lambda done: self._finish(job_id, user_id, done))
+        return job_id
+    
+    def status(self, job_id, user_id=None):
+        """Job record as a dict, or None if unknown (or owned by someone else)"""
+        query = self.job_model.query.filter_by(id=job_id)
+        if user_id is not None:
+            query = query.filter_by(user_id=user_id)
+        job = query.first()
+        if job is None:
+            return None
+        
+        job_data = job.to_dict()
+        future = self._futures.get(job_id)
+        if job_data['status'] == 'queued' and future is not None and future.running():
+            job_data['status'] = 'running'
+        return job_data
+    
+    def shutdown(self, wait=True):
+        """Stop the pool, optionally waiting for running fits"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+    
+    def _reset_executor(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+    
+    def _finish(self, job_id, user_id, future):
+        self._futures.pop(job_id, None)
+        with self.app.app_context():
+            job = self.db.session.get(self.job_model, job_id)
+            try:
+                self.on_complete(user_id, future.result())
+                job.status = 'completed'
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died; start a fresh pool for the next job
+                    self._reset_executor()
+                self.db.session.rollback()
+                job = self.db.session.get(self.job_model, job_id)
+                job.status = 'failed'
+                job.error = str(e)
+                print(f"Error training model: {e}")
+            job.finished_at = datetime.utcnow()
+            self.db.session.commit()
\ No newline at end of file
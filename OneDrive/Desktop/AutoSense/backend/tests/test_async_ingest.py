@@ -0,0 +1,208 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import json
+from types import SimpleNamespace
+import pytest
+from backend.services.async_ingest import AsyncBehaviorStore, AsyncIngestApp, async_database_url
+
+class MemoryStore:
+    """In-memory stand-in for AsyncBehaviorStore"""
+    
+    def __init__(self):
+        self.session = SimpleNamespace(id=1, session_token='token-1', jti='jti-1', created_at=datetime.now())
+        self.logged = []
+        self.ended = []
+    
+    async def active_session(self, user_id, jti):
+        await asyncio.sleep(0)
+        return self.session if jti == self.session.jti else None
+    
+    def touch(self, session, timestamp):
+        pass
+    
+    async def write_logs(self, rows):
+        self.logged += rows
+    
+    async def end_session(self, user_id, session, rows, behavior_data, trust_score):
+        self.logged += rows
+        self.ended.append((user_id, behavior_data, trust_score))
+        return True
+    
+    async def flush(self):
+        pass
+    
+    async def dispose(self):
+        pass
+
+def make_app(store, terminated):
+    def score(user_id, session, events):
+        scores = [event.get('score', 95.0) for event in events]
+        return scores, min(scores) < 20, min(scores)
+    
+    def build_row(user_id, session_token, event, trust_score, timestamp):
+        return {'user_id': user_id, 'session_id': session_token, 'trust_score': trust_score}
+    
+    return AsyncIngestApp(
+        store,
+        lambda token: (7, 'jti-1') if token == 'good' else int('rejected'),
+        score,
+        lambda user_id, event: 88.0,
+        build_row,
+        ThreadPoolExecutor(max_workers=2),
+        on_terminated=lambda user_id, session, trust_score: terminated.append(session.jti),
+        max_batch_events=3
+    )
+
+async def call(app, path, payload, token='good', method='POST'):
+    body = json.dumps(payload).encode()
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+    
+    async def receive():
+        return messages.pop(0)
+    
+    async def send(message):
+        sent.append(message)
+    
+    headers = [(b'authorization', f"Bearer {token}".encode())] if token else []
+    await app({'type': 'http', 'method': method, 'path': path, 'headers': headers}, receive, send)
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+def test_async_database_url():
+    """Test sync database URLs map to their async drivers"""
+    assert async_database_url('postgresql://u:p@db/authsense') == 'postgresql+asyncpg://u:p@db/authsense'
+    assert async_database_url('sqlite:///authsense.db') == 'sqlite+aiosqlite:///authsense.db'
+    assert async_database_url('mysql+aiomysql://db/x') == 'mysql+aiomysql://db/x'
+
+def test_ingest_routes_score_log_and_end_sessions():
+    """Test the ASGI routes authenticate, validate, buffer normal logs and commit logouts"""
+    store = MemoryStore()
+    terminated = []
+    app = make_app(store, terminated)
+    
+    async def scenario():
+        assert (await call(app, '/api/behavior/events/batch', [{}], token=None))[0] == 401
+        assert (await call(app, '/api/behavior/events/batch', [{}], token='forged'))[0] == 401
+        assert (await call(app, '/api/nowhere', {}))[0] == 404
+        assert (await call(app, '/api/behavior/events/batch', [{}] * 4))[0] == 413
+        
+        status, body = await call(app, '/api/behavior/events/batch', {'events': [{'score': 90.0}, {'score': 80.0}]})
+        assert status == 200 and body['action'] == 'continue' and body['trust_scores'] == [90.0, 80.0]
+        assert await call(app, '/api/ai/predict', {'keystroke_speed': 5}) == (200, {'trust_score': 88.0})
+        
+        status, body = await call(app, '/api/behavior/events', {'score': 10.0, 'location': 'X'})
+        assert status == 200 and body == {'action': 'logout', 'trust_score': 10.0, 'session_trust': 10.0}
+    
+    asyncio.run(scenario())
+    assert [row['trust_score'] for row in store.logged] == [90.0, 80.0, 10.0]
+    assert store.ended == [(7, {'score': 10.0, 'location': 'X'}, 10.0)]
+    assert terminated == ['jti-1']
+    assert app.stats['events'] == 3 and app.stats['logouts'] == 1
+
+def test_oversized_bodies_are_refused():
+    """Test bodies over the cap get a 413, by Content-Length or by the bytes actually sent"""
+    app = make_app(MemoryStore(), [])
+    app.max_body_bytes = 64
+    
+    async def send_body(chunks, content_length=None):
+        messages = [{'type': 'http.request', 'body': chunk, 'more_body': True} for chunk in chunks]
+        messages[-1]['more_body'] = False
+        sent = []
+        
+        async def receive():
+            return messages.pop(0)
+        
+        async def send(message):
+            sent.append(message)
+        
+        headers = [(b'authorization', b'Bearer good')]
+        if content_length is not None:
+            headers.append((b'content-length', str(content_length).encode()))
+        await app({'type': 'http', 'method': 'POST', 'path': '/api/behavior/events', 'headers': headers}, receive, send)
+        return sent[0]['status'], len(messages)
+    
+    async def scenario():
+        assert await send_body([b'{}'], content_length=1 << 20) == (413, 1)
+        assert await send_body([b' ' * 40, b' ' * 40, b'{}']) == (413, 1)
+        assert (await send_body([b'{"score": 90.0}']))[0] == 200
+    
+    asyncio.run(scenario())
+
+class FailingEngine:
+    """Async engine whose transactions always fail"""
+    
+    def begin(self):
+        raise ConnectionError('database down')
+
+def test_failed_flushes_keep_a_bounded_buffer():
+    """Test rows are re-queued after a failed flush, but never more than max_buffered_rows"""
+    store = AsyncBehaviorStore(FailingEngine(), None, None, None, None, None, None, batch_size=4, max_buffered_rows=10)
+    
+    async def scenario():
+        for n in range(8):
+            await store.write_logs([{'n': n * 3 + i} for i in range(3)])
+    
+    asyncio.run(scenario())
+    assert [row['n'] for row in store._rows] == list(range(14, 24))
+    assert store.stats['dropped'] == 14
+
+def test_store_writes_through_async_engine(tmp_path):
+    """Test buffered logs, counters, heartbeats and a termination land in the database"""
+    pytest.importorskip('aiosqlite')
+    pytest.importorskip('greenlet')
+    from flask import Flask
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from backend.config.database import db
+    from backend.models.user import User
+    from backend.models.session import Session
+    from backend.models.behavior import BehaviorLog
+    from backend.models.alert import Alert
+    from backend.models.email_outbox import EmailOutbox
+    from backend.models.behavior_stats import UserBehaviorStats
+    from backend.services.behavior_stats import BehaviorStatsStore
+    
+    path = tmp_path / 'ingest.db'
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    db.init_app(flask_app)
+    with flask_app.app_context():
+        db.create_all()
+        user = User(email='a@authsense.test', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Session(user_id=user.id, session_token='token-1', jti='jti-1', created_at=datetime.now(), last_activity=datetime(2020, 1, 1)))
+        db.session.commit()
+        user_id = user.id
+    
+    store = AsyncBehaviorStore(
+        create_async_engine(async_database_url(f"sqlite:///{path}")),
+        Session,
+        BehaviorLog,
+        Alert,
+        EmailOutbox,
+        User,
+        BehaviorStatsStore(db, UserBehaviorStats),
+        batch_size=2
+    )
+    
+    async def scenario():
+        assert await store.active_session(user_id, 'jti-other') is None
+        session = await store.active_session(user_id, 'jti-1')
+        now = datetime.now()
+        store.touch(session, now)
+        row = {'user_id': user_id, 'session_id': 'token-1', 'timestamp': now, 'trust_score': 95.0, 'is_anomaly': False}
+        await store.write_logs([row])
+        assert store.stats['rows_written'] == 0
+        await store.write_logs([row])
+        assert await store.end_session(user_id, session, [dict(row, trust_score=10.0, is_anomaly=True)], {}, 10.0)
+        await store.dispose()
+    
+    asyncio.run(scenario())
+    with flask_app.app_context():
+        assert BehaviorLog.query.count() == 3
+        assert db.session.get(UserBehaviorStats, user_id).event_count == 3
+        session = Session.query.one()
+        assert session.status == 'terminated' and session.last_activity.year > 2020
+        assert Alert.query.count() == 1 and EmailOutbox.query.count() == 1
+        db.drop_all()
\ No newline at end of file
@@ -0,0 +1,36 @@
+import numpy as np
+from backend.services.baseline_prefilter import BaselinePrefilter
+from backend.utils.helpers import HelperUtils
+
+FEATURES = ['keystroke_speed', 'mouse_speed', 'idle_time', 'cursor_path_length']
+
+def test_vectorized_score_matches_per_key_version():
+    """Test calculate_trust_scores gives calculate_trust_score's numbers, zeros included"""
+    rng = np.random.default_rng(3)
+    baselines = rng.uniform(0, 10, size=(200, 4)).round()
+    current = rng.uniform(0, 10, size=(200, 4)).round()
+    
+    expected = [
+        HelperUtils.calculate_trust_score(dict(zip(FEATURES, b)), dict(zip(FEATURES, c)))
+        for b, c in zip(baselines, current)
+    ]
+    assert np.allclose(HelperUtils.calculate_trust_scores(baselines, current), expected)
+
+def test_screen_sends_only_far_or_cold_events_to_the_model():
+    """Test events near a warm baseline are cleared and the rest escalate, across users in one call"""
+    prefilter = BaselinePrefilter(4, accept_score=85, min_events=5, capacity=2)
+    normal = np.array([5.0, 300.0, 2.0, 800.0])
+    for user_id in (1, 2, 3):
+        prefilter.update(user_id, np.tile(normal * user_id, (5, 1)))
+    prefilter.update(4, [normal])
+    
+    user_ids = [1, 2, 3, 1, 4, 99]
+    X = np.array([normal, normal * 2, normal * 3 * 1.05, normal * 3, normal, normal])
+    scores, needs_model = prefilter.screen(user_ids, X)
+    
+    assert needs_model.tolist() == [False, False, False, True, True, True]
+    assert scores[0] == 100.0 and round(scores[2]) == 95
+    assert prefilter.stats['users'] == 4 and prefilter.stats['cold'] == 2
+    
+    prefilter.forget(1)
+    assert prefilter.screen(1, normal)[1].tolist() == [True]
\ No newline at end of file
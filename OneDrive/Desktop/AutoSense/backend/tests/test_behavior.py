@@ -15,4 +15,104 @@ def client():
 def test_record_behavior(client):
     """Test behavior recording"""
     # This would require authentication
-    pass
\ No newline at end of file
+    pass
+
+def test_record_behavior_batch_requires_events(client):
+    """Test batch endpoint rejects an empty batch"""
+    from flask_jwt_extended import create_access_token
+    
+    with app.app_context():
+        token = create_access_token(identity=1)
+    
+    response = client.post('/api/behavior/events/batch', json={'events': []},
+                           headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 400
+
+def test_predict_anomaly_batch_matches_single(client):
+    """Test batch scoring returns the same scores as per-event scoring"""
+    from backend.app import train_behavior_model, predict_anomaly, predict_anomaly_batch
+    
+    history = [
+        {'keystroke_speed': 5 + i % 3, 'mouse_speed': 300 + i % 7,
+         'idle_time': 2 + i % 2, 'cursor_path_length': 800 + i % 11}
+        for i in range(50)
+    ]
+    events = history[:5] + [{'keystroke_speed': 50, 'mouse_speed': 1, 'idle_time': 60, 'cursor_path_length': 1}]
+    with app.app_context():
+        assert train_behavior_model(1, history)
+        assert predict_anomaly_batch(1, events) == [predict_anomaly(1, event) for event in events]
+
+def test_sse_stream_opens_with_ticket_not_access_token(client):
+    """Test the SSE stream takes a short-lived ticket and refuses access tokens in the URL"""
+    from flask_jwt_extended import create_access_token
+    
+    with app.app_context():
+        token = create_access_token(identity=1)
+    
+    assert client.get(f'/api/behavior/stream/events?jwt={token}').status_code == 401
+    assert client.get('/api/behavior/stream/events?ticket=forged').status_code == 401
+    
+    response = client.post('/api/behavior/stream/ticket', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    ticket = response.get_json()['ticket']
+    assert token not in ticket
+    
+    stream = client.get(f'/api/behavior/stream/events?ticket={ticket}', buffered=False)
+    assert stream.status_code == 200
+    assert next(stream.response).startswith(b'event: ready')
+    stream.close()
+
+def test_alert_ends_the_scored_session_not_the_newest(client):
+    """Test a logout terminates and revokes the session whose events were scored"""
+    from backend.app import revocations, session_cache, trigger_anomaly_alert
+    from backend.models.user import User
+    from backend.models.session import Session
+    
+    with app.app_context():
+        db.session.add(User(id=5, email='alerts@example.com', password_hash='x'))
+        db.session.add(Session(user_id=5, session_token='laptop', jti='jti-laptop'))
+        db.session.add(Session(user_id=5, session_token='phone', jti='jti-phone'))
+        db.session.commit()
+        
+        scored = session_cache.get_active(5, 'jti-laptop')
+        trigger_anomaly_alert(5, scored, {'keystroke_speed': 50}, 40.0)
+        
+        statuses = {session.session_token: session.status for session in Session.query.filter_by(user_id=5)}
+        assert statuses == {'laptop': 'terminated', 'phone': 'active'}
+        assert revocations.is_revoked('jti-laptop') and not revocations.is_revoked('jti-phone')
+
+def test_only_scored_events_train_the_online_baseline(client, monkeypatch):
+    """Test events the scheduler skipped are not folded into the online model"""
+    import backend.app as app_module
+    
+    updates = []
+    monkeypatch.setattr(app_module.scoring_scheduler, 'plan', lambda key, events: [True, False, False])
+    monkeypatch.setattr(app_module, 'cascade_scores', lambda user_id, events: [95.0] * len(events))
+    monkeypatch.setattr(app_module, 'update_online_model', lambda user_id, events: updates.append(events))
+    
+    events = [{'keystroke_speed': 5}, {'keystroke_speed': 6}, {'keystroke_speed': 7}]
+    with app.app_context():
+        trust_scores, logout, _ = app_module.score_behavior_events(8, None, events)
+    
+    assert trust_scores == [95.0, 95.0, 95.0] and not logout
+    assert updates == [[{'keystroke_speed': 5}]]
+
+
+def test_cascade_baseline_learns_only_from_model_scores(client):
+    """Test users without a model, or with derived-feature models, never feed or pass the baseline prefilter"""
+    from backend.app import baseline_prefilter, cascade_scores, predict_anomaly_batch, train_behavior_model
+    
+    events = [{'keystroke_speed': 5, 'mouse_speed': 300, 'idle_time': 2, 'cursor_path_length': 800}] * 3
+    with app.app_context():
+        assert cascade_scores(21, events) == [100.0] * 3
+        assert 21 not in baseline_prefilter._rows
+        
+        history = [
+            dict(events[0], keystroke_speed=5 + i % 3, keystroke_data={'down': [0, 100 + i], 'up': [40, 150 + i]})
+            for i in range(30)
+        ]
+        assert train_behavior_model(22, history)
+        screened = baseline_prefilter.stats['screened']
+        assert cascade_scores(22, history[:3]) == predict_anomaly_batch(22, history[:3])
+        assert baseline_prefilter.stats['screened'] == screened
+        assert 22 not in baseline_prefilter._rows
@@ -0,0 +1,66 @@
+from datetime import datetime
+import pytest
+from flask import Flask
+from backend.config.database import db
+from backend.models.user import User
+from backend.models.behavior import BehaviorLog
+from backend.models.behavior_rollup import BehaviorRollup
+from backend.models.behavior_stats import UserBehaviorStats
+from backend.models.log_partition import BehaviorLogPartition
+from backend.services.behavior_stats import BehaviorStatsStore
+from backend.services.log_partitions import BehaviorLogPartitions
+
+@pytest.fixture
+def app_context():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield
+        db.drop_all()
+
+def insert_logs(stats, timestamp, trust_scores, user_id=1):
+    """Insert logs and bump the stats in one transaction, like the write paths do"""
+    rows = [{
+        'user_id': user_id,
+        'session_id': f"session-{timestamp:%m}",
+        'timestamp': timestamp,
+        'trust_score': trust_score,
+        'is_anomaly': trust_score < 70
+    } for trust_score in trust_scores]
+    db.session.bulk_insert_mappings(BehaviorLog, rows)
+    stats.record(rows)
+    db.session.commit()
+
+def test_counters_follow_inserts(app_context):
+    """Test counters accumulate across batches with one upsert per batch"""
+    stats = BehaviorStatsStore(db, UserBehaviorStats)
+    insert_logs(stats, datetime(2026, 7, 1), [90, 80])
+    insert_logs(stats, datetime(2026, 7, 2), [60])
+    
+    row = stats.get(1).to_dict()
+    assert (row['event_count'], row['anomaly_count']) == (3, 1)
+    assert row['average_trust_score'] == pytest.approx(230 / 3)
+    assert row['trust_score_std'] == pytest.approx(12.472191, rel=1e-6)
+    assert row['last_seen'] == '2026-07-02T00:00:00'
+
+def test_check_and_rebuild_across_rollups(app_context):
+    """Test the checker spots drift and the backfill fixes it, including rolled-up logs"""
+    stats = BehaviorStatsStore(db, UserBehaviorStats)
+    partitions = BehaviorLogPartitions(db, BehaviorLog, BehaviorRollup, BehaviorLogPartition)
+    insert_logs(stats, datetime(2026, 6, 5), [90, 50])
+    partitions.maintain(90, now=datetime(2026, 7, 2))
+    insert_logs(stats, datetime(2026, 7, 5), [80])
+    partitions.maintain(10, now=datetime(2026, 7, 10))
+    
+    assert BehaviorRollup.query.count() == 1
+    assert stats.check(partitions) == {}
+    
+    stats.get(1).event_count = 7
+    db.session.commit()
+    assert stats.check(partitions) == {1: {'event_count': (7, 3)}}
+    
+    stats.rebuild(partitions)
+    assert stats.check(partitions) == {}
+    assert stats.get(1).trust_score_sumsq == pytest.approx(90 ** 2 + 50 ** 2 + 80 ** 2)
\ No newline at end of file
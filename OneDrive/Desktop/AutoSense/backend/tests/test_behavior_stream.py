@@ -0,0 +1,112 @@
+import json
+import queue
+import threading
+import pytest
+from backend.services.behavior_stream import BehaviorStreamHub, StreamTickets, parse_frame
+
+class QueueSocket:
+    """In-memory stand-in for a flask-sock connection"""
+    
+    def __init__(self):
+        self.inbound = queue.Queue()
+        self.sent = queue.Queue()
+        self.closed = threading.Event()
+    
+    def receive(self, timeout=None):
+        try:
+            return self.inbound.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def send(self, text):
+        self.sent.put(json.loads(text))
+    
+    def close(self):
+        self.closed.set()
+
+def make_hub(revoked=()):
+    def ingest(user_id, jti, events):
+        scores = [event.get('score', 95.0) for event in events]
+        return {'action': 'continue', 'trust_score': min(scores), 'trust_scores': scores}
+    
+    def authenticate(token):
+        if token != 'good':
+            raise ValueError('bad token')
+        return 7, 'jti-7', None
+    
+    return BehaviorStreamHub(ingest, authenticate, lambda jti: jti in revoked, max_events=3, poll_interval=0.01)
+
+def test_parse_frame_validates_batches():
+    """Test frames must be JSON event batches within the size limit"""
+    assert parse_frame('{"type": "events", "seq": 4, "events": [{"a": 1}]}') == (4, [{'a': 1}])
+    assert parse_frame('[{"a": 1}]') == (None, [{'a': 1}])
+    for bad in ('not json', '{"type": "auth"}', '{"type": "events", "events": []}', '[{}, {}, {}, {}]'):
+        try:
+            parse_frame(bad, max_events=3)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {bad!r}")
+
+def test_socket_streams_trust_and_receives_pushed_logout():
+    """Test one authenticated socket gets a reply per frame and is closed by a pushed logout"""
+    hub = make_hub()
+    ws = QueueSocket()
+    server = threading.Thread(target=hub.serve, args=(ws,))
+    server.start()
+    
+    ws.inbound.put(json.dumps({'type': 'auth', 'token': 'good'}))
+    assert ws.sent.get(timeout=2)['type'] == 'ready'
+    ws.inbound.put(json.dumps({'type': 'events', 'seq': 1, 'events': [{'score': 90.0}, {'score': 80.0}]}))
+    reply = ws.sent.get(timeout=2)
+    assert reply['type'] == 'trust' and reply['seq'] == 1 and reply['trust_score'] == 80.0
+    ws.inbound.put('nonsense')
+    assert ws.sent.get(timeout=2)['type'] == 'error'
+    assert hub.stats['connections'] == 1
+    
+    # An alert raised by any request of the user reaches the open socket
+    hub.terminate(7, 'Trust score dropped to 40%', 40.0)
+    assert ws.sent.get(timeout=2)['type'] == 'logout'
+    server.join(2)
+    assert ws.closed.is_set() and hub.stats['connections'] == 0
+    assert hub.stats['frames'] == 1 and hub.stats['bad_frames'] == 1
+
+def test_logout_reaches_only_the_ended_sessions_channels():
+    """Test terminating one token's session leaves the user's other streams open"""
+    hub = make_hub()
+    laptop = hub.open(7, 'jti-laptop')
+    phone = hub.open(7, 'jti-phone')
+    
+    hub.terminate(7, 'Trust score dropped to 40%', 40.0, jti='jti-laptop')
+    assert [message['type'] for message in laptop.drain()] == ['logout']
+    assert phone.drain() == []
+
+def test_rejected_tokens_and_sse_fallback():
+    """Test a bad token is refused and an SSE channel ends when its token is revoked elsewhere"""
+    hub = make_hub()
+    ws = QueueSocket()
+    ws.inbound.put(json.dumps({'type': 'auth', 'token': 'forged'}))
+    hub.serve(ws)
+    assert ws.sent.get_nowait()['type'] == 'error' and ws.closed.is_set()
+    assert hub.stats['opened'] == 0
+    
+    revoked = set()
+    hub = make_hub(revoked)
+    stream = hub.sse(hub.open(7, 'jti-7'))
+    assert next(stream).startswith('event: ready')
+    revoked.add('jti-7')
+    assert next(stream).startswith('event: logout')
+    assert list(stream) == []
+    assert hub.stats['connections'] == 0
+
+def test_stream_tickets_expire_and_cannot_be_forged():
+    """Test a ticket redeems to its user and token id, and forged or expired tickets are refused"""
+    tickets = StreamTickets('secret', ttl=30)
+    ticket = tickets.issue(7, 'jti-7', 1234)
+    assert tickets.redeem(ticket) == (7, 'jti-7', 1234)
+    
+    with pytest.raises(ValueError):
+        StreamTickets('other-secret').redeem(ticket)
+    with pytest.raises(ValueError):
+        StreamTickets('secret', ttl=-1).redeem(ticket)
+    with pytest.raises(ValueError):
+        tickets.redeem(None)
\ No newline at end of file
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+import smtplib
+import socket
+import threading
+import time
+import pytest
+from flask import Flask
+from flask_mail import Mail
+from backend.config.database import db
+from backend.models.user import User
+from backend.models.alert import Alert
+from backend.models.email_outbox import EmailOutbox
+from backend.services.email_outbox import OutboxMailer, alert_email
+
+@pytest.fixture
+def app(tmp_path):
+    # A file database: worker threads need their own connections
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'outbox.db'}"
+    app.config['MAIL_USERNAME'] = 'alerts@authsense.test'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+class SlowConnection:
+    """Stand-in for a Flask-Mail connection with a slow handshake and scripted failures"""
+    
+    def __init__(self, log, failures, delay):
+        self.log = log
+        self.failures = failures
+        self.delay = delay
+    
+    def __enter__(self):
+        time.sleep(self.delay)
+        self.log.append('connect')
+        return self
+    
+    def __exit__(self, *exc):
+        self.log.append('quit')
+    
+    def send(self, message):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.log.append(message.recipients[0])
+
+def queue_alert(mailer, user_id):
+    db.session.add(Alert(user_id=user_id, session_id='token', reason='Trust score dropped to 40%'))
+    mailer.enqueue(alert_email(user_id, f"user{user_id}@example.com", 'token', 'Unknown', {'trust_score': 40}, 'Trust score dropped to 40%'))
+
+def test_email_commits_with_the_alert_and_delivery_is_off_the_request(app):
+    """Test outbox rows follow the alert's transaction and queuing does not wait on SMTP"""
+    log = []
+    mailer = OutboxMailer(app, db, EmailOutbox, lambda: SlowConnection(log, [], delay=0.5), workers=1)
+    with app.app_context():
+        queue_alert(mailer, 1)
+        db.session.rollback()
+        assert EmailOutbox.query.count() == 0
+        
+        started = time.perf_counter()
+        for user_id in range(1, 4):
+            queue_alert(mailer, user_id)
+            db.session.commit()
+            mailer.notify()
+        assert time.perf_counter() - started < 0.25
+    
+    mailer.drain()
+    mailer.stop()
+    with app.app_context():
+        assert {message.status for message in EmailOutbox.query.all()} == {'sent'}
+    # One connection reused for all three messages
+    assert log == ['connect', 'user1@example.com', 'user2@example.com', 'user3@example.com', 'quit']
+
+def test_failures_are_retried_with_backoff(app):
+    """Test transient errors reschedule with growing delays and permanent ones fail"""
+    failures = [smtplib.SMTPServerDisconnected('gone'), smtplib.SMTPResponseException(421, b'busy'),
+                smtplib.SMTPRecipientsRefused({})]
+    log = []
+    mailer = OutboxMailer(app, db, EmailOutbox, lambda: SlowConnection(log, failures, delay=0), workers=1,
+                          backoff_base=60)
+    with app.app_context():
+        queue_alert(mailer, 1)
+        db.session.commit()
+    
+    mailer.drain()
+    with app.app_context():
+        message = EmailOutbox.query.one()
+        assert (message.status, message.attempts) == ('pending', 1)
+        first_delay = message.next_attempt_at - datetime.now()
+        assert timedelta(seconds=25) < first_delay <= timedelta(seconds=60)
+    
+    mailer.dispatch(now=datetime.now() + timedelta(hours=1))
+    mailer._queue.join()
+    with app.app_context():
+        message = EmailOutbox.query.one()
+        assert (message.status, message.attempts) == ('pending', 2)
+        assert message.next_attempt_at - datetime.now() > timedelta(seconds=55)
+    
+    mailer.dispatch(now=datetime.now() + timedelta(hours=2))
+    mailer._queue.join()
+    mailer.stop()
+    with app.app_context():
+        message = EmailOutbox.query.one()
+        assert (message.status, message.attempts) == ('failed', 3)
+    assert mailer.stats['retried'] == 2
+    assert mailer.stats['failed'] == 1
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def test_delivers_over_reused_smtp_connections(app):
+    """Test outbox messages reach a local SMTP server over one connection per worker"""
+    controller_module = pytest.importorskip('aiosmtpd.controller')
+    
+    class Handler:
+        def __init__(self):
+            self.messages = []
+            self.lock = threading.Lock()
+        
+        async def handle_DATA(self, server, session, envelope):
+            with self.lock:
+                self.messages.append((id(session), envelope.rcpt_tos[0], envelope.content))
+            return '250 OK'
+    
+    handler = Handler()
+    port = free_port()
+    controller = controller_module.Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    try:
+        app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=port, MAIL_USE_TLS=False, MAIL_USERNAME='alerts@authsense.test')
+        mail = Mail(app)
+        mailer = OutboxMailer(app, db, EmailOutbox, mail.connect, workers=2)
+        with app.app_context():
+            for user_id in range(1, 21):
+                queue_alert(mailer, user_id)
+            db.session.commit()
+        
+        assert mailer.drain() == 20
+        mailer.stop()
+    finally:
+        controller.stop()
+    
+    assert sorted(rcpt for _, rcpt, _ in handler.messages) == sorted(f"user{n}@example.com" for n in range(1, 21))
+    assert len({session for session, _, _ in handler.messages}) <= 2
+    assert b'session_log.json' in handler.messages[0][2]
+    assert mailer.stats['connections'] <= 2
\ No newline at end of file
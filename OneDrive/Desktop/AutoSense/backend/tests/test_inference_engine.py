@@ -0,0 +1,37 @@
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+from backend.services.inference_engine import CompiledIsolationForest
+
+def fit_model(max_features=1.0, n_samples=500):
+    rng = np.random.default_rng(0)
+    history = rng.normal([5, 300, 2, 800], [1, 30, 0.5, 50], size=(n_samples, 4))
+    scaler = StandardScaler()
+    model = IsolationForest(contamination=0.1, random_state=42, max_features=max_features)
+    model.fit(scaler.fit_transform(history))
+    return model, scaler, history
+
+def test_batch_scores_identical_to_sklearn():
+    """Test compiled scores match score_samples exactly"""
+    model, scaler, history = fit_model()
+    engine = CompiledIsolationForest.compile(model, scaler)
+    
+    rng = np.random.default_rng(1)
+    rows = np.vstack([history[:100], rng.normal([5, 300, 2, 800], [5, 300, 5, 500], size=(500, 4))])
+    
+    assert np.array_equal(engine.score_samples(rows), model.score_samples(scaler.transform(rows)))
+
+def test_single_row_identical_to_sklearn():
+    """Test single-row scoring, including 1-d input"""
+    model, scaler, history = fit_model(n_samples=40)
+    engine = CompiledIsolationForest.compile(model, scaler)
+    
+    for row in history[:20]:
+        assert engine.score_samples(row)[0] == model.score_samples(scaler.transform([row]))[0]
+
+def test_feature_subsampling():
+    """Test forests trained with max_features < 1 still match"""
+    model, scaler, history = fit_model(max_features=0.5)
+    engine = CompiledIsolationForest.compile(model, scaler)
+    
+    assert np.array_equal(engine.score_samples(history), model.score_samples(scaler.transform(history)))
\ No newline at end of file
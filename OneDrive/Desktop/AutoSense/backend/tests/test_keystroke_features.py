@@ -0,0 +1,50 @@
+import numpy as np
+from backend.services.keystroke_features import KEYSTROKE_FEATURES, extract_keystroke_features
+from backend.services.training_jobs import BEHAVIOR_FEATURES, behavior_feature_matrix, select_features
+
+def feature(values, name):
+    return values[KEYSTROKE_FEATURES.index(name)]
+
+def test_dwell_flight_and_digraph_timings():
+    """Test dwell, flight and digraph statistics from raw key timings"""
+    # Deliberately out of order; the extractor sorts by key-down time
+    values = extract_keystroke_features({'down': [200, 0, 100], 'up': [260, 50, 180]})
+    
+    assert feature(values, 'ks_dwell_mean') == np.mean([50, 80, 60])
+    assert feature(values, 'ks_flight_mean') == np.mean([50, 20])
+    assert feature(values, 'ks_digraph_mean') == 100
+    assert feature(values, 'ks_digraph_100_150') == 1.0
+    assert np.isclose(feature(values, 'ks_keys_per_sec'), 3 * 1000 / 260)
+
+def test_missing_or_short_timings_give_zero_features():
+    """Test events without usable key timings extract as zeros"""
+    for keystroke_data in (None, {}, {'down': [5], 'up': [40]}, {'down': 'abc', 'up': []}):
+        assert not extract_keystroke_features(keystroke_data).any()
+
+def test_extended_feature_matrix():
+    """Test keystroke columns are filled from raw data next to the plain features"""
+    events = [
+        {'keystroke_speed': 5, 'mouse_speed': 300, 'keystroke_data': {'down': [0, 100], 'up': [40, 150]}},
+        {'keystroke_speed': 6, 'mouse_speed': 310, 'keystroke_data': {'down': [0, 400], 'up': [60, 450]}}
+    ]
+    
+    assert select_features(events) == BEHAVIOR_FEATURES + KEYSTROKE_FEATURES
+    assert select_features(events + [{'keystroke_speed': 5}]) == BEHAVIOR_FEATURES
+    
+    matrix = behavior_feature_matrix(events, ['mouse_speed', 'ks_digraph_mean', 'idle_time'])
+    assert matrix.tolist() == [[300, 100, 0], [310, 400, 0]]
+
+def test_windows_without_timings_are_imputed():
+    """Test windows without key timings get the group mean, or the model's training means when given"""
+    events = [
+        {'keystroke_data': {'down': [0, 100], 'up': [40, 150]}},
+        {'keystroke_data': {'down': [0, 300], 'up': [60, 350]}},
+        {'keystroke_speed': 5},
+        {'keystroke_data': {'down': [5], 'up': [40]}}
+    ]
+    
+    matrix = behavior_feature_matrix(events, ['keystroke_speed', 'ks_digraph_mean'])
+    assert matrix[:, 1].tolist() == [100, 300, 200, 200]
+    
+    scored = behavior_feature_matrix(events[2:], ['keystroke_speed', 'ks_digraph_mean'], fill=[0, 150])
+    assert scored.tolist() == [[5, 150], [0, 150]]
\ No newline at end of file
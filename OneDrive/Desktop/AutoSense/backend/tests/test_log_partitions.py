@@ -0,0 +1,77 @@
+from datetime import datetime
+import pytest
+from flask import Flask
+from backend.config.database import db
+from backend.models.user import User
+from backend.models.behavior import BehaviorLog
+from backend.models.behavior_rollup import BehaviorRollup
+from backend.models.log_partition import BehaviorLogPartition
+from backend.services.log_partitions import BehaviorLogPartitions
+
+@pytest.fixture
+def partitions():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield BehaviorLogPartitions(db, BehaviorLog, BehaviorRollup, BehaviorLogPartition)
+        db.drop_all()
+
+def add_logs(timestamp, count, trust_score, user_id=1):
+    db.session.bulk_insert_mappings(BehaviorLog, [{
+        'user_id': user_id,
+        'session_id': f"session-{timestamp:%m}",
+        'timestamp': timestamp,
+        'trust_score': trust_score,
+        'is_anomaly': trust_score < 70,
+        'keystroke_speed': 5.0
+    } for _ in range(count)])
+    db.session.commit()
+
+def test_rotation_archives_previous_period(partitions):
+    """Test the live table is rotated once it holds last period's rows"""
+    add_logs(datetime(2026, 6, 5), 3, 90)
+    
+    assert partitions.maintain(90, now=datetime(2026, 6, 20)) == {'created': [], 'expired': []}
+    assert partitions.maintain(90, now=datetime(2026, 7, 2))['created'] == ['behavior_logs_p202606']
+    assert BehaviorLog.query.count() == 0
+    assert len(partitions.history(1)) == 3
+
+def test_rotation_moves_only_previous_periods(partitions):
+    """Test rotation leaves current-period rows live and archives each old month under its own name"""
+    add_logs(datetime(2026, 5, 20), 2, 90)
+    add_logs(datetime(2026, 6, 5), 3, 90)
+    add_logs(datetime(2026, 7, 1, 9), 4, 90)
+    
+    assert partitions.maintain(90, now=datetime(2026, 7, 2))['created'] == ['behavior_logs_p202605', 'behavior_logs_p202606']
+    assert BehaviorLog.query.count() == 4
+    assert [(partition.name, partition.range_start) for partition in BehaviorLogPartition.query.order_by('name')] == [
+        ('behavior_logs_p202605', datetime(2026, 5, 20)), ('behavior_logs_p202606', datetime(2026, 6, 5))
+    ]
+    assert partitions.user_stats(1)['event_count'] == 9
+    
+    # Late rows for an archived month are appended to its archive
+    add_logs(datetime(2026, 6, 30), 1, 90)
+    assert partitions.maintain(90, now=datetime(2026, 7, 3))['created'] == ['behavior_logs_p202606']
+    assert db.session.get(BehaviorLogPartition, 'behavior_logs_p202606').range_end == datetime(2026, 6, 30)
+    assert len(partitions.history(1)) == 10
+
+def test_retention_rolls_up_sessions(partitions):
+    """Test expired partitions become per-session rollups and reads span both"""
+    add_logs(datetime(2026, 6, 5), 3, 90)
+    partitions.maintain(90, now=datetime(2026, 7, 2))
+    add_logs(datetime(2026, 7, 5), 2, 60)
+    
+    assert partitions.maintain(20, now=datetime(2026, 7, 10))['expired'] == ['behavior_logs_p202606']
+    
+    rollup = BehaviorRollup.query.one()
+    assert (rollup.event_count, rollup.anomaly_count, rollup.trust_score_mean) == (3, 0, 90)
+    assert rollup.keystroke_speed_mean == 5.0
+    
+    history = [log.to_dict() for log in partitions.history(1)]
+    assert [log.get('rollup', False) for log in history] == [False, False, True]
+    
+    stats = partitions.user_stats(1)
+    assert (stats['event_count'], stats['anomaly_count']) == (5, 2)
+    assert stats['average_trust_score'] == pytest.approx((3 * 90 + 2 * 60) / 5)
\ No newline at end of file
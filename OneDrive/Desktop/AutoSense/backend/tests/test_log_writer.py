@@ -0,0 +1,80 @@
+import threading
+import time
+from backend.services.log_writer import BehaviorLogWriter
+
+def test_flushes_full_batches():
+    """Test rows are written in bulk once a batch fills up"""
+    batches = []
+    writer = BehaviorLogWriter(batches.append, batch_size=10, flush_interval=60)
+    
+    writer.submit_many([{'n': i} for i in range(25)])
+    deadline = time.time() + 2
+    while sum(len(batch) for batch in batches) < 20 and time.time() < deadline:
+        time.sleep(0.01)
+    
+    assert [len(batch) for batch in batches[:2]] == [10, 10]
+    writer.stop()
+    assert sum(len(batch) for batch in batches) == 25
+
+def test_flushes_on_interval():
+    """Test a partial batch is written after the flush interval"""
+    batches = []
+    writer = BehaviorLogWriter(batches.append, batch_size=100, flush_interval=0.05)
+    
+    assert writer.submit({'n': 1})
+    time.sleep(0.3)
+    
+    assert batches == [[{'n': 1}]]
+    writer.stop()
+
+def test_backpressure_hands_rows_back():
+    """Test rows that do not fit in a full buffer are returned to the caller"""
+    release = threading.Event()
+    writer = BehaviorLogWriter(lambda rows: release.wait(), batch_size=1,
+                               flush_interval=0.01, max_queue_size=2, put_timeout=0.01)
+    
+    rejected = writer.submit_many([{'n': i} for i in range(10)])
+    
+    assert rejected
+    assert writer.stats['rejected'] == len(rejected)
+    release.set()
+    writer.stop()
+    assert writer.stats['flushed'] + len(rejected) == 10
+
+def test_stats_count_every_row_across_threads():
+    """Test counters stay exact while request threads and the flusher update them together"""
+    writer = BehaviorLogWriter(lambda rows: None, batch_size=7, flush_interval=0.001)
+    
+    def submit():
+        for i in range(500):
+            writer.submit_many([{'n': i}, {'n': i}])
+    
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.stop()
+    assert writer.stats == {'queued': 8000, 'flushed': 8000, 'failed': 0, 'rejected': 0, 'dropped': 0}
+
+def test_failed_batches_are_retried_then_dropped():
+    """Test a failed batch is written on a later flush and only the overflow is dropped"""
+    batches = []
+    failing = [True]
+    
+    def write(rows):
+        if failing[0]:
+            raise RuntimeError('database unavailable')
+        batches.append(rows)
+    
+    writer = BehaviorLogWriter(write, batch_size=4, flush_interval=60, max_retry_rows=3)
+    for i in range(5):
+        writer.queue.put({'n': i})
+    writer.flush()
+    
+    assert writer.stats['failed'] == 4
+    assert writer.stats['dropped'] == 1
+    failing[0] = False
+    writer.flush()
+    assert [row['n'] for batch in batches for row in batch] == [1, 2, 3, 4]
+    writer.stop()
\ No newline at end of file
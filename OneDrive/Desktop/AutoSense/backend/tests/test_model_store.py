@@ -0,0 +1,97 @@
+from flask import Flask
+from backend.config.database import db
+from backend.models.ai_model import AIModel
+from backend.services.model_store import ModelCache, ModelStore
+
+def test_lru_eviction_by_entries():
+    """Test least recently used models are evicted past the entry budget"""
+    cache = ModelCache(max_entries=2)
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+    cache.get(1)
+    cache.put(3, 'c')
+    
+    assert cache.get(2) is None
+    assert cache.get(1) == 'a'
+    assert cache.get(3) == 'c'
+    assert cache.stats()['evictions'] == 1
+
+def test_eviction_by_bytes():
+    """Test the byte budget evicts old entries"""
+    cache = ModelCache(max_entries=100, max_bytes=100)
+    cache.put(1, 'a', size=60)
+    cache.put(2, 'b', size=60)
+    
+    stats = cache.stats()
+    assert stats['entries'] == 1
+    assert stats['bytes'] == 60
+    assert cache.get(2) == 'b'
+
+def test_hit_and_miss_counters():
+    """Test hit, miss and hit rate counters"""
+    cache = ModelCache()
+    cache.put(1, 'a')
+    cache.get(1)
+    cache.get(2)
+    
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert stats['hit_rate'] == 0.5
+
+def test_users_without_models_do_not_evict_models(tmp_path):
+    """Test negative entries have their own budget and counter, apart from cached models"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'models.db'}"
+    db.init_app(app)
+    
+    with app.app_context():
+        db.create_all()
+        store = ModelStore(db, AIModel, max_entries=1, max_missing_entries=3)
+        store.save(1, {'features': ['keystroke_speed']})
+        for user_id in range(2, 7):
+            assert store.load(user_id) is None
+        assert store.load(6) is None
+        assert store.load(1) == {'features': ['keystroke_speed']}
+        
+        stats = store.stats()
+        assert (stats['entries'], stats['hits'], stats['evictions']) == (1, 1, 0)
+        assert (stats['missing_entries'], stats['missing_hits'], stats['missing_evictions']) == (3, 1, 2)
+        
+        # A model trained for a user remembered as missing is served at once
+        store.save(6, {'features': []})
+        assert store.load(6) == {'features': []}
+        db.drop_all()
+
+def test_saves_from_two_workers_keep_one_row(tmp_path):
+    """Test saving a user's model from separate stores upserts a single ai_models row"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'upsert.db'}"
+    db.init_app(app)
+    
+    with app.app_context():
+        db.create_all()
+        ModelStore(db, AIModel).save(1, {'features': ['keystroke_speed']})
+        ModelStore(db, AIModel).save(1, {'features': ['mouse_speed']})
+        
+        assert AIModel.query.filter_by(user_id=1).count() == 1
+        assert ModelStore(db, AIModel).load(1) == {'features': ['mouse_speed']}
+        db.drop_all()
+
+def test_replacing_a_model_is_reported(tmp_path):
+    """Test on_replace fires on save and when revalidation finds a model saved elsewhere"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'replace.db'}"
+    db.init_app(app)
+    
+    with app.app_context():
+        db.create_all()
+        replaced = []
+        store = ModelStore(db, AIModel, revalidate_after=0, on_replace=replaced.append)
+        store.save(1, {'features': ['keystroke_speed']})
+        store.load(1)
+        assert replaced == [1]
+        
+        ModelStore(db, AIModel).save(1, {'features': ['mouse_speed']})
+        assert store.load(1) == {'features': ['mouse_speed']}
+        assert replaced == [1, 1]
+        db.drop_all()
@@ -0,0 +1,37 @@
+import numpy as np
+from backend.services.mouse_features import MOUSE_FEATURES, extract_mouse_features
+from backend.services.training_jobs import BEHAVIOR_FEATURES, behavior_feature_matrix, select_features
+
+def feature(values, name):
+    return values[MOUSE_FEATURES.index(name)]
+
+def test_straight_line_at_constant_speed():
+    """Test path, speed, straightness and curvature on a straight constant-speed move"""
+    values = extract_mouse_features({'x': [0, 3, 6, 9], 'y': [0, 4, 8, 12], 't': [0, 10, 20, 30]})
+    
+    assert feature(values, 'ms_path_length') == 15
+    assert feature(values, 'ms_straightness') == 1
+    assert feature(values, 'ms_velocity_mean') == 500  # 5 px per 10 ms
+    assert feature(values, 'ms_accel_mean') == 0
+    assert feature(values, 'ms_jerk_mean') == 0
+    assert feature(values, 'ms_turn_angle_mean') == 0
+
+def test_turns_and_pauses():
+    """Test a right-angle turn and a sampling gap are picked up"""
+    values = extract_mouse_features({'x': [0, 10, 10], 'y': [0, 0, 10], 't': [0, 10, 310]})
+    
+    assert np.isclose(feature(values, 'ms_turn_angle_mean'), np.pi / 2)
+    assert np.isclose(feature(values, 'ms_straightness'), np.hypot(10, 10) / 20)
+    assert feature(values, 'ms_pause_count') == 1
+    assert np.isclose(feature(values, 'ms_pause_fraction'), 300 / 310)
+
+def test_mouse_features_feed_the_model():
+    """Test events with raw trajectories get the mouse feature group"""
+    events = [
+        {'mouse_data': {'x': [0, 3], 'y': [0, 4], 't': [0, 10]}},
+        {'mouse_data': {'x': [0, 6], 'y': [0, 8], 't': [0, 10]}}
+    ]
+    
+    assert select_features(events) == BEHAVIOR_FEATURES + MOUSE_FEATURES
+    assert behavior_feature_matrix(events, ['ms_path_length', 'mouse_speed']).tolist() == [[5, 0], [10, 0]]
+    assert not extract_mouse_features({'x': [1], 'y': [1], 't': [1]}).any()
\ No newline at end of file
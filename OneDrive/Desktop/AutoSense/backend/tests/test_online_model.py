@@ -0,0 +1,107 @@
+import pickle
+import numpy as np
+from flask import Flask
+from backend.config.database import db
+from backend.models.ai_model import AIModel
+from backend.services.model_store import ModelStore
+from backend.services.online_model import OnlineBaselineModel, merge_online_models
+
+MEAN = np.array([5, 300, 2, 800])
+STD = np.array([1, 30, 0.5, 50])
+FEATURES = ['keystroke_speed', 'mouse_speed', 'idle_time', 'cursor_path_length']
+
+def trained_model(n_events=1000):
+    rng = np.random.default_rng(0)
+    model = OnlineBaselineModel(4)
+    for row in rng.normal(MEAN, STD, size=(n_events, 4)):
+        model.update(row)
+    return model
+
+def test_welford_matches_batch_statistics():
+    """Test running mean and variance equal the batch values"""
+    rng = np.random.default_rng(1)
+    rows = rng.normal(MEAN, STD, size=(500, 4))
+    model = OnlineBaselineModel(4)
+    model.update_many(rows)
+    
+    assert np.allclose(model.mean, rows.mean(axis=0))
+    assert np.allclose(model.m2 / model.count, rows.var(axis=0))
+
+def test_full_trust_during_warmup():
+    """Test a fresh model trusts everything until warmed up"""
+    model = OnlineBaselineModel(4, warmup=20)
+    for _ in range(5):
+        model.update(MEAN)
+    
+    assert model.trust_scores(MEAN * 10)[0] == 100.0
+
+def test_separates_normal_from_hijacked_behavior():
+    """Test normal events score high and shifted events score low"""
+    model = trained_model()
+    rng = np.random.default_rng(2)
+    
+    normal = model.trust_scores(rng.normal(MEAN, STD, size=(200, 4)))
+    hijacked = model.trust_scores(rng.normal(MEAN * [3, 0.3, 5, 0.4], STD, size=(200, 4)))
+    
+    assert np.mean(normal >= 70) > 0.95
+    assert np.all(hijacked < 70)
+
+def test_pickle_round_trip():
+    """Test the model survives persistence in ai_models"""
+    model = trained_model(50)
+    restored = pickle.loads(pickle.dumps(model))
+    
+    assert np.array_equal(restored.trust_scores(MEAN), model.trust_scores(MEAN))
+    restored.update(MEAN)
+    assert restored.count == 51
+
+def test_merge_combines_two_workers_updates():
+    """Test copies updated by two workers from one saved state merge into the statistics of every event"""
+    rng = np.random.default_rng(2)
+    saved_rows, rows_a, rows_b = (rng.normal(MEAN, STD, size=(n, 4)) for n in (200, 50, 80))
+    model = OnlineBaselineModel(4)
+    model.update_many(saved_rows)
+    blob = pickle.dumps({'model': model, 'features': FEATURES})
+    worker_a, worker_b = pickle.loads(blob), pickle.loads(blob)
+    worker_a['model'].update_many(rows_a)
+    worker_b['model'].update_many(rows_b)
+    
+    # Worker A saved first; worker B merges onto A's row
+    merged = merge_online_models(pickle.loads(pickle.dumps(worker_a)), worker_b)['model']
+    rows = np.vstack([saved_rows, rows_a, rows_b])
+    assert merged.count == 330
+    assert np.allclose(merged.mean, rows.mean(axis=0))
+    assert np.allclose(merged.m2 / merged.count, rows.var(axis=0))
+    assert np.all(merged.mad >= 0)
+
+def test_store_keeps_updates_from_every_worker(tmp_path):
+    """Test saves and revalidation merge, rather than overwrite, another worker's events"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'online.db'}"
+    db.init_app(app)
+    chunks = np.array_split(np.random.default_rng(3).normal(MEAN, STD, size=(300, 4)), 3)
+    
+    with app.app_context():
+        db.create_all()
+        first, second = (
+            ModelStore(db, AIModel, model_type='online', revalidate_after=0, merge=merge_online_models)
+            for _ in range(2)
+        )
+        first.save(1, {'model': OnlineBaselineModel(4), 'features': FEATURES})
+        first.load(1)['model'].update_many(chunks[0])
+        
+        model_data = second.load(1)
+        model_data['model'].update_many(chunks[1])
+        second.save(1, model_data)
+        
+        # The first worker sees the newer row without losing its unsaved events, then saves on top
+        model_data = first.load(1)
+        assert model_data['model'].count == 200
+        model_data['model'].update_many(chunks[2])
+        first.save(1, model_data)
+        
+        stored = ModelStore(db, AIModel, model_type='online').load(1)['model']
+        assert stored.count == 300
+        assert np.allclose(stored.mean, np.vstack(chunks).mean(axis=0))
+        assert second.load(1)['model'].count == 300
+        db.drop_all()
\ No newline at end of file
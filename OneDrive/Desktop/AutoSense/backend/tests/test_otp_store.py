@@ -0,0 +1,50 @@
+import types
+import pytest
+import backend.services.otp_store as otp_store_module
+from backend.services.otp_store import MemoryOTPBackend, OTPStore, make_otp_backend
+
+@pytest.fixture
+def store():
+    return OTPStore(MemoryOTPBackend(), 'secret', ttl_seconds=60, max_attempts=3)
+
+def test_codes_are_hashed_and_consumed_once(store):
+    """Test a code verifies once, only for its purpose, and is never stored in plain text"""
+    code = store.issue('login', 'User@Example.com')
+    assert len(code) == 6 and code.isdigit()
+    assert code not in str(store.backend._entries)
+    
+    assert not store.verify('signup', 'user@example.com', code)
+    assert store.verify('login', 'user@example.com', code)
+    assert not store.verify('login', 'user@example.com', code)
+
+def test_wrong_guesses_lock_the_code(store):
+    """Test the code is discarded after max_attempts wrong guesses"""
+    code = store.issue('login', 'user@example.com')
+    wrong = '000000' if code != '000000' else '111111'
+    for _ in range(3):
+        assert not store.verify('login', 'user@example.com', wrong)
+    assert not store.verify('login', 'user@example.com', code)
+    assert store.stats['locked'] == 1
+
+def test_codes_expire(monkeypatch, store):
+    """Test codes stop verifying after the TTL and expired entries are purged"""
+    clock = [1000.0]
+    monkeypatch.setattr(otp_store_module, 'time', types.SimpleNamespace(monotonic=lambda: clock[0]))
+    backend = MemoryOTPBackend(purge_every=2)
+    store = OTPStore(backend, 'secret', ttl_seconds=60)
+    
+    code = store.issue('login', 'a@example.com')
+    clock[0] += 61
+    assert not store.verify('login', 'a@example.com', code)
+    
+    store.issue('login', 'b@example.com')
+    clock[0] += 61
+    store.issue('login', 'c@example.com')
+    store.issue('login', 'd@example.com')
+    assert len(backend) == 2
+
+def test_memory_store_refused_for_several_workers():
+    """Test a per-process store is only used when a single worker serves the app"""
+    assert isinstance(make_otp_backend('memory'), MemoryOTPBackend)
+    with pytest.raises(ValueError, match='redis://'):
+        make_otp_backend('memory', workers=4)
\ No newline at end of file
@@ -0,0 +1,47 @@
+from concurrent.futures import Future
+import pytest
+from werkzeug.security import generate_password_hash
+from backend.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+# Low iteration counts keep the tests fast; the hashing code path is the same
+FAST = 'pbkdf2:sha256:1000'
+
+def test_hash_and_verify():
+    """Test hashes use the configured method and verify only the right password"""
+    hasher = PasswordHasher(method=FAST, executor='local')
+    password_hash = hasher.hash('TestPass123!')
+    assert password_hash.startswith(FAST + '$')
+    assert hasher.verify(password_hash, 'TestPass123!') == (True, False)
+    assert hasher.verify(password_hash, 'wrong') == (False, False)
+
+def test_old_parameters_are_flagged_for_rehash():
+    """Test a correct password hashed with other parameters asks for a rehash"""
+    hasher = PasswordHasher(method='pbkdf2:sha256:2000', executor='local')
+    old_hash = generate_password_hash('TestPass123!', method=FAST)
+    assert hasher.verify(old_hash, 'TestPass123!') == (True, True)
+    assert hasher.verify(old_hash, 'wrong') == (False, False)
+    assert hasher.stats['rehash_needed'] == 1
+
+def test_full_queue_is_rejected():
+    """Test callers get PasswordHasherBusy instead of queuing without bound"""
+    hasher = PasswordHasher(method=FAST, executor='local', max_pending=1, queue_timeout=0.01)
+    hasher._slots.acquire()
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash('TestPass123!')
+    hasher._slots.release()
+    assert hasher.hash('TestPass123!')
+    assert hasher.stats['busy'] == 1
+
+class StalledExecutor:
+    """Accepts work and never finishes it"""
+    
+    def submit(self, fn, *args):
+        return Future()
+
+def test_slow_operation_is_reported_busy():
+    """Test an operation past the timeout raises PasswordHasherBusy, not a bare TimeoutError"""
+    hasher = PasswordHasher(method=FAST, executor='local', timeout=0.01)
+    hasher._executor = StalledExecutor()
+    with pytest.raises(PasswordHasherBusy):
+        hasher.verify('hash', 'TestPass123!')
+    assert hasher.stats['timeouts'] == 1
\ No newline at end of file
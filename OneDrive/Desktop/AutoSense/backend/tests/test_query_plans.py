@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+import pickle
+import re
+import pytest
+from flask import Flask, current_app
+from sqlalchemy import event
+from backend.config.database import db
+from backend.models.user import User
+from backend.models.session import Session
+from backend.models.behavior import BehaviorLog
+from backend.models.alert import Alert
+from backend.models.ai_model import AIModel
+from backend.models.training_job import TrainingJob
+from backend.models.behavior_rollup import BehaviorRollup
+from backend.models.behavior_stats import UserBehaviorStats
+from backend.models.log_partition import BehaviorLogPartition
+from backend.models.email_outbox import EmailOutbox
+from backend.services.admin_service import AdminService
+from backend.services.bahavior_service import BehaviorService, behavior_stats, log_partitions
+from backend.services.model_store import ModelStore
+from backend.services.retrain_service import FleetRetrainer
+from backend.services.session_reaper import SessionReaper
+from backend.services.email_outbox import OutboxMailer
+from backend.services.revocation_index import RevocationIndex
+from backend.services.session_cache import ActiveSessionCache
+
+N_USERS = 2000
+LOGS_PER_USER = 25
+START = datetime(2026, 1, 1)
+
+@pytest.fixture(scope='module')
+def seeded_app(tmp_path_factory):
+    """SQLite file seeded with enough rows that the planner's choices matter"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    db.init_app(app)
+    
+    with app.app_context():
+        db.create_all()
+        user_ids = range(1, N_USERS + 1)
+        db.session.bulk_insert_mappings(User, [
+            {'id': user_id, 'email': f"user{user_id}@example.com", 'password_hash': 'x'}
+            for user_id in user_ids
+        ])
+        db.session.bulk_insert_mappings(Session, [
+            {'user_id': user_id, 'session_token': f"token-{user_id}-{n}", 'jti': f"jti-{user_id}-{n}",
+             'status': 'active' if n == 2 else 'terminated', 'created_at': START + timedelta(days=n)}
+            for user_id in user_ids for n in range(3)
+        ])
+        db.session.bulk_insert_mappings(BehaviorLog, [
+            {'user_id': user_id, 'session_id': f"token-{user_id}-2", 'timestamp': START + timedelta(minutes=n),
+             'trust_score': 90.0, 'is_anomaly': False, 'keystroke_speed': 5.0}
+            for user_id in user_ids for n in range(LOGS_PER_USER)
+        ])
+        db.session.bulk_insert_mappings(Alert, [
+            {'user_id': user_id, 'session_id': f"token-{user_id}-2", 'reason': 'test', 'timestamp': START}
+            for user_id in user_ids
+        ])
+        db.session.bulk_insert_mappings(AIModel, [
+            {'user_id': user_id, 'model_type': 'isolation_forest', 'model_data': pickle.dumps({'features': []})}
+            for user_id in user_ids
+        ])
+        db.session.bulk_insert_mappings(BehaviorRollup, [
+            {'user_id': user_id, 'session_id': f"token-{user_id}-0", 'partition_name': 'behavior_logs_p202512',
+             'event_count': 10, 'anomaly_count': 0, 'last_seen': START}
+            for user_id in user_ids
+        ])
+        db.session.bulk_insert_mappings(UserBehaviorStats, [
+            {'user_id': user_id, 'event_count': LOGS_PER_USER} for user_id in user_ids
+        ])
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+USER_ID = N_USERS // 2
+EMAIL = f"user{USER_ID}@example.com"
+
+def revocation_sync():
+    """An incremental sync of revoked tokens"""
+    index = RevocationIndex(current_app._get_current_object(), db, Session)
+    index._watermark = START
+    index.sync(now=START + timedelta(seconds=2))
+
+def reaper_tick():
+    """A steady-state sweep: pick up new sessions, then expire a due batch"""
+    reaper = SessionReaper(None, db, Session)
+    reaper._max_id = N_USERS * 3 - 10
+    reaper._load_new_sessions()
+    reaper._expire(list(range(USER_ID, USER_ID + 50)), START + timedelta(days=30))
+
+def model_revalidation():
+    """A cached model past its revalidation interval: only updated_at is re-read"""
+    store = ModelStore(db, AIModel, revalidate_after=0)
+    store.load(USER_ID)
+    store.load(USER_ID)
+
+def behavior_stats_upsert():
+    """The per-user counter upsert a batch of inserted log rows issues"""
+    behavior_stats.record([{'user_id': USER_ID, 'timestamp': START, 'trust_score': 90.0, 'is_anomaly': False}])
+
+# Every read/update issued on the request and maintenance paths, as the
+# routes, controllers and services issue them
+HOT_QUERIES = {
+    'user_by_email': lambda: User.query.filter_by(email=EMAIL).first(),
+    'user_by_id': lambda: db.session.get(User, USER_ID),
+    'active_session': lambda: Session.query.filter_by(user_id=USER_ID, status='active').first(),
+    'active_session_by_jti': lambda: ActiveSessionCache(None, db, Session).get_active(USER_ID, f"jti-{USER_ID}-2"),
+    'latest_session': lambda: Session.query.filter_by(user_id=USER_ID).order_by(Session.created_at.desc()).first(),
+    'recent_sessions': lambda: Session.query.filter_by(user_id=USER_ID).order_by(Session.created_at.desc()).limit(5).all(),
+    'session_by_token': lambda: BehaviorService.update_session_activity(f"token-{USER_ID}-2"),
+    'last_activity_update': lambda: db.session.execute(
+        Session.__table__.update()
+        .where(Session.__table__.c.session_token == f"token-{USER_ID}-2")
+        .values(last_activity=START)
+    ),
+    'recent_user_alerts': lambda: Alert.query.filter_by(user_id=USER_ID).order_by(Alert.timestamp.desc()).limit(5).all(),
+    'admin_alerts': lambda: AdminService.get_all_alerts(50),
+    'behavior_history': lambda: BehaviorService.get_user_behavior_history(USER_ID, 100),
+    'admin_user_stats': lambda: AdminService.get_user_behavior_stats(USER_ID),
+    'partition_user_stats': lambda: log_partitions.user_stats(USER_ID),
+    'partition_rotation_check': lambda: log_partitions.rotate(datetime(2000, 1, 1)),
+    'behavior_stats_upsert': behavior_stats_upsert,
+    'behavior_stats_check': lambda: behavior_stats.expected_totals(log_partitions, user_ids=[USER_ID]),
+    'model_load': lambda: ModelStore(db, AIModel).load(USER_ID),
+    'model_revalidation': model_revalidation,
+    'training_job_status': lambda: TrainingJob.query.filter_by(id='job', user_id=USER_ID).first(),
+    'retrain_user_page': lambda: next(FleetRetrainer(db, BehaviorLog, AIModel, write_batch_size=100)._user_pages()),
+    'session_reaper_tick': reaper_tick,
+    'revocation_sync': revocation_sync,
+    'outbox_claim': lambda: OutboxMailer(current_app._get_current_object(), db, EmailOutbox, None).dispatch(),
+    'retrain_stream': lambda: list(FleetRetrainer(db, BehaviorLog, AIModel)._stream_users([USER_ID, USER_ID + 1]))
+}
+
+def issued_statements(func):
+    """SELECT/UPDATE/DELETE and upsert statements (with parameters) a callable sends to the database"""
+    statements = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if re.match(r'\s*(SELECT|UPDATE|DELETE)\b|\s*INSERT\b.*\bON CONFLICT\b', statement, re.IGNORECASE | re.DOTALL):
+            statements.append((statement, parameters))
+    
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+        db.session.rollback()
+    return statements
+
+def full_table_scans(statement, parameters):
+    """Plan steps that walk a whole table rather than an index"""
+    plan = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    scans = []
+    for *_, detail in plan:
+        match = re.match(r'SCAN (?:TABLE )?(\w+)(.*)', detail)
+        if match and match.group(1) in db.metadata.tables and 'INDEX' not in match.group(2):
+            scans.append(detail)
+    return scans
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(seeded_app, name):
+    """Test every hot-path query is planned against an index, not a full table scan"""
+    with seeded_app.app_context():
+        statements = issued_statements(HOT_QUERIES[name])
+        assert statements, f"{name} issued no queries"
+        
+        for statement, parameters in statements:
+            assert full_table_scans(statement, parameters) == [], statement
+
+def test_full_scan_is_detected(seeded_app):
+    """Test the checker flags a query no index can serve"""
+    with seeded_app.app_context():
+        statements = issued_statements(lambda: BehaviorLog.query.filter_by(trust_score=50.0).all())
+        assert full_table_scans(*statements[0])
\ No newline at end of file
@@ -0,0 +1,76 @@
+from flask import Flask, jsonify
+from backend.middleware.rate_limit_middleware import rate_limit, trust_proxy_hops
+from backend.services.rate_limiter import MemoryBucketBackend, TokenBucketLimiter
+
+def test_bucket_allows_burst_then_refills():
+    """Test a bucket serves its burst, rejects with a retry hint, and refills over time"""
+    backend = MemoryBucketBackend()
+    results = [backend.take('ip:1', rate=1.0, capacity=3, now=100.0) for _ in range(4)]
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert results[-1][1] == 1.0
+    
+    assert backend.take('ip:1', rate=1.0, capacity=3, now=101.0)[0]
+    assert not backend.take('ip:1', rate=1.0, capacity=3, now=101.0)[0]
+    assert backend.take('ip:2', rate=1.0, capacity=3, now=101.0)[0]
+
+def test_full_buckets_are_pruned():
+    """Test refilled buckets are dropped so memory tracks only active keys"""
+    backend = MemoryBucketBackend(prune_every=3)
+    backend.take('a', rate=1.0, capacity=2, now=0.0)
+    backend.take('b', rate=1.0, capacity=2, now=0.0)
+    backend.take('c', rate=1.0, capacity=2, now=10.0)
+    assert len(backend) == 1
+
+class BrokenBackend:
+    def take(self, *args):
+        raise ConnectionError('redis down')
+
+def test_over_limit_requests_never_reach_the_view():
+    """Test the decorator answers 429 for an exhausted email before the view runs"""
+    limiter = TokenBucketLimiter(MemoryBucketBackend(), {'ip': (60, 100), 'email': (1, 2)})
+    app = Flask(__name__)
+    calls = []
+    
+    @app.route('/login', methods=['POST'])
+    @rate_limit(limiter, 'login')
+    def login():
+        calls.append(1)
+        return jsonify({}), 200
+    
+    client = app.test_client()
+    codes = [client.post('/login', json={'email': 'User@Example.com'}).status_code for _ in range(3)]
+    assert codes == [200, 200, 429]
+    assert len(calls) == 2
+    
+    response = client.post('/login', json={'email': 'user@example.com'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert client.post('/login', json={'email': 'other@example.com'}).status_code == 200
+    assert limiter.stats['email'] == {'allowed': 3, 'rejected': 2}
+    
+    # A failing shared backend lets requests through rather than locking users out
+    limiter.backend = BrokenBackend()
+    assert client.post('/login', json={'email': 'user@example.com'}).status_code == 200
+    assert limiter.stats['errors'] == 2
+
+def test_per_ip_buckets_see_clients_behind_trusted_proxies():
+    """Test the IP rule keys on X-Forwarded-For from trusted hops, not on the proxy address"""
+    limiter = TokenBucketLimiter(MemoryBucketBackend(), {'ip': (1, 1)})
+    app = Flask(__name__)
+    trust_proxy_hops(app, 1)
+    
+    @app.route('/login', methods=['POST'])
+    @rate_limit(limiter, 'login')
+    def login():
+        return jsonify({}), 200
+    
+    client = app.test_client()
+    
+    def forwarded(ip):
+        return client.post('/login', headers={'X-Forwarded-For': ip}).status_code
+    
+    assert [forwarded('203.0.113.1'), forwarded('203.0.113.2'), forwarded('203.0.113.1')] == [200, 200, 429]
+    
+    # Only the last hop is trusted; a client-supplied address in front of it is ignored
+    assert forwarded('198.51.100.9, 203.0.113.3') == 200
+    assert forwarded('198.51.100.10, 203.0.113.3') == 429
\ No newline at end of file
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+import json
+import pickle
+import pytest
+from flask import Flask
+from backend.config.database import db
+from backend.models.user import User
+from backend.models.behavior import BehaviorLog
+from backend.models.ai_model import AIModel
+from backend.models.behavior_rollup import BehaviorRollup
+from backend.models.log_partition import BehaviorLogPartition
+from backend.services.keystroke_features import KEYSTROKE_FEATURES
+from backend.services.log_partitions import BehaviorLogPartitions
+from backend.services.retrain_service import FleetRetrainer
+from backend.services.sample_codec import encode_row_samples
+from backend.services.training_jobs import BEHAVIOR_FEATURES
+
+@pytest.fixture
+def partitions():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield BehaviorLogPartitions(db, BehaviorLog, BehaviorRollup, BehaviorLogPartition)
+        db.drop_all()
+
+def add_logs(user_id, start, count):
+    """Accepted events with stored feature values and raw key timings"""
+    rows = []
+    for i in range(count):
+        down = [n * (120 + i % 5) for n in range(6)]
+        behavior_data = {'keystroke_data': {'down': down, 'up': [t + 80 + i % 3 for t in down]}, 'mouse_data': {}}
+        rows.append(dict(
+            encode_row_samples(behavior_data),
+            user_id=user_id,
+            session_id=f"session-{user_id}",
+            timestamp=start + timedelta(minutes=i),
+            is_anomaly=False,
+            keystroke_speed=5.0 + i % 3,
+            mouse_speed=300.0 + i % 7,
+            idle_time=2.0,
+            cursor_path_length=800.0 + i % 11
+        ))
+    db.session.bulk_insert_mappings(BehaviorLog, rows)
+    db.session.commit()
+
+def add_model(user_id, features):
+    db.session.add(AIModel(user_id=user_id, model_type='isolation_forest',
+                           model_data=pickle.dumps({'features': features}), features=json.dumps(features)))
+    db.session.commit()
+
+def stored_model(user_id):
+    row = AIModel.query.filter_by(user_id=user_id, model_type='isolation_forest').one()
+    return json.loads(row.features), pickle.loads(row.model_data)
+
+def test_retrain_keeps_each_users_features(partitions):
+    """Test users keep their feature set, new users get derived features, and fits run in a spawn pool"""
+    for user_id in (1, 2, 3):
+        db.session.add(User(id=user_id, email=f"user{user_id}@example.com", password_hash='x'))
+        add_logs(user_id, datetime(2026, 7, 1), 30)
+    add_model(1, BEHAVIOR_FEATURES)
+    add_model(2, BEHAVIOR_FEATURES + KEYSTROKE_FEATURES)
+    
+    stats = FleetRetrainer(db, BehaviorLog, AIModel, workers=1, partitions=partitions).run()
+    
+    assert (stats['users'], stats['failed'], stats['last_error']) == (3, 0, None)
+    assert stored_model(1)[0] == BEHAVIOR_FEATURES
+    assert stored_model(2)[0] == BEHAVIOR_FEATURES + KEYSTROKE_FEATURES
+    features, model_data = stored_model(3)
+    assert features == model_data['features'] == BEHAVIOR_FEATURES + KEYSTROKE_FEATURES
+    assert model_data['scaler'].mean_.shape == (len(features),)
+
+def test_retrain_reads_rotated_partitions(partitions):
+    """Test rows moved to an archive partition are still trained on"""
+    db.session.add(User(id=1, email='user1@example.com', password_hash='x'))
+    add_logs(1, datetime(2026, 6, 5), 15)
+    partitions.maintain(90, now=datetime(2026, 7, 2))
+    add_logs(1, datetime(2026, 7, 5), 15)
+    add_model(1, BEHAVIOR_FEATURES)
+    
+    retrainer = FleetRetrainer(db, BehaviorLog, AIModel, workers=1, partitions=partitions)
+    assert [user_id for user_id, _, _ in retrainer._stream_users([1])] == [1]
+    assert len(next(retrainer._stream_users([1]))[1]) == 30
+    assert list(retrainer._user_pages()) == [[1]]
+    
+    live_only = FleetRetrainer(db, BehaviorLog, AIModel, workers=1)
+    assert len(next(live_only._stream_users([1]))[1]) == 15
\ No newline at end of file
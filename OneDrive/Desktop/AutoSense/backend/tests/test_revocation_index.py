@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, get_jti, jwt_required
+from backend.config.database import db
+from backend.models.user import User
+from backend.models.session import Session
+from backend.services.revocation_index import RevocationIndex
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-for-revocation-tests'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+def add_session(n, ended_at=None):
+    session = Session(user_id=n, session_token=f"token-{n}", jti=f"jti-{n}", created_at=ended_at or NOW,
+                      status='terminated' if ended_at else 'active', ended_at=ended_at)
+    db.session.add(session)
+    db.session.commit()
+
+def test_sync_is_incremental_and_prunes_expired_tokens(app):
+    """Test syncs pick up newly ended sessions only and forget tokens past their lifetime"""
+    index = RevocationIndex(app, db, Session, token_lifetime=timedelta(minutes=15))
+    with app.app_context():
+        add_session(1, ended_at=NOW - timedelta(hours=1))  # token long expired
+        add_session(2, ended_at=NOW - timedelta(minutes=5))
+        add_session(3)
+    
+    assert index.sync(now=NOW) == 1
+    assert index.is_revoked('jti-2')
+    assert not index.is_revoked('jti-1') and not index.is_revoked('jti-3')
+    
+    with app.app_context():
+        add_session(4, ended_at=NOW + timedelta(minutes=1))
+    index.sync(now=NOW + timedelta(minutes=1))
+    assert index.is_revoked('jti-4')
+    assert index.stats['revoked'] == 2
+    
+    # Session 2's token was issued at NOW - 5min, so it has expired by NOW + 10min
+    index.sync(now=NOW + timedelta(minutes=11))
+    assert not index.is_revoked('jti-2')
+    assert index.is_revoked('jti-4')
+    assert index.stats['pruned'] == 1
+
+def test_revoked_tokens_are_rejected_by_jwt_required(app):
+    """Test the blocklist loader turns a terminated session's token away"""
+    jwt = JWTManager(app)
+    index = RevocationIndex(app, db, Session)
+    
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return index.is_revoked(jwt_payload['jti'])
+    
+    @app.route('/protected')
+    @jwt_required()
+    def protected():
+        return jsonify({}), 200
+    
+    with app.app_context():
+        token = create_access_token(identity='1')
+        db.session.add(Session(user_id=1, session_token=token, jti=get_jti(token)))
+        db.session.commit()
+    
+    client = app.test_client()
+    headers = {'Authorization': f"Bearer {token}"}
+    assert client.get('/protected', headers=headers).status_code == 200
+    
+    # Terminated by another worker: visible after the next sync
+    with app.app_context():
+        Session.query.update({'status': 'terminated', 'ended_at': datetime.now()})
+        db.session.commit()
+    index.sync()
+    assert client.get('/protected', headers=headers).status_code == 401
\ No newline at end of file
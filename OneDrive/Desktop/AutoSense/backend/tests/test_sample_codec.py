@@ -0,0 +1,48 @@
+import json
+import numpy as np
+import pytest
+from backend.services.keystroke_features import extract_keystroke_features
+from backend.services.sample_codec import _time_column, decode_samples, encode_keystrokes, encode_mouse, encode_row_samples, read_samples
+
+def test_keystroke_round_trip():
+    """Test key timings survive encoding at microsecond precision"""
+    keystroke_data = {'down': [1000.25, 1180.5, 1300.0], 'up': [1090.0, 1260.125, 1390.75]}
+    decoded = decode_samples(encode_keystrokes(keystroke_data))
+    
+    assert np.allclose(decoded['down'], keystroke_data['down'], atol=1e-3)
+    assert np.allclose(decoded['up'], keystroke_data['up'], atol=1e-3)
+    assert np.allclose(extract_keystroke_features(decoded), extract_keystroke_features(keystroke_data))
+
+def test_mouse_round_trip_compressed_and_zero_copy():
+    """Test long trajectories compress, decode and read coordinates without copying"""
+    t = np.arange(5000) * 16.0
+    mouse_data = {'x': (t % 700).tolist(), 'y': (t % 300).tolist(), 't': t.tolist()}
+    blob = encode_mouse(mouse_data, compress_min_bytes=0)
+    decoded = decode_samples(blob)
+    
+    assert len(blob) < len(json.dumps(mouse_data)) / 10
+    assert np.array_equal(decoded['t'], t)
+    assert np.array_equal(decoded['x'], np.float32(t % 700))
+    assert not decoded['x'].flags.owndata
+
+def test_legacy_json_rows_still_read():
+    """Test payloads outside the sample format stay JSON and read back"""
+    columns = encode_row_samples({'keystroke_data': {'keys': 12}})
+    
+    assert columns['keystroke_samples'] is None
+    assert read_samples(columns['keystroke_samples'], columns['keystroke_data']) == {'keys': 12}
+    assert read_samples(None, None) == {}
+
+def test_non_finite_timestamps_are_rejected():
+    """Test NaN/inf timings raise instead of being cast to garbage, and such rows stay JSON"""
+    with pytest.raises(ValueError):
+        _time_column([1.0, float('nan')])
+    with pytest.raises(ValueError):
+        _time_column([float('inf')])
+    
+    keystroke_data = {'down': [1000.0, float('nan')], 'up': [1090.0, 1200.0]}
+    columns = encode_row_samples({'keystroke_data': keystroke_data})
+    
+    assert encode_keystrokes(keystroke_data) is None
+    assert columns['keystroke_samples'] is None
+    assert read_samples(None, columns['keystroke_data'])['up'] == [1090.0, 1200.0]
\ No newline at end of file
@@ -0,0 +1,53 @@
+import random
+from backend.services.scoring_scheduler import ScoringScheduler
+from backend.services.session_trust import SessionTrustTracker
+
+FEATURES = ['keystroke_speed', 'mouse_speed']
+MAX_SKIP = 8
+
+def model_score(event):
+    # Stands in for the forest: the impostor's raw timings give them away even when the averages match
+    if event.get('impostor'):
+        return 40.0
+    return 97.0 - abs(event['keystroke_speed'] - 5.0) * 4
+
+def session_events(normal, hijacked, impostor_speed, seed=7):
+    rng = random.Random(seed)
+    events = [{'keystroke_speed': rng.uniform(4.5, 5.5), 'mouse_speed': rng.uniform(280, 320)} for _ in range(normal)]
+    events += [
+        {'keystroke_speed': impostor_speed, 'mouse_speed': rng.uniform(280, 320), 'impostor': True}
+        for _ in range(hijacked)
+    ]
+    return events
+
+def replay(events):
+    """Feed events through the scheduler and tracker as the ingest route does; returns (logout index, scheduler)"""
+    tracker = SessionTrustTracker(FEATURES, window=16, min_low=4, hard_floor=20)
+    scheduler = ScoringScheduler(tracker, high_trust=90, max_skip=MAX_SKIP, drift_tolerance=0.5)
+    for i, event in enumerate(events):
+        needs_score = scheduler.plan('session', [event])[0]
+        scored = [event] if needs_score or tracker.get('session') is None else []
+        logout, _ = tracker.observe('session', scored, [model_score(e) for e in scored], now=float(i))
+        if logout:
+            return i, scheduler
+    return None, scheduler
+
+def test_steady_sessions_skip_most_scoring():
+    """Test a long high-trust session is fully scored only on the interval after warming up"""
+    logout_at, scheduler = replay(session_events(400, 0, 5.0))
+    assert logout_at is None
+    assert scheduler.stats['skip_fraction'] > 0.8
+    assert scheduler.stats['reasons']['new'] == 16
+    assert scheduler.stats['reasons']['drift'] == 0
+
+def test_injected_hijacks_are_detected_within_bound():
+    """Test replayed hijacks end the session within a bounded number of events despite skipping"""
+    # Cheap features drift: the first impostor event is scored and the session escalates
+    logout_at, scheduler = replay(session_events(400, 50, 12.0))
+    assert logout_at is not None and logout_at - 400 <= 2
+    assert scheduler.stats['reasons']['drift'] >= 1
+    
+    # No drift: caught at the next interval, then every event is scored until logout
+    logout_at, scheduler = replay(session_events(400, 50, 5.0))
+    assert logout_at is not None and logout_at - 400 <= MAX_SKIP + 2
+    assert scheduler.stats['reasons']['low_trust'] >= 1
\ No newline at end of file
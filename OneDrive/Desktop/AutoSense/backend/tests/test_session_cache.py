@@ -0,0 +1,78 @@
+from datetime import datetime
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from backend.config.database import db
+from backend.models.user import User
+from backend.models.session import Session
+from backend.services.session_cache import ActiveSessionCache
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Session(user_id=1, session_token='token-1', jti='jti-1', status='active', last_activity=datetime(2026, 1, 1)),
+            Session(user_id=2, session_token='token-2', jti='jti-2', status='active', last_activity=datetime(2026, 1, 1))
+        ])
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+def captured_statements():
+    """SQL sent to the current engine from here on"""
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    return statements
+
+def test_lookups_hit_memory_until_invalidated(app):
+    """Test repeated lookups cost one query and invalidation forces a reload"""
+    cache = ActiveSessionCache(app, db, Session, ttl=60)
+    with app.app_context():
+        statements = captured_statements()
+        for _ in range(5):
+            assert cache.get_active(1, 'jti-1').session_token == 'token-1'
+        assert cache.get_active(3, 'jti-3') is None
+        assert cache.get_active(3, 'jti-3') is None
+        assert len(statements) == 2
+        
+        Session.query.filter_by(user_id=1).update({'status': 'terminated'})
+        db.session.commit()
+        cache.invalidate(1)
+        assert cache.get_active(1, 'jti-1') is None
+    assert (cache.stats['hits'], cache.stats['misses']) == (5, 3)
+
+def test_lookups_are_per_token(app):
+    """Test each of a user's tokens resolves to its own session, and another user's token to none"""
+    cache = ActiveSessionCache(app, db, Session, ttl=60)
+    with app.app_context():
+        db.session.add(Session(user_id=1, session_token='token-1b', jti='jti-1b', status='active'))
+        db.session.commit()
+        
+        assert cache.get_active(1, 'jti-1').session_token == 'token-1'
+        assert cache.get_active(1, 'jti-1b').session_token == 'token-1b'
+        assert cache.get_active(1, 'jti-2') is None
+        assert cache.get_active(1, 'jti-1').session_token == 'token-1'
+    assert (cache.stats['hits'], cache.stats['misses']) == (1, 3)
+
+def test_heartbeats_are_coalesced_into_one_update(app):
+    """Test many touches persist each session's latest activity in one bulk UPDATE"""
+    cache = ActiveSessionCache(app, db, Session, heartbeat_interval=3600)
+    with app.app_context():
+        first, second = cache.get_active(1, 'jti-1'), cache.get_active(2, 'jti-2')
+    
+    for minute in range(10):
+        cache.touch(first, datetime(2026, 1, 2, 0, minute))
+    cache.touch(second, datetime(2026, 1, 3))
+    
+    with app.app_context():
+        statements = captured_statements()
+        assert cache.flush() == 2
+        assert sum(statement.startswith('UPDATE') for statement in statements) == 1
+        assert db.session.get(Session, 1).last_activity == datetime(2026, 1, 2, 0, 9)
+        assert db.session.get(Session, 2).last_activity == datetime(2026, 1, 3)
+    assert cache.flush() == 0
+    cache.stop()
\ No newline at end of file
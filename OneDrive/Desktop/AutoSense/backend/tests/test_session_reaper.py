@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from backend.config.database import db
+from backend.models.user import User
+from backend.models.session import Session
+from backend.services.session_cache import ActiveSessionCache
+from backend.services.session_reaper import SessionReaper
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Session(user_id=user_id, session_token=f"token-{user_id}", jti=f"jti-{user_id}", status='active',
+                    last_activity=NOW - timedelta(minutes=user_id * 10))
+            for user_id in range(1, 6)
+        ])
+        db.session.add(Session(user_id=9, session_token='token-9', status='terminated', last_activity=NOW - timedelta(days=1)))
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+def captured_statements():
+    """SQL sent to the current engine from here on"""
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    return statements
+
+def statuses():
+    return {session.user_id: session.status for session in Session.query.all()}
+
+def test_idle_sessions_expire_in_one_update(app):
+    """Test a sweep expires only sessions idle past the timeout, in a single UPDATE"""
+    reaper = SessionReaper(app, db, Session, timeout_minutes=30)
+    with app.app_context():
+        statements = captured_statements()
+        sweep = reaper.sweep(now=NOW)
+        assert sweep['expired'] == 3
+        assert sweep['seconds'] >= 0
+        assert sum(statement.startswith('UPDATE') for statement in statements) == 1
+        assert statuses() == {1: 'active', 2: 'active', 3: 'expired', 4: 'expired', 5: 'expired', 9: 'terminated'}
+        
+        # Nothing is due yet, so the next sweep only reads newly created sessions
+        del statements[:]
+        assert reaper.sweep(now=NOW + timedelta(minutes=5))['expired'] == 0
+        assert [statement for statement in statements if 'sessions.id >' not in statement] == []
+    assert reaper.stats['sweeps'] == 2
+    assert reaper.stats['expired'] == 3
+    assert reaper.stats['last_sweep']['tracked'] == 2
+
+def test_activity_postpones_expiry(app):
+    """Test heartbeats and new sessions move deadlines, and expiry invalidates the cache"""
+    cache = ActiveSessionCache(app, db, Session, ttl=3600, heartbeat_interval=3600)
+    reaper = SessionReaper(app, db, Session, timeout_minutes=30, session_cache=cache)
+    with app.app_context():
+        reaper.sweep(now=NOW)
+        db.session.add(Session(user_id=6, session_token='token-6', status='active', last_activity=NOW))
+        db.session.commit()
+        active = cache.get_active(2, 'jti-2')
+        assert cache.get_active(1, 'jti-1') is not None
+    
+    # User 2's deadline passes, but a heartbeat still waiting in the cache keeps them in
+    cache.touch(active, NOW + timedelta(minutes=15))
+    sweep = reaper.sweep(now=NOW + timedelta(minutes=20))
+    assert sweep['expired'] == 1
+    with app.app_context():
+        assert statuses()[1] == 'expired'
+        assert statuses()[2] == 'active'
+        assert cache.get_active(1, 'jti-1') is None
+        
+        assert reaper.sweep(now=NOW + timedelta(minutes=46))['expired'] == 2
+        assert statuses()[2] == 'expired'
+        assert statuses()[6] == 'expired'
+    cache.stop()
\ No newline at end of file
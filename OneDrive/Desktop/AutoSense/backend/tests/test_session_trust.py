@@ -0,0 +1,47 @@
+from backend.services.session_trust import SessionTrustState, SessionTrustTracker
+
+FEATURES = ['keystroke_speed', 'mouse_speed']
+
+def make_tracker(**kwargs):
+    return SessionTrustTracker(FEATURES, **{'window': 4, 'alpha': 0.3, 'min_low': 3, 'hard_floor': 20, **kwargs})
+
+def test_single_low_score_does_not_end_session():
+    """Test one low event is absorbed while a sustained drop or a catastrophic score ends the session"""
+    tracker = make_tracker()
+    event = {'keystroke_speed': 5.0, 'mouse_speed': 300.0}
+    assert tracker.observe(1, [event], [45.0], now=0.0) == (False, 83.5)
+    assert not tracker.observe(1, [event] * 2, [95.0, 96.0], now=1.0)[0]
+    assert tracker.stats['suppressed'] == 1
+    
+    # Three low scores in the window end it, reported with the session's average
+    logout, trust = tracker.observe(1, [event] * 3, [50.0, 55.0, 60.0], now=2.0)
+    assert logout and trust < 80
+    
+    assert tracker.observe(2, [event], [10.0], now=2.0) == (True, 10.0)
+    assert tracker.stats['logouts'] == 2
+
+def test_ring_buffer_keeps_only_the_window():
+    """Test the state holds the last `window` scores and vectors and a correct low count"""
+    state = SessionTrustState(window=3, n_features=2)
+    for i, score in enumerate([60.0, 90.0, 65.0, 95.0, 99.0]):
+        state.push(score, [i, i * 10], alpha=0.5, threshold=70)
+    
+    assert state.recent_scores() == [65.0, 95.0, 99.0]
+    assert state.recent_features() == [[2.0, 20.0], [3.0, 30.0], [4.0, 40.0]]
+    assert state.low == 1
+    assert len(state.scores) == 3 and len(state.features) == 6
+
+def test_states_are_bounded_and_expire():
+    """Test the tracker evicts least recently used sessions and drops idle or ended ones"""
+    tracker = make_tracker(max_sessions=2, idle_seconds=60)
+    event = {'keystroke_speed': 5.0}
+    for key in ('a', 'b', 'c'):
+        tracker.observe(key, [event], [90.0], now=0.0)
+    assert tracker.get('a') is None and tracker.stats['evicted'] == 1
+    
+    tracker.end('b')
+    assert tracker.get('b') is None
+    
+    tracker.observe('d', [event], [90.0], now=100.0)
+    assert tracker.get('c') is None
+    assert tracker.stats['sessions'] == 1
\ No newline at end of file
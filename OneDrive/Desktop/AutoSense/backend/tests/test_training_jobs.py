@@ -0,0 +1,88 @@
+import time
+import pytest
+from flask import Flask
+from backend.app import app, training_jobs
+from backend.config.database import db
+from backend.models.training_job import TrainingJob
+from backend.services.training_jobs import TrainingJobManager, fit_behavior_model
+
+SAMPLES = [
+    {'keystroke_speed': 5 + i % 3, 'mouse_speed': 300 + i % 7,
+     'idle_time': 2 + i % 2, 'cursor_path_length': 800 + i % 11}
+    for i in range(50)
+]
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    training_jobs.executor_type = 'local'
+    
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+        yield client
+
+def auth_headers(user_id=1):
+    from flask_jwt_extended import create_access_token
+    
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+def test_fit_behavior_model():
+    """Test the picklable fit function returns scaler, model and features"""
+    model_data = fit_behavior_model(SAMPLES)
+    
+    assert set(model_data) == {'model', 'scaler', 'features'}
+    assert model_data['scaler'].mean_.shape == (4,)
+
+def test_train_returns_job_and_status(client):
+    """Test training is submitted as a job and reports its status"""
+    response = client.post('/api/ai/train', json=SAMPLES, headers=auth_headers())
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    
+    status = client.get(f'/api/ai/train/{job_id}', headers=auth_headers())
+    assert status.status_code == 200
+    assert status.get_json()['status'] == 'completed'
+
+def test_training_status_is_private(client):
+    """Test users cannot read each other's jobs"""
+    job_id = client.post('/api/ai/train', json=SAMPLES, headers=auth_headers(1)).get_json()['job_id']
+    
+    response = client.get(f'/api/ai/train/{job_id}', headers=auth_headers(2))
+    assert response.status_code == 404
+
+def wait_for_job(manager, job_id, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = manager.status(job_id)['status']
+        if status in ('completed', 'failed'):
+            return status
+        time.sleep(0.1)
+    return status
+
+def test_process_pool_fits_and_fails_jobs(tmp_path):
+    """Test jobs fit in real spawned workers, and a job the pool cannot take is marked failed"""
+    job_app = Flask(__name__)
+    job_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'jobs.db'}"
+    db.init_app(job_app)
+    completed = []
+    manager = TrainingJobManager(job_app, db, TrainingJob, lambda user_id, model_data: completed.append(model_data),
+                                 executor='process', max_workers=1)
+    
+    with job_app.app_context():
+        db.create_all()
+        job_id = manager.submit(1, SAMPLES)
+        assert wait_for_job(manager, job_id) == 'completed'
+        assert completed[0]['features'] == ['keystroke_speed', 'mouse_speed', 'idle_time', 'cursor_path_length']
+        
+        manager.executor.shutdown()
+        job_id = manager.submit(1, SAMPLES)
+        job = manager.status(job_id)
+        assert job['status'] == 'failed' and 'shutdown' in job['error']
+        
+        # The next job gets a fresh pool
+        assert wait_for_job(manager, manager.submit(1, SAMPLES)) == 'completed'
+        manager.shutdown()
+        db.drop_all()
\ No newline at end of file
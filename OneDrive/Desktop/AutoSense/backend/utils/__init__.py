@@ -1,5 +1,16 @@
-from .security import SecurityUtils
-from .validators import ValidationUtils
-from .helpers import HelperUtils
+import importlib
+
+# Loaded on first use, so importing one helper module does not require the
+# others' dependencies (PyJWT for security, email-validator for validaters)
+_exports = {
+    'SecurityUtils': '.security',
+    'ValidationUtils': '.validaters',
+    'HelperUtils': '.helpers'
+}
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_exports[name], __name__), name)
 
 __all__ = ['SecurityUtils', 'ValidationUtils', 'HelperUtils']
\ No newline at end of file
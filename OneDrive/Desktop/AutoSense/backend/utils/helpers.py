@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 import json
+import numpy as np
 
 class HelperUtils:
     @staticmethod
@@ -42,6 +43,20 @@ class HelperUtils:
         
         return trust_score
     
+    @staticmethod
+    def calculate_trust_scores(baselines, current):
+        """Vectorized calculate_trust_score: one score per row of two rows x features arrays"""
+        baselines = np.asarray(baselines, dtype=np.float64)
+        current = np.asarray(current, dtype=np.float64)
+        if current.size == 0:
+            return np.full(len(current), 100.0)
+        
+        # Zeros count as 1, as in the per-key version
+        baselines = np.where(baselines == 0, 1.0, baselines)
+        current = np.where(current == 0, 1.0, current)
+        deviations = np.abs(baselines - current) / baselines * 100
+        return np.maximum(0, 100 - deviations.mean(axis=1))
+    
     @staticmethod
     def json_serialize(obj):
         """Serialize object to JSON with custom handling"""
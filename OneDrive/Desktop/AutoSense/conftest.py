@@ -0,0 +1,9 @@
+import os
+
+# At the project root so pytest puts this directory on sys.path and `backend`
+# imports the same whether the suite is run from here or from further up.
+# app.py reads its settings at import time, before any fixture runs: keep the
+# suite on an in-memory database and away from the mail server
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['MAIL_SUPPRESS_SEND'] = 'true'
+os.environ['MAIL_USERNAME'] = 'noreply@authsense.test'
\ No newline at end of file